@@ -1,98 +1,1788 @@
 # app.py
+import base64
+import bisect
+import functools
+import gzip
+import hashlib
+import json
 import os
+import pathlib
+import queue
+import re
 import sqlite3
-from flask import Flask, request, jsonify, render_template, send_file
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from flask import Flask, Response, request, jsonify, render_template, send_file, g
+from flask.json.provider import DefaultJSONProvider
+import click # Installed with Flask; options of the CLI commands
+import numpy as np # Installed with pandas; used for the utilization computations
 import pandas as pd # Required for Excel operations, install with pip install pandas openpyxl
-from io import BytesIO # Required for in-memory Excel files
+import openpyxl # Required for streaming Excel uploads, installed with pandas above
+import xlsxwriter # Required for streaming Excel exports, install with pip install xlsxwriter
+from io import BufferedReader, BytesIO # Required for in-memory Excel files and buffered NDJSON reads
+try:
+    import orjson # Optional: faster JSON responses, install with pip install orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli # Optional: br response compression, install with pip install brotli
+except ImportError:
+    brotli = None
 
 # --- Database Initialization (database.py content integrated here for simplicity) ---
 DATABASE = 'manpower_management.db'
+ARCHIVE_DATABASE = 'manpower_management_archive.db' # Attached to every connection as "archive", see Archive
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist."""
-    with sqlite3.connect(DATABASE) as conn:
-        cursor = conn.cursor()
+# --- Schema Migrations ---
+# Each migration runs once, in its own transaction, and bumps PRAGMA user_version to its number.
+# Append new migrations to MIGRATIONS; never edit or reorder ones that have shipped.
 
-        # Stakeholders Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stakeholders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                role TEXT NOT NULL
-            )
-        ''')
+def migration_001_base_tables(cursor):
+    """Creates the original tables (no-op for databases created before migrations existed)."""
+    # Stakeholders Table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stakeholders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            role TEXT NOT NULL
+        )
+    ''')
 
-        # Requests Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_no TEXT UNIQUE NOT NULL,
-                requested_by TEXT NOT NULL,
-                department TEXT NOT NULL,
-                category TEXT NOT NULL,
-                request_date TEXT NOT NULL, -- YYYY-MM-DD
-                request_title TEXT NOT NULL,
-                description TEXT
-            )
-        ''')
+    # Requests Table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_no TEXT UNIQUE NOT NULL,
+            requested_by TEXT NOT NULL,
+            department TEXT NOT NULL,
+            category TEXT NOT NULL,
+            request_date TEXT NOT NULL, -- YYYY-MM-DD
+            request_title TEXT NOT NULL,
+            description TEXT
+        )
+    ''')
 
-        # RequestUpdates Table (One-to-one with Requests)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS request_updates (
-                request_id INTEGER PRIMARY KEY,
-                srs_sent_date TEXT, -- YYYY-MM-DD
-                srs_approval_date TEXT, -- YYYY-MM-DD
-                estimation_received_date TEXT, -- YYYY-MM-DD
-                indent_sent_date TEXT, -- YYYY-MM-DD
-                signed_indent_received_date TEXT, -- YYYY-MM-DD
-                estimated_man_hours_ba INTEGER,
-                estimated_man_hours_dev INTEGER,
-                estimated_man_hours_tester INTEGER,
-                development_start_date TEXT, -- YYYY-MM-DD
-                uat_mail_date TEXT, -- YYYY-MM-DD
-                uat_confirmation_date TEXT, -- YYYY-MM-DD
-                current_status TEXT, -- New field added
-                FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE CASCADE
-            )
-        ''')
+    # RequestUpdates Table (One-to-one with Requests)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_updates (
+            request_id INTEGER PRIMARY KEY,
+            srs_sent_date TEXT, -- YYYY-MM-DD
+            srs_approval_date TEXT, -- YYYY-MM-DD
+            estimation_received_date TEXT, -- YYYY-MM-DD
+            indent_sent_date TEXT, -- YYYY-MM-DD
+            signed_indent_received_date TEXT, -- YYYY-MM-DD
+            estimated_man_hours_ba INTEGER,
+            estimated_man_hours_dev INTEGER,
+            estimated_man_hours_tester INTEGER,
+            development_start_date TEXT, -- YYYY-MM-DD
+            uat_mail_date TEXT, -- YYYY-MM-DD
+            uat_confirmation_date TEXT, -- YYYY-MM-DD
+            current_status TEXT, -- New field added
+            FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE CASCADE
+        )
+    ''')
 
-        # ActualManHours Table (Many-to-one with Requests, Many-to-one with Stakeholders)
-        # Added 'task_date' column
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS actual_man_hours (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER NOT NULL,
-                stakeholder_id INTEGER NOT NULL,
-                actual_man_hours INTEGER NOT NULL,
-                task_date TEXT, -- YYYY-MM-DD, Added for the update man-hours requirement
-                FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE CASCADE,
-                FOREIGN KEY (stakeholder_id) REFERENCES stakeholders(id) ON DELETE CASCADE
-            )
-        ''')
+    # ActualManHours Table (Many-to-one with Requests, Many-to-one with Stakeholders)
+    # Added 'task_date' column
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS actual_man_hours (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            stakeholder_id INTEGER NOT NULL,
+            actual_man_hours INTEGER NOT NULL,
+            task_date TEXT, -- YYYY-MM-DD, Added for the update man-hours requirement
+            FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE CASCADE,
+            FOREIGN KEY (stakeholder_id) REFERENCES stakeholders(id) ON DELETE CASCADE
+        )
+    ''')
 
-        # Add current_status column if it doesn't exist
+    # Add current_status column if it doesn't exist
+    try:
+        cursor.execute("ALTER TABLE request_updates ADD COLUMN current_status TEXT")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e).lower():
+            raise e
+
+# RequestManhourRollup Table and the triggers maintaining it from actual_man_hours and stakeholders.
+# Entries are attributed to the role their stakeholder currently has, same as the report joins.
+MANHOUR_ROLLUP_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS request_manhour_rollup (
+        request_id INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        actual_man_hours INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (request_id, role)
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_rollup_insert AFTER INSERT ON actual_man_hours
+    BEGIN
+        INSERT INTO request_manhour_rollup (request_id, role, actual_man_hours)
+        SELECT NEW.request_id, s.role, NEW.actual_man_hours FROM stakeholders s
+        WHERE s.id = NEW.stakeholder_id AND EXISTS (SELECT 1 FROM requests WHERE id = NEW.request_id)
+        ON CONFLICT (request_id, role) DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_rollup_delete AFTER DELETE ON actual_man_hours
+    BEGIN
+        UPDATE request_manhour_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE request_id = OLD.request_id AND role = (SELECT role FROM stakeholders WHERE id = OLD.stakeholder_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_rollup_update AFTER UPDATE OF request_id, stakeholder_id, actual_man_hours ON actual_man_hours
+    BEGIN
+        UPDATE request_manhour_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE request_id = OLD.request_id AND role = (SELECT role FROM stakeholders WHERE id = OLD.stakeholder_id);
+        INSERT INTO request_manhour_rollup (request_id, role, actual_man_hours)
+        SELECT NEW.request_id, s.role, NEW.actual_man_hours FROM stakeholders s
+        WHERE s.id = NEW.stakeholder_id AND EXISTS (SELECT 1 FROM requests WHERE id = NEW.request_id)
+        ON CONFLICT (request_id, role) DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+    END
+    ''',
+    # A role change moves the stakeholder's hours from the old role's totals to the new role's
+    '''
+    CREATE TRIGGER IF NOT EXISTS stakeholder_rollup_role_change AFTER UPDATE OF role ON stakeholders
+    WHEN OLD.role IS NOT NEW.role
+    BEGIN
+        UPDATE request_manhour_rollup SET actual_man_hours = actual_man_hours - (
+            SELECT SUM(a.actual_man_hours) FROM actual_man_hours a
+            WHERE a.stakeholder_id = NEW.id AND a.request_id = request_manhour_rollup.request_id
+        )
+        WHERE role = OLD.role AND request_id IN (SELECT request_id FROM actual_man_hours WHERE stakeholder_id = NEW.id);
+        INSERT INTO request_manhour_rollup (request_id, role, actual_man_hours)
+        SELECT a.request_id, NEW.role, SUM(a.actual_man_hours) FROM actual_man_hours a
+        JOIN requests r ON a.request_id = r.id
+        WHERE a.stakeholder_id = NEW.id GROUP BY a.request_id
+        ON CONFLICT (request_id, role) DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+    END
+    ''',
+    # Runs before the delete so the role is still known, whether or not the entries cascade away
+    '''
+    CREATE TRIGGER IF NOT EXISTS stakeholder_rollup_delete BEFORE DELETE ON stakeholders
+    BEGIN
+        UPDATE request_manhour_rollup SET actual_man_hours = actual_man_hours - (
+            SELECT SUM(a.actual_man_hours) FROM actual_man_hours a
+            WHERE a.stakeholder_id = OLD.id AND a.request_id = request_manhour_rollup.request_id
+        )
+        WHERE role = OLD.role AND request_id IN (SELECT request_id FROM actual_man_hours WHERE stakeholder_id = OLD.id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS request_rollup_delete AFTER DELETE ON requests
+    BEGIN
+        DELETE FROM request_manhour_rollup WHERE request_id = OLD.id;
+    END
+    ''',
+]
+
+def migration_002_manhour_rollup(cursor):
+    """Adds request_manhour_rollup with its maintenance triggers and fills it."""
+    for statement in MANHOUR_ROLLUP_SCHEMA:
+        cursor.execute(statement)
+    rebuild_manhour_rollup(cursor.connection)
+
+def migration_003_indexes(cursor):
+    """Adds the secondary indexes and the unique man-hours key (after removing duplicates)."""
+    # Keep the most recently inserted entry per (request, stakeholder, task date). Entries
+    # without a task date predate that column and are not duplicates of each other.
+    cursor.execute('''
+        DELETE FROM actual_man_hours
+        WHERE task_date IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM actual_man_hours
+            WHERE task_date IS NOT NULL
+            GROUP BY request_id, stakeholder_id, task_date
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_actual_man_hours_request_stakeholder_date
+        ON actual_man_hours (request_id, stakeholder_id, task_date)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_actual_man_hours_stakeholder ON actual_man_hours (stakeholder_id, task_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_actual_man_hours_task_date ON actual_man_hours (task_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_requests_request_date ON requests (request_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_request_updates_current_status ON request_updates (current_status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_stakeholders_role ON stakeholders (role)')
+
+# RequestsFts Table: trigram full-text index over the searchable request columns. It is an
+# external-content table (text is read back from requests), kept in sync by the triggers below.
+REQUESTS_FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(
+        request_no, request_title, description, department, category,
+        content='requests', content_rowid='id', tokenize='trigram'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_insert AFTER INSERT ON requests
+    BEGIN
+        INSERT INTO requests_fts (rowid, request_no, request_title, description, department, category)
+        VALUES (NEW.id, NEW.request_no, NEW.request_title, NEW.description, NEW.department, NEW.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_delete AFTER DELETE ON requests
+    BEGIN
+        INSERT INTO requests_fts (requests_fts, rowid, request_no, request_title, description, department, category)
+        VALUES ('delete', OLD.id, OLD.request_no, OLD.request_title, OLD.description, OLD.department, OLD.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_update AFTER UPDATE OF id, request_no, request_title, description, department, category ON requests
+    BEGIN
+        INSERT INTO requests_fts (requests_fts, rowid, request_no, request_title, description, department, category)
+        VALUES ('delete', OLD.id, OLD.request_no, OLD.request_title, OLD.description, OLD.department, OLD.category);
+        INSERT INTO requests_fts (rowid, request_no, request_title, description, department, category)
+        VALUES (NEW.id, NEW.request_no, NEW.request_title, NEW.description, NEW.department, NEW.category);
+    END
+    ''',
+]
+
+def migration_004_requests_fts(cursor):
+    """Adds the requests_fts search index with its maintenance triggers and fills it."""
+    for statement in REQUESTS_FTS_SCHEMA:
+        cursor.execute(statement)
+    rebuild_requests_fts(cursor.connection)
+
+def migration_005_data_generation(cursor):
+    """Adds the single-row data_generation counter behind the response cache."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    # Start from the creation time so a recreated database never reuses ETags handed out for an old one
+    cursor.execute("INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, CAST(strftime('%s', 'now') AS INTEGER))")
+
+# ManhourPeriodRollup Table: actual man-hours per week and per month for every (stakeholder, request),
+# kept current from actual_man_hours by the triggers below. Weeks start on Monday; entries without
+# a valid task date belong to no period. Roles, departments and categories are joined in at query
+# time, so stakeholder role changes need no maintenance here. PERIOD_BUCKET_SQL maps each granularity
+# to the bucket expression the triggers use.
+PERIOD_BUCKET_SQL = {
+    'week': "date({}, 'weekday 0', '-6 days')",
+    'month': "date({}, 'start of month')",
+}
+
+MANHOUR_PERIOD_ROLLUP_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS manhour_period_rollup (
+        granularity TEXT NOT NULL, -- 'week' or 'month'
+        bucket_start TEXT NOT NULL, -- YYYY-MM-DD, first day of the week/month
+        stakeholder_id INTEGER NOT NULL,
+        request_id INTEGER NOT NULL,
+        actual_man_hours INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket_start, stakeholder_id, request_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_manhour_period_rollup_stakeholder ON manhour_period_rollup (granularity, stakeholder_id, bucket_start)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_period_rollup_insert AFTER INSERT ON actual_man_hours
+    WHEN date(NEW.task_date) IS NOT NULL
+    BEGIN
+        INSERT INTO manhour_period_rollup (granularity, bucket_start, stakeholder_id, request_id, actual_man_hours)
+        VALUES ('week', date(NEW.task_date, 'weekday 0', '-6 days'), NEW.stakeholder_id, NEW.request_id, NEW.actual_man_hours)
+        ON CONFLICT DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+        INSERT INTO manhour_period_rollup (granularity, bucket_start, stakeholder_id, request_id, actual_man_hours)
+        VALUES ('month', date(NEW.task_date, 'start of month'), NEW.stakeholder_id, NEW.request_id, NEW.actual_man_hours)
+        ON CONFLICT DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_period_rollup_delete AFTER DELETE ON actual_man_hours
+    WHEN date(OLD.task_date) IS NOT NULL
+    BEGIN
+        UPDATE manhour_period_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE granularity = 'week' AND bucket_start = date(OLD.task_date, 'weekday 0', '-6 days')
+          AND stakeholder_id = OLD.stakeholder_id AND request_id = OLD.request_id;
+        UPDATE manhour_period_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE granularity = 'month' AND bucket_start = date(OLD.task_date, 'start of month')
+          AND stakeholder_id = OLD.stakeholder_id AND request_id = OLD.request_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS amh_period_rollup_update AFTER UPDATE OF request_id, stakeholder_id, actual_man_hours, task_date ON actual_man_hours
+    BEGIN
+        UPDATE manhour_period_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE granularity = 'week' AND bucket_start = date(OLD.task_date, 'weekday 0', '-6 days')
+          AND stakeholder_id = OLD.stakeholder_id AND request_id = OLD.request_id;
+        UPDATE manhour_period_rollup SET actual_man_hours = actual_man_hours - OLD.actual_man_hours
+        WHERE granularity = 'month' AND bucket_start = date(OLD.task_date, 'start of month')
+          AND stakeholder_id = OLD.stakeholder_id AND request_id = OLD.request_id;
+        INSERT INTO manhour_period_rollup (granularity, bucket_start, stakeholder_id, request_id, actual_man_hours)
+        SELECT 'week', date(NEW.task_date, 'weekday 0', '-6 days'), NEW.stakeholder_id, NEW.request_id, NEW.actual_man_hours
+        WHERE date(NEW.task_date) IS NOT NULL
+        ON CONFLICT DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+        INSERT INTO manhour_period_rollup (granularity, bucket_start, stakeholder_id, request_id, actual_man_hours)
+        SELECT 'month', date(NEW.task_date, 'start of month'), NEW.stakeholder_id, NEW.request_id, NEW.actual_man_hours
+        WHERE date(NEW.task_date) IS NOT NULL
+        ON CONFLICT DO UPDATE SET actual_man_hours = actual_man_hours + excluded.actual_man_hours;
+    END
+    ''',
+    # Cover deletes that do not cascade (foreign keys off); with cascades these find nothing left
+    '''
+    CREATE TRIGGER IF NOT EXISTS request_period_rollup_delete AFTER DELETE ON requests
+    BEGIN
+        DELETE FROM manhour_period_rollup WHERE request_id = OLD.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stakeholder_period_rollup_delete AFTER DELETE ON stakeholders
+    BEGIN
+        DELETE FROM manhour_period_rollup WHERE stakeholder_id = OLD.id;
+    END
+    ''',
+]
+
+def migration_006_manhour_period_rollup(cursor):
+    """Adds manhour_period_rollup with its maintenance triggers and fills it."""
+    for statement in MANHOUR_PERIOD_ROLLUP_SCHEMA:
+        cursor.execute(statement)
+    rebuild_manhour_period_rollup(cursor.connection)
+
+# UploadFingerprints Table: the SHA-256 of every uploaded file that applied without failed rows, so
+# an identical re-upload (e.g. the same cumulative timesheet workbook) can be skipped unparsed.
+def migration_007_upload_fingerprints(cursor):
+    """Adds the upload_fingerprints record of cleanly applied upload files."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_fingerprints (
+            upload_type TEXT NOT NULL, -- Upload job type, e.g. 'actual_manhours'
+            file_sha256 TEXT NOT NULL,
+            filename TEXT,
+            row_count INTEGER NOT NULL, -- Distinct entries the file holds
+            uploaded_at TEXT NOT NULL, -- UTC, last time the file was applied
+            PRIMARY KEY (upload_type, file_sha256)
+        )
+    ''')
+
+# ArchivedRequests Table: the requests moved to the archive database (see Archive), by the id they
+# keep there. Their request numbers stay taken: main's UNIQUE constraint cannot see the archive, so
+# the triggers below reject them. Archiving deletes requests with their period rollup rows, which
+# ix_manhour_period_rollup_request finds without scanning the rollup once per request.
+ARCHIVED_REQUESTS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS archived_requests (
+        id INTEGER PRIMARY KEY, -- requests.id, given back when the request is restored
+        request_no TEXT NOT NULL UNIQUE,
+        archived_at TEXT NOT NULL -- UTC
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_archived_number_insert BEFORE INSERT ON requests
+    WHEN EXISTS (SELECT 1 FROM archived_requests WHERE request_no = NEW.request_no)
+    BEGIN
+        SELECT RAISE(ABORT, 'UNIQUE constraint failed: requests.request_no (taken by an archived request)');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_archived_number_update BEFORE UPDATE OF request_no ON requests
+    WHEN EXISTS (SELECT 1 FROM archived_requests WHERE request_no = NEW.request_no)
+    BEGIN
+        SELECT RAISE(ABORT, 'UNIQUE constraint failed: requests.request_no (taken by an archived request)');
+    END
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_manhour_period_rollup_request ON manhour_period_rollup (request_id)',
+]
+
+def migration_008_archived_requests(cursor):
+    """Adds archived_requests with the triggers reserving archived request numbers."""
+    for statement in ARCHIVED_REQUESTS_SCHEMA:
+        cursor.execute(statement)
+
+MIGRATIONS = [
+    migration_001_base_tables,
+    migration_002_manhour_rollup,
+    migration_003_indexes,
+    migration_004_requests_fts,
+    migration_005_data_generation,
+    migration_006_manhour_period_rollup,
+    migration_007_upload_fingerprints,
+    migration_008_archived_requests,
+]
+
+# Archive database schema: the archived tables with the hot tables' columns in the same order, as rows
+# are copied with SELECT *. A migration adding a column to one of them must add it here as well.
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS archive.requests (
+        id INTEGER PRIMARY KEY,
+        request_no TEXT NOT NULL, -- Unique through main.archived_requests
+        requested_by TEXT NOT NULL,
+        department TEXT NOT NULL,
+        category TEXT NOT NULL,
+        request_date TEXT NOT NULL,
+        request_title TEXT NOT NULL,
+        description TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS archive.request_updates (
+        request_id INTEGER PRIMARY KEY,
+        srs_sent_date TEXT,
+        srs_approval_date TEXT,
+        estimation_received_date TEXT,
+        indent_sent_date TEXT,
+        signed_indent_received_date TEXT,
+        estimated_man_hours_ba INTEGER,
+        estimated_man_hours_dev INTEGER,
+        estimated_man_hours_tester INTEGER,
+        development_start_date TEXT,
+        uat_mail_date TEXT,
+        uat_confirmation_date TEXT,
+        current_status TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS archive.actual_man_hours (
+        id INTEGER PRIMARY KEY,
+        request_id INTEGER NOT NULL,
+        stakeholder_id INTEGER NOT NULL,
+        actual_man_hours INTEGER NOT NULL,
+        task_date TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS archive.ix_actual_man_hours_request ON actual_man_hours (request_id, stakeholder_id, task_date)',
+]
+
+
+def init_db():
+    """Brings the database schema up to date by applying any pending migrations, and creates the archive database's tables."""
+    conn = sqlite3.connect(DATABASE, isolation_level=None) # Transactions are managed explicitly below
+    try:
+        cursor = conn.cursor()
+        current_version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        for version in range(current_version + 1, len(MIGRATIONS) + 1):
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have applied it while we waited for the write lock
+                if cursor.execute('PRAGMA user_version').fetchone()[0] >= version:
+                    cursor.execute('ROLLBACK')
+                    continue
+                MIGRATIONS[version - 1](cursor)
+                cursor.execute(f'PRAGMA user_version = {version}')
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+        cursor.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DATABASE,))
+        if cursor.execute('PRAGMA archive.journal_mode').fetchone()[0] != 'wal':
+            cursor.execute('PRAGMA archive.journal_mode = WAL')
+        for statement in ARCHIVE_SCHEMA:
+            cursor.execute(statement)
+    finally:
+        conn.close()
+
+def rebuild_manhour_rollup(conn):
+    """Recomputes request_manhour_rollup from scratch out of actual_man_hours."""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM request_manhour_rollup')
+    cursor.execute('''
+        INSERT INTO request_manhour_rollup (request_id, role, actual_man_hours)
+        SELECT amh.request_id, s.role, SUM(amh.actual_man_hours)
+        FROM actual_man_hours amh
+        JOIN stakeholders s ON amh.stakeholder_id = s.id
+        JOIN requests r ON amh.request_id = r.id
+        GROUP BY amh.request_id, s.role
+    ''')
+    return cursor.rowcount
+
+def rebuild_manhour_period_rollup(conn):
+    """Recomputes manhour_period_rollup from scratch out of actual_man_hours."""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM manhour_period_rollup')
+    row_count = 0
+    for granularity, bucket_sql in PERIOD_BUCKET_SQL.items():
+        cursor.execute(f'''
+            INSERT INTO manhour_period_rollup (granularity, bucket_start, stakeholder_id, request_id, actual_man_hours)
+            SELECT ?, {bucket_sql.format('task_date')}, stakeholder_id, request_id, SUM(actual_man_hours)
+            FROM actual_man_hours
+            WHERE date(task_date) IS NOT NULL
+            GROUP BY 2, stakeholder_id, request_id
+        ''', (granularity,))
+        row_count += cursor.rowcount
+    return row_count
+
+def rebuild_requests_fts(conn):
+    """Re-indexes requests_fts from the current contents of requests."""
+    conn.execute("INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')")
+
+# --- Connection Pool ---
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection handed out by ConnectionPool; close() only discards uncommitted work.
+    With METRICS_ENABLED its statements run on InstrumentedCursor (see Metrics).
+    """
+    instrumented = False
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or (InstrumentedCursor if self.instrumented else sqlite3.Cursor))
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+class ConnectionPool:
+    """Keeps tuned SQLite connections open for reuse; each one serves a single request at a time."""
+
+    def __init__(self, database, config):
+        self.database = database
+        self.config = config
+        self._idle = queue.LifoQueue(maxsize=config['SQLITE_POOL_SIZE'])
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+            factory=PooledConnection,
+            check_same_thread=False, # Connections move between worker threads, never shared at once
+        )
+        conn.row_factory = sqlite3.Row # This allows access to columns by name
+        # Readers no longer block on writers. Switching needs a lock, so only do it once per database.
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] != 'wal':
+            conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f"PRAGMA synchronous = {self.config['SQLITE_SYNCHRONOUS']}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.config['SQLITE_CACHE_SIZE_KB'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config['SQLITE_MMAP_SIZE'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DATABASE,))
+        conn.execute(f"PRAGMA archive.synchronous = {self.config['SQLITE_SYNCHRONOUS']}")
+        conn.instrumented = self.config['METRICS_ENABLED']
+        return conn
+
+    def acquire(self):
         try:
-            cursor.execute("ALTER TABLE request_updates ADD COLUMN current_status TEXT")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" not in str(e).lower():
-                raise e
-        conn.commit()
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            sqlite3.Connection.close(conn)
 
 # --- Flask Application Setup ---
 app = Flask(__name__)
 
+# SQLite, write queue, batch, upload job, archive, snapshot, cache, compression, metrics and utilization tuning, overridable per deployment through FLASK_-prefixed environment variables
+# (e.g. FLASK_SQLITE_CACHE_SIZE_KB=131072) or by updating app.config before the first request.
+app.config.update(
+    SQLITE_POOL_SIZE=8, # Idle connections kept open between requests
+    SQLITE_BUSY_TIMEOUT_MS=5000, # How long a write waits for the lock, e.g. held by another worker process's writer, before "database is locked"
+    SQLITE_SYNCHRONOUS='NORMAL', # Safe under WAL; FULL also survives power loss
+    SQLITE_CACHE_SIZE_KB=65536, # Page cache per connection
+    SQLITE_MMAP_SIZE=268435456, # Bytes of the database file to memory-map, 0 disables
+    UPLOAD_JOB_WORKERS=2, # Excel uploads processed concurrently in the background
+    UPLOAD_JOB_RETENTION_SECONDS=3600, # How long finished upload jobs stay available for polling
+    UPLOAD_BATCH_ROWS=20000, # Rows an upload job reads, validates and writes at a time, bounding its memory
+    RESPONSE_CACHE_MAX_BYTES=33554432, # Total size of cached report/dashboard responses per process
+    ARCHIVE_AFTER_DAYS=365, # Requests whose UAT was confirmed longer ago are moved by flask archive-requests
+    SNAPSHOT_DIR='snapshots', # Where read snapshots are kept, relative to the working directory like the database
+    SNAPSHOT_REFRESH_SECONDS=300, # How often exports' and analytics' read snapshot is refreshed, 0 makes them read live
+    UTILIZATION_WEEKLY_CAPACITY_HOURS=40, # Hours per week counted as 100% utilization
+    UTILIZATION_UNDER_THRESHOLD=0.5, # Mean utilization below this flags a stakeholder as under-allocated
+    UTILIZATION_SPIKE_Z=2.0, # Standard deviations above a stakeholder's mean week that count as a spike
+    RESPONSE_COMPRESSION_MIN_BYTES=1024, # Smaller responses are sent uncompressed
+    RESPONSE_GZIP_LEVEL=6, # 1 (fastest) to 9 (smallest)
+    RESPONSE_BROTLI_QUALITY=5, # 0 (fastest) to 11 (smallest), used when the brotli package is installed
+    WRITE_QUEUE_MAX_BATCH=64, # Most queued writes committed in one transaction, per worker process (see Write Queue)
+    BATCH_MAX_RECORDS=500000, # Most records accepted by one call to a /batch endpoint
+    METRICS_ENABLED=True, # Per-route latency and SQL statement metrics, served at /metrics
+    SQL_SLOW_QUERY_MS=500, # Statements taking longer are logged with their query plan, 0 disables
+)
+app.config.from_prefixed_env()
+
 # Ensure the database is initialized when the app starts
 with app.app_context():
     init_db()
 
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns the application's connection pool, creating it on first use."""
+    with _pool_lock:
+        if 'sqlite_pool' not in app.extensions:
+            app.extensions['sqlite_pool'] = ConnectionPool(DATABASE, app.config)
+        return app.extensions['sqlite_pool']
+
 def get_db():
-    """Establishes a database connection or returns the existing one."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row # This allows access to columns by name
-    return conn
+    """Returns the connection for the current request, checking one out of the pool on first use."""
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Returns the request's connection to the pool."""
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+    conn = g.pop('snapshot_db', None)
+    if conn is not None:
+        g.snapshot['pool'].release(conn)
+
+# --- Write Queue ---
+# Every write runs on one writer thread per process with its own connection, so writes never
+# contend for SQLite's lock inside a process and requests only read from pooled connections.
+# Writes that queue up while a transaction runs are committed together in the next one.
+# The queue does not span processes: with several worker processes there is one writer per worker,
+# and their transactions still take turns on SQLite's write lock, each waiting up to
+# SQLITE_BUSY_TIMEOUT_MS before failing with "database is locked". Deployments that need a single
+# writer run one worker process with threads (e.g. gunicorn --workers 1 --threads 8).
+
+class WriteQueue:
+    """Runs write jobs, callables taking the writer's connection, in group-committed transactions."""
+
+    def __init__(self, conn, max_batch):
+        self.max_batch = max_batch
+        self._conn = conn
+        self._conn.isolation_level = None # Transactions and savepoints are issued explicitly below
+        self._jobs = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, work):
+        """Queues work(conn) and returns a Future for its result, set once its transaction commits."""
+        future = Future()
+        self._jobs.put((work, future, current_request_metrics()))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(self._conn, batch)
+
+    def _commit(self, conn, batch):
+        # Each job gets a savepoint, so one failing job is rolled back without affecting the others
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE') # Waits out writers in other processes for up to the busy timeout
+            for work, future, metrics in batch:
+                _request_metrics.current = metrics # The job's statements count for the route that queued it
+                try:
+                    conn.execute('SAVEPOINT write_job')
+                    try:
+                        outcomes.append((future, work(conn), None))
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO write_job')
+                        outcomes.append((future, None, e))
+                    conn.execute('RELEASE write_job')
+                finally:
+                    _request_metrics.current = None
+            if any(error is None for _, _, error in outcomes):
+                bump_data_generation(conn)
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """Returns this process's write queue, starting its writer thread on first use; other worker processes have their own."""
+    with _write_queue_lock:
+        if 'write_queue' not in app.extensions:
+            app.extensions['write_queue'] = WriteQueue(get_pool()._connect(), app.config['WRITE_QUEUE_MAX_BATCH'])
+        return app.extensions['write_queue']
+
+def run_write(work):
+    """Runs work(conn) on the writer and returns its result once committed, re-raising any exception it raised."""
+    return get_write_queue().submit(work).result()
+
+# --- Metrics ---
+# Route latency and SQL statement counts, times and rows, kept in memory per process and served at
+# /metrics in the Prometheus text format. Pooled connections hand out InstrumentedCursor, which times
+# each statement from execute until its rows are fetched; statements slower than SQL_SLOW_QUERY_MS are
+# logged with their query plan. Queued writes are counted for the route that submitted them, statements
+# run outside any request (upload jobs, the writer's BEGIN/COMMIT) under route="background".
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+SQL_OPERATIONS = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'DROP', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+SQL_OPERATION_RE = re.compile(r'\s*(\w+)')
+
+class Metric:
+    """A labelled Prometheus counter, or a histogram when bucket upper bounds are given."""
+
+    def __init__(self, name, help_text, label_names, buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._values = {} # Label values -> count, or bucket counts (the last one +Inf) followed by the sum
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def render(self):
+        """Returns the metric's lines in the Prometheus text exposition format."""
+        lines = [f'# HELP {self.name} {self.help_text}', f"# TYPE {self.name} {'histogram' if self.buckets else 'counter'}"]
+        with self._lock:
+            values = sorted((labels, list(value) if self.buckets else value) for labels, value in self._values.items())
+        for labels, value in values:
+            label_text = ','.join(f'{name}="{escape_label_value(label)}"' for name, label in zip(self.label_names, labels))
+            if not self.buckets:
+                lines.append(f'{self.name}{{{label_text}}} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), value):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {value[-1]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+def escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+HTTP_REQUEST_SECONDS = Metric('http_request_duration_seconds', 'Time to handle a request.', ('method', 'route', 'status'), LATENCY_BUCKETS)
+SQL_STATEMENT_SECONDS = Metric('sql_statement_duration_seconds', 'Time from executing a statement until its last row was fetched.',
+                               ('route', 'operation'), SQL_LATENCY_BUCKETS)
+SQL_STATEMENTS_PER_REQUEST = Metric('sql_statements_per_request', 'Statements run for one request, its queued writes included.',
+                                    ('route',), STATEMENT_COUNT_BUCKETS)
+SQL_ROWS_FETCHED = Metric('sql_rows_fetched_total', 'Rows fetched from SQLite.', ('route',))
+SQL_SLOW_STATEMENTS = Metric('sql_slow_statements_total', 'Statements that took longer than SQL_SLOW_QUERY_MS.', ('route',))
+METRICS = [HTTP_REQUEST_SECONDS, SQL_STATEMENT_SECONDS, SQL_STATEMENTS_PER_REQUEST, SQL_ROWS_FETCHED, SQL_SLOW_STATEMENTS]
+
+class RequestMetrics:
+    """The route, start time and statement count of the request a thread is working for."""
+    __slots__ = ('route', 'started', 'statements')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.statements = 0
+
+_request_metrics = threading.local() # .current: RequestMetrics of the request being served, if any
+
+def current_request_metrics():
+    return getattr(_request_metrics, 'current', None)
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor recording each statement in the metrics once it is done: when all of its rows have been
+    fetched, the cursor runs another statement or is closed or discarded. Rows are only counted
+    through the fetch methods, which is how the app reads them.
+    """
+    _statement = None # [sql, parameters, seconds so far, rows fetched, RequestMetrics] of the open statement
+
+    def execute(self, sql, parameters=(), /):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._statement = [sql, parameters, time.perf_counter() - started, 0, current_request_metrics()]
+            if self.description is None: # Nothing to fetch, so the statement has run to completion
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters, /):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._statement = [sql, None, time.perf_counter() - started, 0, current_request_metrics()]
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _fetched(self, started, rows, done):
+        statement = self._statement
+        if statement is not None:
+            statement[2] += time.perf_counter() - started
+            statement[3] += rows
+            if done:
+                self._finish()
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            record_statement(self.connection, *statement)
+
+def record_statement(conn, sql, parameters, seconds, rows, metrics):
+    """Adds a finished statement to the metrics and logs it with its query plan if it was slow."""
+    route = metrics.route if metrics is not None else 'background'
+    if metrics is not None:
+        metrics.statements += 1
+    match = SQL_OPERATION_RE.match(sql)
+    operation = match[1].upper() if match else ''
+    SQL_STATEMENT_SECONDS.observe((route, operation if operation in SQL_OPERATIONS else 'OTHER'), seconds)
+    if rows:
+        SQL_ROWS_FETCHED.inc((route,), rows)
+    threshold_ms = app.config['SQL_SLOW_QUERY_MS']
+    if threshold_ms and seconds * 1000 >= threshold_ms:
+        SQL_SLOW_STATEMENTS.inc((route,))
+        app.logger.warning('Slow SQL on %s: %.0f ms, %d rows fetched\n%s\nQuery plan:\n%s',
+                           route, seconds * 1000, rows, ' '.join(sql.split()), explain_query_plan(conn, sql, parameters))
+
+def explain_query_plan(conn, sql, parameters):
+    """Returns SQLite's plan for a statement as indented lines, or why there is none."""
+    if parameters is None:
+        return '(not available for executemany)'
+    try:
+        # The base class execute() uses a plain cursor, so this statement is not recorded itself
+        plan = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return f'(not available: {e})'
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in plan:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines) or '(no plan)'
+
+@app.before_request
+def start_request_metrics():
+    if app.config['METRICS_ENABLED']:
+        _request_metrics.current = RequestMetrics(request.url_rule.rule if request.url_rule else 'unmatched')
+
+# Registered before the other after_request handlers, so it runs last and the time includes compression
+@app.after_request
+def record_request_metrics(response):
+    metrics = current_request_metrics()
+    if metrics is not None:
+        _request_metrics.current = None
+        HTTP_REQUEST_SECONDS.observe((request.method, metrics.route, str(response.status_code)), time.perf_counter() - metrics.started)
+        SQL_STATEMENTS_PER_REQUEST.observe((metrics.route,), metrics.statements)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Serves the metrics of this process in the Prometheus text exposition format."""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    lines = [line for metric in METRICS for line in metric.render()]
+    return Response('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.cli.command('rebuild-manhour-rollup')
+def rebuild_manhour_rollup_command():
+    """Rebuilds the per-request and per-period man-hour rollups from actual_man_hours (recovery)."""
+    with sqlite3.connect(DATABASE) as conn:
+        row_count = rebuild_manhour_rollup(conn)
+        period_row_count = rebuild_manhour_period_rollup(conn)
+        bump_data_generation(conn) # Cached responses may have been computed from a drifted rollup
+    print(f"Rebuilt request_manhour_rollup with {row_count} rows and manhour_period_rollup with {period_row_count} rows.")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuilds the requests_fts search index from requests (recovery)."""
+    with sqlite3.connect(DATABASE) as conn:
+        rebuild_requests_fts(conn)
+    print("Rebuilt requests_fts.")
+
+# --- Response Encoding ---
+# JSON is encoded and decoded with orjson when it is installed, list endpoints can return rows as arrays under a
+# single list of column names (?format=columns), and text responses are compressed with br or gzip.
+# orjson's output is the same JSON but not the same bytes as the default provider's: it writes non-ASCII
+# characters as raw UTF-8 instead of \uXXXX escapes, and NaN and infinities as null instead of the invalid
+# NaN/Infinity tokens. orjson has no options for either.
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Encodes compact responses and decodes request bodies with orjson when it is installed, otherwise like the default provider."""
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Dates and dataclasses go through self.default so they encode as with the default provider
+        options = (orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                   | orjson.OPT_PASSTHROUGH_DATACLASS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0))
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=options), mimetype=self.mimetype)
+
+app.json = FastJSONProvider(app)
+
+def columnar_requested(args):
+    """Whether the request asked for ?format=columns, raising ValueError for an unknown format."""
+    response_format = args.get('format', 'rows')
+    if response_format not in ('rows', 'columns'):
+        raise ValueError('format must be rows or columns.')
+    return response_format == 'columns'
+
+def query_rows(conn, query, params=(), columnar=False):
+    """
+    Runs a query and returns its rows as a list of dicts or, when columnar, as
+    {'columns': [...], 'rows': [[...], ...]} built from plain tuples without per-row objects.
+    """
+    cursor = conn.cursor()
+    if columnar:
+        cursor.row_factory = None
+    cursor.execute(query, params)
+    if columnar:
+        return {'columns': [column[0] for column in cursor.description], 'rows': cursor.fetchall()}
+    return [dict(row) for row in cursor.fetchall()]
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/css', 'text/javascript', 'text/plain', 'text/csv')
+
+def negotiate_encoding():
+    """Returns the best content coding the client accepts ('br' or 'gzip'), or None for identity."""
+    return request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+
+def compress_body(data, encoding):
+    """Compresses a response body with the given content coding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=app.config['RESPONSE_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=app.config['RESPONSE_GZIP_LEVEL'], mtime=0)
+
+@app.after_request
+def compress_response(response):
+    """Compresses successful text responses for clients that accept it (cached JSON arrives compressed)."""
+    if (not 200 <= response.status_code < 300 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    data = response.get_data()
+    if encoding is None or len(data) < app.config['RESPONSE_COMPRESSION_MIN_BYTES']:
+        return response
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True) # The bytes differ from the uncompressed representation
+    return response
+
+# --- Excel Helpers ---
+def excel_dates_to_str(values):
+    """Converts an Excel date column to YYYY-MM-DD strings; other values go through str(), blanks become None."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.strftime('%Y-%m-%d')
+    else:
+        values = values.map(lambda v: v.strftime('%Y-%m-%d') if isinstance(v, date) else v if pd.isna(v) else str(v)) # Fallback, also for datetime cells of streamed sheets
+    return values.astype(object).where(values.notna(), None)
+
+def read_upload_batches(file, filename, batch_size):
+    """
+    Yields the rows of an uploaded .xlsx, .xls or .csv file as DataFrames of batch_size rows (the last
+    one shorter, and an empty one for a sheet with only its header). Rows are indexed by their position
+    across the whole sheet, so row numbers in error messages do not restart with every batch.
+    .xlsx files are streamed with openpyxl's read-only mode and .csv files are read in chunks, so memory
+    is bounded by the batch size; legacy .xls files can only be read whole. Cells keep their own types
+    (dtype object), CSV cells are text.
+    """
+    if filename.endswith('.csv'):
+        yield from pd.read_csv(file, chunksize=batch_size, dtype=object)
+        return
+    if filename.endswith('.xls'):
+        df = pd.read_excel(file, dtype=object)
+        for start in range(0, max(len(df), 1), batch_size):
+            yield df.iloc[start:start + batch_size]
+        return
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None: # Formatted but empty cells can stretch the header row
+            header.pop()
+        width = len(header)
+        batch, start, blank_rows = [], 0, 0
+        for row in rows:
+            row = row[:width] + (None,) * (width - len(row))
+            if all(value is None for value in row):
+                blank_rows += 1 # Kept only if data follows, as pd.read_excel drops trailing blank rows
+                continue
+            batch += [(None,) * width] * blank_rows + [row]
+            blank_rows = 0
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)), dtype=object)
+                start += len(batch)
+                batch = []
+        if batch or not start:
+            yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)), dtype=object)
+    finally:
+        workbook.close()
+
+EXPORT_BATCH_SIZE = 5000 # Rows fetched from the cursor at a time while writing an export
+EXPORT_CHUNK_SIZE = 64 * 1024 # Bytes per chunk of the streamed download
+
+def stream_excel_export(cursor, sheet_name, download_name):
+    """
+    Writes the rows of an executed query to an .xlsx file and streams it back as a chunked download.
+    xlsxwriter's constant_memory mode flushes every row to disk as it is written, so peak memory
+    stays at one cursor batch no matter how many rows the export has.
+    """
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        worksheet.write_row(0, 0, [column[0] for column in cursor.description], header_format)
+        row_index = 1
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                worksheet.write_row(row_index, 0, row)
+                row_index += 1
+        workbook.close()
+    except Exception:
+        os.remove(path)
+        raise
+
+    def generate():
+        with open(path, 'rb') as f:
+            while chunk := f.read(EXPORT_CHUNK_SIZE):
+                yield chunk
+
+    response = Response(generate(), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    response.call_on_close(lambda: os.remove(path))
+    return response
+
+# --- List Pagination ---
+# List endpoints page with keyset cursors: `after` carries the sort value and id of the last row
+# sent, so every page is an index range scan rather than an OFFSET that re-reads all earlier rows.
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 1000
+
+def encode_cursor(sort_value, row_id):
+    """Packs the position after a row into an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    """Unpacks a cursor made by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+    if not isinstance(row_id, int) or not isinstance(sort_value, (str, int, float, type(None))):
+        raise ValueError('Invalid cursor.')
+    return sort_value, row_id
+
+def fetch_page(conn, query, args, sort_columns, default_sort, default_order='asc', nullable_columns=(), count_query=None):
+    """
+    Fetches one page of `query` (which must select an `id` column) as directed by the request's
+    limit/after/sort/order/format arguments. Rows are ordered by the whitelisted sort column with id
+    breaking ties. `count_query` can stand in for counting `query` when a cheaper equivalent exists.
+    Raises ValueError for arguments that are out of range or not whitelisted.
+    """
+    columnar = columnar_requested(args)
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer.')
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}.')
+    sort = args.get('sort', default_sort)
+    if sort not in sort_columns:
+        raise ValueError(f'sort must be one of: {", ".join(sort_columns)}.')
+    order = args.get('order', default_order).lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc.')
+
+    # NULL sort values come first ascending and last descending. Ranges within the NULL and
+    # non-NULL segments are queried separately so each one can use the sort column's index.
+    op = '<' if order == 'desc' else '>'
+    after = args.get('after')
+    if not after:
+        segments = [('1', [])]
+    else:
+        sort_value, row_id = decode_cursor(after)
+        if sort_value is None:
+            segments = [(f'{sort} IS NULL AND id {op} ?', [row_id])]
+            if order == 'asc':
+                segments.append((f'{sort} IS NOT NULL', []))
+        else:
+            segments = [(f'({sort}, id) {op} (?, ?)', [sort_value, row_id])]
+            if order == 'desc' and sort in nullable_columns:
+                segments.append((f'{sort} IS NULL', []))
+
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = []
+    for condition, condition_params in segments:
+        cursor.execute(
+            f'SELECT * FROM ({query}) WHERE {condition} ORDER BY {sort} {order.upper()}, id {order.upper()} LIMIT ?',
+            (*condition_params, limit + 1 - len(rows))
+        )
+        rows.extend(cursor.fetchall())
+        if len(rows) > limit:
+            break
+    columns = [column[0] for column in cursor.description]
+
+    total = conn.execute(count_query or f'SELECT COUNT(*) FROM ({query})').fetchone()[0]
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[columns.index(sort)], last[columns.index('id')])
+    else:
+        next_cursor = None
+    page = {'columns': columns, 'rows': rows[:limit]} if columnar else {'items': [dict(zip(columns, row)) for row in rows[:limit]]}
+    page.update(total=total, limit=limit, sort=sort, order=order, next_cursor=next_cursor)
+    return page
+
+# --- Response Cache ---
+# Read-heavy JSON endpoints are cached per endpoint and query arguments. Entries are tagged with
+# the data generation, a counter in the database that every write bumps inside its own transaction,
+# so a write from any worker process invalidates them. The generation also serves as the ETag.
+
+def bump_data_generation(conn):
+    """Marks the data as changed; call within the write's transaction, before committing."""
+    conn.execute('UPDATE data_generation SET generation = generation + 1 WHERE id = 1')
+
+def current_data_generation(conn):
+    """Returns the current data generation."""
+    return conn.execute('SELECT generation FROM data_generation WHERE id = 1').fetchone()[0]
+
+class ResponseCache:
+    """Thread-safe LRU of response bodies for one data generation, capped at max_bytes in total."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.generation = None
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _advance(self, generation):
+        # Entries from an older generation can never be served again
+        if self.generation is None or generation > self.generation:
+            self._entries.clear()
+            self.size = 0
+            self.generation = generation
+
+    def get(self, key, generation):
+        with self._lock:
+            self._advance(generation)
+            if generation != self.generation or key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, generation, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._advance(generation)
+            if generation != self.generation: # Computed from data that has since changed
+                return
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+_response_cache_lock = threading.Lock()
+
+def get_response_cache(snapshot=False):
+    """
+    Returns the application's response cache, creating it on first use. Responses read from a snapshot
+    have a cache of their own, as their generation lags the live one.
+    """
+    name = 'snapshot_response_cache' if snapshot else 'response_cache'
+    with _response_cache_lock:
+        if name not in app.extensions:
+            app.extensions[name] = ResponseCache(app.config['RESPONSE_CACHE_MAX_BYTES'])
+        return app.extensions[name]
+
+def cached_json_response(view):
+    """
+    Serves a JSON view from the response cache until the data generation changes, and answers
+    If-None-Match requests for the current generation with 304 Not Modified. Bodies are cached
+    already compressed for each content coding clients ask for.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Read before running the view: a write landing in between only makes the entry stale early
+        generation = current_data_generation(get_read_db())
+        encoding = negotiate_encoding()
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))), encoding)
+        cache = get_response_cache(snapshot=g.get('snapshot') is not None)
+
+        body = cache.get(key, generation)
+        if body is None and not request.if_none_match.contains_weak(str(generation)):
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            if encoding:
+                body = compress_body(body, encoding)
+            cache.put(key, generation, body)
+
+        response = Response(body, mimetype='application/json')
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(str(generation), weak=bool(encoding))
+        response.headers['Cache-Control'] = 'no-cache' # Browsers revalidate with If-None-Match on every load
+        return response.make_conditional(request)
+    return wrapper
+
+# --- Read Snapshots ---
+# Excel exports and analytics read a copy of the database taken with the SQLite backup API, so a long
+# export neither holds a read transaction on the live database nor competes with uploads for its pages.
+# A background thread refreshes the copy every SNAPSHOT_REFRESH_SECONDS if the data generation has
+# changed, and POST /api/snapshot refreshes it on demand. Responses read from a snapshot name its time
+# in the X-Snapshot-Taken-At header; ?consistency=live reads the live database instead, as do requests
+# served before the first snapshot exists.
+# Main and archive are copied in one read transaction, so they match each other, and the copies are
+# opened read-only and immutable, without file locking. Snapshot files are named by data generation,
+# so worker processes share a snapshot of the same data. A snapshot is removed two refresh intervals after
+# a newer one superseded it: every process refreshes once per interval, so by then none reads it any more.
+
+SNAPSHOT_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ' # UTC
+SNAPSHOT_FILE_RE = re.compile(r'snapshot-(\d+)\.db$') # Main files; each has a .archive.db beside it
+
+def snapshot_uri(path):
+    """The URI opening a snapshot file read-only, without locking: it never changes once written."""
+    return pathlib.Path(path).absolute().as_uri() + '?mode=ro&immutable=1'
+
+class SnapshotPool(ConnectionPool):
+    """ConnectionPool over a snapshot's files; retire() closes its connections once a newer snapshot replaces it."""
+
+    def __init__(self, database, archive_database, config):
+        super().__init__(database, config)
+        self.archive_database = archive_database
+        self.retired = False
+
+    def _connect(self):
+        conn = sqlite3.connect(snapshot_uri(self.database), uri=True, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size = -{int(self.config['SQLITE_CACHE_SIZE_KB'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config['SQLITE_MMAP_SIZE'])}")
+        conn.execute('ATTACH DATABASE ? AS archive', (snapshot_uri(self.archive_database),))
+        conn.instrumented = self.config['METRICS_ENABLED']
+        return conn
+
+    def release(self, conn):
+        if self.retired:
+            sqlite3.Connection.close(conn)
+        else:
+            super().release(conn)
+
+    def retire(self):
+        self.retired = True
+        while True:
+            try:
+                sqlite3.Connection.close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+class SnapshotManager:
+    """Takes snapshots of the database and its archive with the backup API and keeps the newest one open for reads."""
+
+    def __init__(self, directory, config):
+        self.directory = directory
+        self.config = config
+        self.current = None # {'generation', 'taken_at', 'path', 'pool'} of the newest snapshot
+        self._refresh_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='sqlite-snapshots', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                app.logger.exception('Taking a read snapshot failed')
+            time.sleep(self.config['SNAPSHOT_REFRESH_SECONDS'])
+
+    def refresh(self, force=False):
+        """Takes a snapshot if the data changed since the current one, or always with force; returns the current snapshot."""
+        with self._refresh_lock:
+            source = sqlite3.connect(DATABASE, isolation_level=None, timeout=self.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+            try:
+                source.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DATABASE,))
+                source.execute('BEGIN')
+                # Reading both databases in one statement starts the read transaction the backups share
+                generation = source.execute(
+                    'SELECT (SELECT generation FROM main.data_generation WHERE id = 1), (SELECT COUNT(*) FROM archive.sqlite_master)').fetchone()[0]
+                if not force and self.current is not None and self.current['generation'] == generation:
+                    return self.current
+                path = os.path.join(self.directory, f'snapshot-{generation}.db')
+                if force or not os.path.exists(path): # Another worker process may have taken this one already
+                    # Main goes last: its file appearing marks the snapshot complete
+                    for name, target in (('archive', path[:-len('.db')] + '.archive.db'), ('main', path)):
+                        partial = f'{target}.{uuid.uuid4().hex}.partial'
+                        copy = sqlite3.connect(partial)
+                        try:
+                            source.backup(copy, name=name)
+                            copy.execute('PRAGMA journal_mode = DELETE') # The copy is in WAL mode, which immutable readers cannot open
+                        finally:
+                            copy.close()
+                        os.replace(partial, target)
+            finally:
+                source.close()
+
+            previous, self.current = self.current, {
+                'generation': generation,
+                'taken_at': time.strftime(SNAPSHOT_TIME_FORMAT, time.gmtime(os.path.getmtime(path))),
+                'path': path,
+                'pool': SnapshotPool(path, path[:-len('.db')] + '.archive.db', self.config),
+            }
+            if previous is not None:
+                previous['pool'].retire()
+            self._remove_old_snapshots()
+            return self.current
+
+    def _remove_old_snapshots(self):
+        # A snapshot was superseded when the next newer one was written; other processes may read it until
+        # their next refresh, so it stays for two intervals after that. Partial copies are left by crashed backups.
+        cutoff = time.time() - 2 * self.config['SNAPSHOT_REFRESH_SECONDS']
+        snapshots, removable = [], []
+        for entry in os.scandir(self.directory):
+            if match := SNAPSHOT_FILE_RE.fullmatch(entry.name):
+                snapshots.append((int(match.group(1)), entry.path))
+            elif entry.name.endswith('.partial') and entry.stat().st_mtime < cutoff:
+                removable.append(entry.path)
+        snapshots.sort()
+        for (_, path), (_, newer) in zip(snapshots, snapshots[1:]):
+            if path != self.current['path'] and os.path.getmtime(newer) < cutoff:
+                removable += [path, path[:-len('.db')] + '.archive.db']
+        for path in removable:
+            try:
+                os.remove(path)
+            except OSError: # Still open on a platform that cannot remove open files, or gone already; retried next time
+                pass
+
+_snapshot_manager_lock = threading.Lock()
+
+def get_snapshot_manager():
+    """Returns the application's snapshot manager, starting its refresh thread on first use."""
+    with _snapshot_manager_lock:
+        if 'snapshot_manager' not in app.extensions:
+            app.extensions['snapshot_manager'] = SnapshotManager(app.config['SNAPSHOT_DIR'], app.config)
+        return app.extensions['snapshot_manager']
+
+def reads_snapshot(view):
+    """
+    Serves a view from the newest read snapshot unless ?consistency=live is given. The view reads
+    through get_read_db(), and the response names the snapshot's time in X-Snapshot-Taken-At.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.snapshot = None
+        if request.args.get('consistency') != 'live' and app.config['SNAPSHOT_REFRESH_SECONDS'] > 0:
+            g.snapshot = get_snapshot_manager().current
+        if g.snapshot is not None:
+            try:
+                g.snapshot_db = g.snapshot['pool'].acquire()
+            except sqlite3.OperationalError: # Its files were removed under a process that stopped refreshing
+                app.logger.exception('Opening read snapshot %s failed, reading live', g.snapshot['path'])
+                g.snapshot = None
+        response = app.make_response(view(*args, **kwargs))
+        if g.snapshot is not None:
+            response.headers['X-Snapshot-Taken-At'] = g.snapshot['taken_at']
+        return response
+    return wrapper
+
+def get_read_db():
+    """Returns the connection the current request reads from: one on its snapshot, or get_db()'s."""
+    if g.get('snapshot') is None:
+        return get_db()
+    if 'snapshot_db' not in g:
+        g.snapshot_db = g.snapshot['pool'].acquire()
+    return g.snapshot_db
+
+@app.route('/api/snapshot', methods=['GET'])
+def get_snapshot():
+    """Returns the generation and time of the snapshot exports and analytics read from, if one has been taken."""
+    if app.config['SNAPSHOT_REFRESH_SECONDS'] <= 0:
+        return jsonify({'error': 'Read snapshots are disabled.'}), 404
+    snapshot = get_snapshot_manager().current
+    if snapshot is None:
+        return jsonify({'error': 'No snapshot has been taken yet.'}), 404
+    return jsonify({'generation': snapshot['generation'], 'taken_at': snapshot['taken_at']})
+
+@app.route('/api/snapshot', methods=['POST'])
+def refresh_snapshot():
+    """Takes a new read snapshot now if the data changed since the current one, or always with ?force=true."""
+    if app.config['SNAPSHOT_REFRESH_SECONDS'] <= 0:
+        return jsonify({'error': 'Read snapshots are disabled.'}), 404
+    force = request.args.get('force', 'false').lower() in ('true', '1')
+    try:
+        snapshot = get_snapshot_manager().refresh(force=force)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'generation': snapshot['generation'], 'taken_at': snapshot['taken_at']})
+
+# --- Background Upload Jobs ---
+# Uploads are parsed and written on a worker thread; the upload routes answer with a job id
+# right away and the client polls /api/jobs/<job_id> until the job has finished or failed.
+# Jobs read the file in batches of UPLOAD_BATCH_ROWS rows and write each batch in its own
+# transaction, so a large file neither sits in memory whole nor holds the write lock throughout.
+UPLOAD_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+_upload_jobs = {}
+_upload_jobs_lock = threading.Lock()
+
+def get_upload_executor():
+    """Returns the thread pool running upload jobs, creating it on first use."""
+    with _upload_jobs_lock:
+        if 'upload_executor' not in app.extensions:
+            app.extensions['upload_executor'] = ThreadPoolExecutor(
+                max_workers=app.config['UPLOAD_JOB_WORKERS'], thread_name_prefix='upload-job')
+        return app.extensions['upload_executor']
+
+def prune_upload_jobs():
+    """Drops finished jobs older than the retention window."""
+    cutoff = time.time() - app.config['UPLOAD_JOB_RETENTION_SECONDS']
+    with _upload_jobs_lock:
+        for job_id in [job_id for job_id, job in _upload_jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]:
+            del _upload_jobs[job_id]
+
+def update_upload_job(job, **fields):
+    """Updates a job's status or progress fields (rows_total, rows_processed, ...)."""
+    with _upload_jobs_lock:
+        job.update(fields)
+
+def run_upload_job(job, process, path):
+    """Runs an upload's processing function on a worker thread and records its outcome."""
+    update_upload_job(job, status='running', started_at=time.time())
+    with app.app_context():
+        try:
+            with open(path, 'rb') as file:
+                payload, status_code = process(file, job)
+        except Exception as e:
+            payload, status_code = {'error': f'Error processing file: {str(e)}'}, 500
+        finally:
+            os.remove(path)
+    update_upload_job(
+        job,
+        status='finished' if status_code < 400 else 'failed',
+        finished_at=time.time(),
+        message=payload.get('message'),
+        error=payload.get('error'),
+        failed_rows=payload.get('failed_rows', []),
+        counts=payload.get('counts'),
+    )
+
+def submit_upload_job(job_type, process, file):
+    """Queues an uploaded file for processing and returns the 202 response carrying the job id."""
+    prune_upload_jobs()
+    job = {
+        'id': uuid.uuid4().hex,
+        'type': job_type,
+        'filename': file.filename,
+        'status': 'queued',
+        'submitted_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'rows_total': None, # Known once the whole file has been read
+        'rows_processed': 0,
+        'message': None,
+        'error': None,
+        'failed_rows': [],
+        'counts': None, # Set by uploads that report how many rows they inserted, updated and left unchanged
+    }
+    # Spool the file to disk: the request's file stream is gone once this response is sent
+    handle, path = tempfile.mkstemp(prefix='upload-', suffix=os.path.splitext(file.filename)[1])
+    with os.fdopen(handle, 'wb') as spool:
+        file.save(spool)
+    with _upload_jobs_lock:
+        _upload_jobs[job['id']] = job
+    get_upload_executor().submit(run_upload_job, job, process, path)
+    return jsonify({'message': 'Upload accepted for processing.', 'job_id': job['id'], 'status_url': f"/api/jobs/{job['id']}"}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_upload_job(job_id):
+    """Reports the status, progress and, once done, the result of an upload job."""
+    prune_upload_jobs()
+    with _upload_jobs_lock:
+        job = _upload_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(dict(job))
+
+# --- Batch Writes ---
+# The batch endpoints take a JSON array or an NDJSON stream of records. Record shapes are checked
+# in Python, then everything that depends on the database is validated set-based in a staging
+# table and applied in a single write job, so every failing record is reported. In atomic mode (the default) one invalid record rejects
+# the whole batch; in best_effort mode the valid records are applied and the others reported.
+
+def read_batch_request():
+    """
+    Returns (mode, records, errors) for a batch request. NDJSON lines that are not valid JSON are
+    kept as None records with an entry in errors (record index -> message). Raises ValueError for a
+    bad mode, a body that is not a batch, or more than BATCH_MAX_RECORDS records.
+    """
+    mode = request.args.get('mode', 'atomic')
+    if mode not in ('atomic', 'best_effort'):
+        raise ValueError('mode must be atomic or best_effort.')
+    max_records = app.config['BATCH_MAX_RECORDS']
+    records = []
+    errors = {}
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in BufferedReader(request.stream, 1 << 16): # The raw stream would read lines byte by byte
+            if not line.strip():
+                continue
+            if len(records) == max_records:
+                raise ValueError(f'A batch can hold at most {max_records} records.')
+            try:
+                records.append(app.json.loads(line))
+            except ValueError:
+                errors[len(records)] = 'Invalid JSON.'
+                records.append(None)
+    else:
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            raise ValueError('The request body must be a JSON array or NDJSON (application/x-ndjson).')
+        if len(records) > max_records:
+            raise ValueError(f'A batch can hold at most {max_records} records.')
+    if not records:
+        raise ValueError('The batch contains no records.')
+    return mode, records, errors
+
+def batch_text(record, field, required=True):
+    """Returns a text field of a batch record, raising ValueError if it is missing or not a string."""
+    value = record.get(field)
+    if value is None or value == '':
+        if required:
+            raise ValueError(f'{field} is required.')
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string.')
+    return value
+
+def batch_integer(record, field, required=True):
+    """Returns an integer field of a batch record (integral numbers accepted), raising ValueError otherwise."""
+    value = record.get(field)
+    if value is None:
+        if required:
+            raise ValueError(f'{field} is required.')
+        return None
+    if (isinstance(value, bool) or not isinstance(value, (int, float))
+            or (isinstance(value, float) and not value.is_integer()) or not -2**63 <= value < 2**63):
+        raise ValueError(f'{field} must be an integer.')
+    return int(value)
+
+def batch_reference(record, id_field, key_field):
+    """Returns (id, key) for a record referring to another row either by id or by its natural key."""
+    if record.get(id_field) is not None:
+        return batch_integer(record, id_field), None
+    if record.get(key_field) is None or record.get(key_field) == '':
+        raise ValueError(f'{id_field} or {key_field} is required.')
+    return None, batch_text(record, key_field)
+
+def stage_batch(cursor, table, columns, rows, extra_columns=()):
+    """Loads (row_index, *columns) rows into a new temp staging table with an error column and any extra_columns, all NULL."""
+    cursor.execute(f'DROP TABLE IF EXISTS temp.{table}')
+    cursor.execute(f"CREATE TEMP TABLE {table} (row_index INTEGER PRIMARY KEY, {', '.join([*columns, *extra_columns])}, error TEXT)")
+    cursor.executemany(f"INSERT INTO temp.{table} (row_index, {', '.join(columns)}) VALUES ({', '.join('?' for _ in range(len(columns) + 1))})", rows)
+
+def batch_response(mode, count, errors, applied):
+    """
+    Builds the response for a batch of `count` records: totals and one result per record in input
+    order. `applied` maps record index -> (status, id) for the records that were written.
+    """
+    results = []
+    totals = {'created': 0, 'updated': 0, 'failed': 0, 'skipped': 0}
+    for index in range(count):
+        if index in errors:
+            result = {'index': index, 'status': 'failed', 'error': errors[index]}
+        elif index in applied:
+            status, record_id = applied[index]
+            result = {'index': index, 'status': status, 'id': record_id}
+        else:
+            result = {'index': index, 'status': 'skipped'} # Valid, but the atomic batch was rejected
+        totals[result['status']] += 1
+        results.append(result)
+    status_code = 422 if errors and mode == 'atomic' else 200
+    return jsonify({'mode': mode, 'applied': status_code == 200, 'total': count, **totals, 'results': results}), status_code
+
+# --- Archive ---
+# `flask archive-requests` moves requests whose UAT was confirmed more than ARCHIVE_AFTER_DAYS ago, with
+# their updates and man-hours, to the archive database; `flask unarchive-requests` moves them back.
+# Every other query reads only the hot tables in main. The report, the breakup and the downloads add
+# the archived requests with ?include_archived=true.
+# In WAL mode SQLite commits each attached database on its own, so a move never writes both in one
+# transaction: it copies in one write job and deletes the source in the next. Archived rows only count
+# once main.archived_requests lists their request, so copies left by an interrupted move are ignored
+# and replaced by the next run.
+# Rows keep their ids both ways: requests and actual_man_hours are AUTOINCREMENT, so main never hands
+# out an archived id again.
+
+ARCHIVED_TABLES = {'requests': 'id', 'request_updates': 'request_id', 'actual_man_hours': 'request_id'} # Table -> its request id column
+ARCHIVE_BATCH_REQUESTS = 500 # Requests moved per pair of write jobs
+
+def include_archived_requested(args):
+    """Whether the request asked for ?include_archived=true."""
+    return args.get('include_archived', 'false').lower() in ('true', '1')
+
+def archive_source(table, include_archived):
+    """The FROM source for a hot table: the table itself, or with include_archived a subquery adding the archived requests' rows."""
+    if not include_archived:
+        return table
+    return (f'(SELECT * FROM main.{table} UNION ALL SELECT * FROM archive.{table}'
+            f' WHERE {ARCHIVED_TABLES[table]} IN (SELECT id FROM main.archived_requests))')
+
+def archive_requests(request_ids):
+    """Moves requests with their updates and man-hours from main to the archive; returns how many were moved."""
+    def discard_leftovers(conn):
+        # Copies of requests that were never archived or have been restored since
+        for table, key in ARCHIVED_TABLES.items():
+            conn.execute(f'DELETE FROM archive.{table} WHERE {key} NOT IN (SELECT id FROM main.archived_requests)')
+
+    run_write(discard_leftovers)
+    moved = 0
+    for start in range(0, len(request_ids), ARCHIVE_BATCH_REQUESTS):
+        batch = json.dumps(request_ids[start:start + ARCHIVE_BATCH_REQUESTS])
+
+        def copy(conn):
+            for table, key in ARCHIVED_TABLES.items():
+                conn.execute(f'DELETE FROM archive.{table} WHERE {key} IN (SELECT value FROM json_each(?))', (batch,))
+                conn.execute(f'INSERT INTO archive.{table} SELECT * FROM main.{table} WHERE {key} IN (SELECT value FROM json_each(?))', (batch,))
+
+        def delete(conn):
+            # Requests changed since they were copied stay hot until the next run copies them again
+            changed = set()
+            for table, key in ARCHIVED_TABLES.items():
+                hot = f'SELECT * FROM main.{table} WHERE {key} IN (SELECT value FROM json_each(?1))'
+                archived = f'SELECT * FROM archive.{table} WHERE {key} IN (SELECT value FROM json_each(?1))'
+                changed.update(row[0] for row in conn.execute(
+                    f'SELECT {key} FROM ({hot} EXCEPT {archived}) UNION SELECT {key} FROM ({archived} EXCEPT {hot})', (batch,)))
+            ids = json.dumps([request_id for request_id in json.loads(batch) if request_id not in changed])
+            conn.execute('''
+                INSERT INTO archived_requests (id, request_no, archived_at)
+                SELECT id, request_no, datetime('now') FROM requests WHERE id IN (SELECT value FROM json_each(?))
+            ''', (ids,))
+            # The rollups go first, so the triggers of the cascading man-hour deletes find nothing to update
+            conn.execute('DELETE FROM request_manhour_rollup WHERE request_id IN (SELECT value FROM json_each(?))', (ids,))
+            conn.execute('DELETE FROM manhour_period_rollup WHERE request_id IN (SELECT value FROM json_each(?))', (ids,))
+            return conn.execute('DELETE FROM requests WHERE id IN (SELECT value FROM json_each(?))', (ids,)).rowcount
+
+        run_write(copy)
+        moved += run_write(delete)
+    return moved
+
+def unarchive_requests(request_ids):
+    """
+    Moves archived requests with their updates and man-hours back to main; returns how many were restored.
+    Man-hours of stakeholders deleted in the meantime are dropped, as deleting the stakeholder would have.
+    """
+    restored = 0
+    for start in range(0, len(request_ids), ARCHIVE_BATCH_REQUESTS):
+        batch = json.dumps(request_ids[start:start + ARCHIVE_BATCH_REQUESTS])
+
+        def restore(conn):
+            ids = json.dumps([row[0] for row in conn.execute(
+                'SELECT id FROM archived_requests WHERE id IN (SELECT value FROM json_each(?))', (batch,))])
+            conn.execute('DELETE FROM archived_requests WHERE id IN (SELECT value FROM json_each(?))', (ids,))
+            for table, key in ARCHIVED_TABLES.items():
+                conn.execute(f'''
+                    INSERT INTO main.{table} SELECT * FROM archive.{table}
+                    WHERE {key} IN (SELECT value FROM json_each(?))
+                    {'AND stakeholder_id IN (SELECT id FROM main.stakeholders)' if table == 'actual_man_hours' else ''}
+                ''', (ids,))
+            return len(json.loads(ids))
+
+        def delete(conn):
+            for table, key in ARCHIVED_TABLES.items():
+                conn.execute(f'''
+                    DELETE FROM archive.{table}
+                    WHERE {key} IN (SELECT value FROM json_each(?)) AND {key} NOT IN (SELECT id FROM main.archived_requests)
+                ''', (batch,))
+
+        restored += run_write(restore)
+        run_write(delete)
+    return restored
+
+@app.cli.command('archive-requests')
+@click.option('--older-than-days', type=int, help='Archive requests whose UAT was confirmed more than this many days ago (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--dry-run', is_flag=True, help='Only report how many requests would be archived.')
+def archive_requests_command(older_than_days, dry_run):
+    """Moves completed requests with their updates and man-hours to the archive database."""
+    if older_than_days is None:
+        older_than_days = app.config['ARCHIVE_AFTER_DAYS']
+    request_ids = [row[0] for row in get_db().execute(
+        "SELECT request_id FROM request_updates WHERE date(uat_confirmation_date) < date('now', ?) ORDER BY request_id",
+        (f'-{int(older_than_days)} days',))]
+    if dry_run:
+        print(f"{len(request_ids)} requests would be archived.")
+        return
+    print(f"Archived {archive_requests(request_ids)} of {len(request_ids)} requests whose UAT was confirmed more than {older_than_days} days ago.")
+
+@app.cli.command('unarchive-requests')
+@click.argument('request_nos', nargs=-1, required=True)
+def unarchive_requests_command(request_nos):
+    """
+    Moves archived requests, by request number, back to the hot tables. They are archived again by the
+    next archive-requests run unless their UAT Confirmation Date is cleared or moved.
+    """
+    rows = get_db().execute('SELECT id, request_no FROM archived_requests WHERE request_no IN (SELECT value FROM json_each(?))',
+                            (json.dumps(request_nos),)).fetchall()
+    unknown = set(request_nos) - {row['request_no'] for row in rows}
+    if unknown:
+        print(f"Not archived: {', '.join(sorted(unknown))}")
+    print(f"Restored {unarchive_requests([row['id'] for row in rows])} requests.")
 
 # --- Routes for Stakeholder Master ---
 
+
 @app.route('/')
 def index():
     """Renders the main index page (you can link to different modules from here)."""
@@ -103,15 +1793,28 @@ def stakeholders_page():
     """Renders the stakeholders management page."""
     return render_template('stakeholders.html')
 
+STAKEHOLDER_SORT_COLUMNS = ('name', 'role', 'id')
+
 @app.route('/api/stakeholders', methods=['GET'])
 def get_stakeholders():
-    """Retrieves all stakeholders."""
+    """Retrieves all stakeholders, or one page of them when a limit is given."""
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM stakeholders ORDER BY name ASC')
-    stakeholders = cursor.fetchall()
+    if 'limit' in request.args:
+        try:
+            page = fetch_page(conn, 'SELECT * FROM stakeholders', request.args, STAKEHOLDER_SORT_COLUMNS, 'name')
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        conn.close()
+        return jsonify(page)
+    try:
+        columnar = columnar_requested(request.args)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    stakeholders = query_rows(conn, 'SELECT * FROM stakeholders ORDER BY name ASC', columnar=columnar)
     conn.close()
-    return jsonify([dict(s) for s in stakeholders])
+    return jsonify(stakeholders)
 
 @app.route('/api/stakeholders', methods=['POST'])
 def add_stakeholder():
@@ -123,20 +1826,16 @@ def add_stakeholder():
     if not name or not role:
         return jsonify({'error': 'Name and Role are required'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor()
+    def write(conn):
+        return conn.execute('INSERT INTO stakeholders (name, role) VALUES (?, ?)', (name, role)).lastrowid
+
     try:
-        cursor.execute('INSERT INTO stakeholders (name, role) VALUES (?, ?)', (name, role))
-        conn.commit()
-        return jsonify({'message': 'Stakeholder added successfully', 'id': cursor.lastrowid}), 201
+        stakeholder_id = run_write(write)
+        return jsonify({'message': 'Stakeholder added successfully', 'id': stakeholder_id}), 201
     except sqlite3.IntegrityError:
-        conn.rollback()
         return jsonify({'error': 'Stakeholder with this name already exists'}), 409
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/stakeholders/<int:stakeholder_id>', methods=['PUT'])
 def update_stakeholder(stakeholder_id):
@@ -148,39 +1847,82 @@ def update_stakeholder(stakeholder_id):
     if not name or not role:
         return jsonify({'error': 'Name and Role are required'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor()
+    def write(conn):
+        return conn.execute('UPDATE stakeholders SET name = ?, role = ? WHERE id = ?', (name, role, stakeholder_id)).rowcount
+
     try:
-        cursor.execute('UPDATE stakeholders SET name = ?, role = ? WHERE id = ?', (name, role, stakeholder_id))
-        conn.commit()
-        if cursor.rowcount == 0:
+        if run_write(write) == 0:
             return jsonify({'error': 'Stakeholder not found'}), 404
         return jsonify({'message': 'Stakeholder updated successfully'})
     except sqlite3.IntegrityError:
-        conn.rollback()
         return jsonify({'error': 'Stakeholder with this name already exists'}), 409
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/stakeholders/<int:stakeholder_id>', methods=['DELETE'])
 def delete_stakeholder(stakeholder_id):
     """Deletes a stakeholder."""
-    conn = get_db()
-    cursor = conn.cursor()
+    def write(conn):
+        return conn.execute('DELETE FROM stakeholders WHERE id = ?', (stakeholder_id,)).rowcount
+
     try:
-        cursor.execute('DELETE FROM stakeholders WHERE id = ?', (stakeholder_id,))
-        conn.commit()
-        if cursor.rowcount == 0:
+        if run_write(write) == 0:
             return jsonify({'error': 'Stakeholder not found'}), 404
         return jsonify({'message': 'Stakeholder deleted successfully'})
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+
+@app.route('/api/stakeholders/batch', methods=['POST'])
+def add_stakeholders_batch():
+    """Adds a batch of stakeholders ({name, role} records) in one transaction."""
+    try:
+        mode, records, errors = read_batch_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = []
+    for index, record in enumerate(records):
+        if index in errors:
+            continue
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('Each record must be a JSON object.')
+            rows.append((index, batch_text(record, 'name'), batch_text(record, 'role')))
+        except ValueError as e:
+            errors[index] = str(e)
+
+    def write(conn):
+        cursor = conn.cursor()
+        stage_batch(cursor, 'stakeholder_batch_staging', ['name', 'role'], rows)
+        cursor.execute('CREATE INDEX temp.ix_stakeholder_batch_staging_name ON stakeholder_batch_staging (name, row_index)')
+        # Names already in the system, or already taken by an earlier valid record of the batch
+        cursor.execute('''
+            UPDATE temp.stakeholder_batch_staging SET error = 'Stakeholder with this name already exists'
+            WHERE name IN (SELECT name FROM stakeholders) OR EXISTS (
+                SELECT 1 FROM temp.stakeholder_batch_staging earlier
+                WHERE earlier.name = stakeholder_batch_staging.name AND earlier.row_index < stakeholder_batch_staging.row_index
+            )
+        ''')
+        errors.update(cursor.execute('SELECT row_index, error FROM temp.stakeholder_batch_staging WHERE error IS NOT NULL').fetchall())
+        applied = {}
+        if not (errors and mode == 'atomic'):
+            cursor.execute('''
+                INSERT INTO stakeholders (name, role)
+                SELECT name, role FROM temp.stakeholder_batch_staging WHERE error IS NULL ORDER BY row_index
+            ''')
+            cursor.execute('''
+                SELECT b.row_index, s.id FROM temp.stakeholder_batch_staging b
+                JOIN stakeholders s ON s.name = b.name WHERE b.error IS NULL
+            ''')
+            applied = {row_index: ('created', stakeholder_id) for row_index, stakeholder_id in cursor.fetchall()}
+        cursor.execute('DROP TABLE temp.stakeholder_batch_staging')
+        return applied
+
+    try:
+        applied = run_write(write)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return batch_response(mode, len(records), errors, applied)
 
 # --- Routes for Request Master ---
 
@@ -190,15 +1932,82 @@ def requests_page():
     return render_template('requests.html')
 
 
+REQUEST_SORT_COLUMNS = ('request_no', 'requested_by', 'department', 'category', 'request_date', 'request_title', 'id')
+
 @app.route('/api/requests', methods=['GET'])
 def get_requests():
-    """Retrieves all requests."""
+    """Retrieves all requests, or one page of them when a limit is given."""
+    conn = get_db()
+    if 'limit' in request.args:
+        try:
+            page = fetch_page(conn, 'SELECT * FROM requests', request.args, REQUEST_SORT_COLUMNS, 'request_date', 'desc')
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        conn.close()
+        return jsonify(page)
+    try:
+        columnar = columnar_requested(request.args)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    requests = query_rows(conn, 'SELECT * FROM requests ORDER BY request_date DESC', columnar=columnar)
+    conn.close()
+    return jsonify(requests)
+
+SEARCH_COLUMNS = ('request_no', 'request_title', 'description', 'department', 'category')
+# bm25 weights for SEARCH_COLUMNS: a hit in the request number or title outranks one in the description
+SEARCH_COLUMN_WEIGHTS = (10.0, 5.0, 1.0, 2.0, 2.0)
+MAX_SEARCH_LIMIT = 100
+
+@app.route('/api/requests/search', methods=['GET'])
+def search_requests():
+    """
+    Searches requests for every word of `q` as a substring of any searchable column, best matches first.
+    Words of three or more characters are matched through the trigram index; shorter words fall back to LIKE.
+    """
+    words = request.args.get('q', '').split()
+    if not words:
+        return jsonify({'error': 'Search text (q) is required.'}), 400
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer.'}), 400
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    # Trigram phrases only match words of at least three characters
+    match_words = [word for word in words if len(word) >= 3]
+    short_words = [word for word in words if len(word) < 3]
+
+    conditions = []
+    params = []
+    if match_words:
+        conditions.append("requests_fts MATCH ?")
+        params.append(' '.join('"' + word.replace('"', '""') + '"' for word in match_words))
+    # Short words are checked against requests itself, never inside the FTS5 query (see substring_condition)
+    for word in short_words:
+        conditions.append('(' + ' OR '.join(f"r.{column} LIKE ?" for column in SEARCH_COLUMNS) + ')')
+        params.extend([f"%{word}%"] * len(SEARCH_COLUMNS))
+
+    if match_words:
+        weights = ', '.join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)
+        query = f'''
+            SELECT r.*
+            FROM requests_fts
+            JOIN requests r ON r.id = requests_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY bm25(requests_fts, {weights})
+            LIMIT ?
+        '''
+    else:
+        query = f"SELECT r.* FROM requests r WHERE {' AND '.join(conditions)} ORDER BY r.request_date DESC LIMIT ?"
+
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM requests ORDER BY request_date DESC')
-    requests = cursor.fetchall()
+    cursor.execute(query, (*params, limit))
+    results = cursor.fetchall()
     conn.close()
-    return jsonify([dict(r) for r in requests])
+    return jsonify([dict(r) for r in results])
 
 @app.route('/api/requests', methods=['POST'])
 def add_request():
@@ -209,153 +2018,246 @@ def add_request():
         if not data.get(field):
             return jsonify({'error': f'{field.replace("_", " ").title()} is required'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
+    def write(conn):
+        return conn.execute('''
             INSERT INTO requests (request_no, requested_by, department, category, request_date, request_title, description)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (
             data['request_no'], data['requested_by'], data['department'],
             data['category'], data['request_date'], data['request_title'],
             data.get('description', '')
-        ))
-        conn.commit()
-        return jsonify({'message': 'Request added successfully', 'id': cursor.lastrowid}), 201
+        )).lastrowid
+
+    try:
+        new_request_id = run_write(write)
+        return jsonify({'message': 'Request added successfully', 'id': new_request_id}), 201
     except sqlite3.IntegrityError:
-        conn.rollback()
         return jsonify({'error': 'Request with this number already exists'}), 409
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/requests/<int:request_id>', methods=['PUT'])
 def update_request_master(request_id):
     """Updates an existing request in the Request Master."""
     data = request.get_json()
-    conn = get_db()
-    cursor = conn.cursor()
+    # Build the update query dynamically based on provided fields
+    set_clauses = []
+    params = []
+    for key, value in data.items():
+        if key in ['request_no', 'requested_by', 'department', 'category', 'request_date', 'request_title', 'description']:
+            set_clauses.append(f"{key} = ?")
+            params.append(value)
+    params.append(request_id)
+
+    if not set_clauses:
+        return jsonify({'error': 'No valid fields provided for update'}), 400
+
+    def write(conn):
+        return conn.execute(f"UPDATE requests SET {', '.join(set_clauses)} WHERE id = ?", tuple(params)).rowcount
+
     try:
-        # Build the update query dynamically based on provided fields
-        set_clauses = []
-        params = []
-        for key, value in data.items():
-            if key in ['request_no', 'requested_by', 'department', 'category', 'request_date', 'request_title', 'description']:
-                set_clauses.append(f"{key} = ?")
-                params.append(value)
-        params.append(request_id)
-
-        if not set_clauses:
-            return jsonify({'error': 'No valid fields provided for update'}), 400
-
-        query = f"UPDATE requests SET {', '.join(set_clauses)} WHERE id = ?"
-        cursor.execute(query, tuple(params))
-        conn.commit()
-
-        if cursor.rowcount == 0:
+        if run_write(write) == 0:
             return jsonify({'error': 'Request not found'}), 404
         return jsonify({'message': 'Request updated successfully'})
     except sqlite3.IntegrityError:
-        conn.rollback()
         return jsonify({'error': 'Request with this name already exists'}), 409
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/api/requests/<int:request_id>', methods=['DELETE'])
 def delete_request(request_id):
     """Deletes a request."""
-    conn = get_db()
-    cursor = conn.cursor()
+    def write(conn):
+        return conn.execute('DELETE FROM requests WHERE id = ?', (request_id,)).rowcount
+
     try:
-        cursor.execute('DELETE FROM requests WHERE id = ?', (request_id,))
-        conn.commit()
-        if cursor.rowcount == 0:
+        if run_write(write) == 0:
             return jsonify({'error': 'Request not found'}), 404
         return jsonify({'message': 'Request deleted successfully'})
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+
+REQUEST_BATCH_FIELDS = ('request_no', 'requested_by', 'department', 'category', 'request_date', 'request_title')
+
+@app.route('/api/requests/batch', methods=['POST'])
+def add_requests_batch():
+    """Adds a batch of requests (records with the fields of POST /api/requests) in one transaction."""
+    try:
+        mode, records, errors = read_batch_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = []
+    for index, record in enumerate(records):
+        if index in errors:
+            continue
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('Each record must be a JSON object.')
+            rows.append((index, *(batch_text(record, field) for field in REQUEST_BATCH_FIELDS),
+                         batch_text(record, 'description', required=False) or ''))
+        except ValueError as e:
+            errors[index] = str(e)
+
+    def write(conn):
+        cursor = conn.cursor()
+        stage_batch(cursor, 'request_batch_staging', [*REQUEST_BATCH_FIELDS, 'description'], rows)
+        cursor.execute('CREATE INDEX temp.ix_request_batch_staging_request_no ON request_batch_staging (request_no, row_index)')
+        cursor.execute('''
+            UPDATE temp.request_batch_staging SET error = 'request_date must be a date in YYYY-MM-DD format.'
+            WHERE date(request_date) IS NULL
+        ''')
+        # Numbers already in the system or reserved by archived requests, or already taken by an earlier valid record of the batch
+        cursor.execute('''
+            UPDATE temp.request_batch_staging SET error = 'Request with this number already exists'
+            WHERE error IS NULL AND (
+                request_no IN (SELECT request_no FROM requests)
+                OR request_no IN (SELECT request_no FROM archived_requests)
+                OR EXISTS (
+                    SELECT 1 FROM temp.request_batch_staging earlier
+                    WHERE earlier.request_no = request_batch_staging.request_no
+                      AND earlier.row_index < request_batch_staging.row_index
+                      AND earlier.error IS NULL
+                )
+            )
+        ''')
+        errors.update(cursor.execute('SELECT row_index, error FROM temp.request_batch_staging WHERE error IS NOT NULL').fetchall())
+        applied = {}
+        if not (errors and mode == 'atomic'):
+            cursor.execute('''
+                INSERT INTO requests (request_no, requested_by, department, category, request_date, request_title, description)
+                SELECT request_no, requested_by, department, category, date(request_date), request_title, description
+                FROM temp.request_batch_staging
+                WHERE error IS NULL
+                ORDER BY row_index
+            ''')
+            cursor.execute('''
+                SELECT b.row_index, r.id FROM temp.request_batch_staging b
+                JOIN requests r ON r.request_no = b.request_no WHERE b.error IS NULL
+            ''')
+            applied = {row_index: ('created', request_id) for row_index, request_id in cursor.fetchall()}
+        cursor.execute('DROP TABLE temp.request_batch_staging')
+        return applied
+
+    try:
+        applied = run_write(write)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return batch_response(mode, len(records), errors, applied)
+
+def process_requests_upload(file, job):
+    """Inserts the requests of an uploaded Excel or CSV file; returns the response payload and status code."""
+    try:
+        inserted_count, failed_rows = 0, []
+        for df in read_upload_batches(file, job['filename'], app.config['UPLOAD_BATCH_ROWS']):
+            # Ensure column names match exactly or handle mapping
+            required_cols = ['Request No', 'Requested By', 'Department', 'Category', 'Request Date', 'Request Title']
+            if not all(col in df.columns for col in required_cols):
+                return {'error': 'Missing required columns in file. Ensure "Request No", "Requested By", "Department", "Category", "Request Date", "Request Title" are present.'}, 400
+
+            # Convert dates to strings YYYY-MM-DD in bulk; anything else is validated in SQL below
+            request_dates = excel_dates_to_str(df['Request Date'])
+            rows = list(zip(
+                df.index.tolist(), df['Request No'].tolist(), df['Requested By'].tolist(), df['Department'].tolist(),
+                df['Category'].tolist(), request_dates.tolist(), df['Request Title'].tolist()
+            ))
+
+            def write(conn):
+                cursor = conn.cursor()
+                # Load the batch into a staging table in one statement, then validate it set-based
+                cursor.execute('DROP TABLE IF EXISTS temp.request_upload_staging')
+                cursor.execute('''
+                    CREATE TEMP TABLE request_upload_staging (
+                        row_index INTEGER PRIMARY KEY,
+                        request_no TEXT, requested_by TEXT, department TEXT, category TEXT,
+                        request_date TEXT, request_title TEXT,
+                        error TEXT
+                    )
+                ''')
+                cursor.executemany('''
+                    INSERT INTO temp.request_upload_staging (row_index, request_no, requested_by, department, category, request_date, request_title)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                cursor.execute('CREATE INDEX temp.ix_request_upload_staging_request_no ON request_upload_staging (request_no, row_index)')
+
+                cursor.execute('''
+                    UPDATE temp.request_upload_staging SET error = 'Missing required data.'
+                    WHERE request_no IS NULL OR requested_by IS NULL OR department IS NULL
+                       OR category IS NULL OR request_title IS NULL
+                ''')
+                cursor.execute('''
+                    UPDATE temp.request_upload_staging SET error = 'Invalid or missing Request Date.'
+                    WHERE error IS NULL AND date(request_date) IS NULL
+                ''')
+                # Numbers already in the system (including those of earlier batches and of archived requests), or already taken
+                # by an earlier valid row of the batch
+                cursor.execute('''
+                    UPDATE temp.request_upload_staging SET error = 'Duplicate request number.'
+                    WHERE error IS NULL AND (
+                        request_no IN (SELECT request_no FROM requests)
+                        OR request_no IN (SELECT request_no FROM archived_requests)
+                        OR EXISTS (
+                            SELECT 1 FROM temp.request_upload_staging earlier
+                            WHERE earlier.request_no = request_upload_staging.request_no
+                              AND earlier.row_index < request_upload_staging.row_index
+                              AND earlier.error IS NULL
+                        )
+                    )
+                ''')
+
+                cursor.execute('''
+                    INSERT INTO requests (request_no, requested_by, department, category, request_date, request_title)
+                    SELECT request_no, requested_by, department, category, date(request_date), request_title
+                    FROM temp.request_upload_staging
+                    WHERE error IS NULL
+                    ORDER BY row_index
+                ''')
+                inserted_count = cursor.rowcount
+
+                cursor.execute('SELECT row_index, error FROM temp.request_upload_staging WHERE error IS NOT NULL ORDER BY row_index')
+                errors = [tuple(row) for row in cursor.fetchall()]
+                cursor.execute('DROP TABLE temp.request_upload_staging')
+                return inserted_count, errors
+
+            batch_inserted, batch_errors = run_write(write)
+            inserted_count += batch_inserted
+            failed_rows += [f"Row {index+2} (Request No: {df.at[index, 'Request No']}): {error}" for index, error in batch_errors]
+            update_upload_job(job, rows_processed=job['rows_processed'] + len(df))
+        update_upload_job(job, rows_total=job['rows_processed'])
+
+        message = f"Successfully uploaded {inserted_count} requests."
+        if failed_rows:
+            message += f" Failed to upload {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
+            return {'message': message, 'failed_rows': failed_rows}, 200 # Return 200 even if some failed but some succeeded
+        return {'message': message}, 200
+
+    except Exception as e:
+        return {'error': f'Error processing file: {str(e)}'}, 500
 
 @app.route('/api/requests/upload', methods=['POST'])
 def upload_requests_excel():
-    """Uploads requests from an Excel file."""
+    """Accepts an Excel or CSV file of requests and queues it as an upload job."""
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in the request'}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
-    if file and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        try:
-            df = pd.read_excel(file)
-            # Ensure column names match exactly or handle mapping
-            required_cols = ['Request No', 'Requested By', 'Department', 'Category', 'Request Date', 'Request Title']
-            if not all(col in df.columns for col in required_cols):
-                return jsonify({'error': 'Missing required columns in Excel file. Ensure "Request No", "Requested By", "Department", "Category", "Request Date", "Request Title" are present.'}), 400
-
-            conn = get_db()
-            cursor = conn.cursor()
-            inserted_count = 0
-            failed_rows = []
-
-            for index, row in df.iterrows():
-                try:
-                    # Convert date to string YYYY-MM-DD if it's not already
-                    request_date = row['Request Date']
-                    if pd.isna(request_date): # Handle NaN dates if any
-                        request_date_str = None
-                    elif isinstance(request_date, pd.Timestamp):
-                        request_date_str = request_date.strftime('%Y-%m-%d')
-                    else:
-                        request_date_str = str(request_date) # Fallback for other formats
-
-                    cursor.execute('''
-                        INSERT INTO requests (request_no, requested_by, department, category, request_date, request_title)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['Request No'], row['Requested By'], row['Department'],
-                        row['Category'], request_date_str, row['Request Title']
-                    ))
-                    inserted_count += 1
-                except sqlite3.IntegrityError:
-                    failed_rows.append(f"Row {index+2} (Request No: {row['Request No']}): Duplicate request number.")
-                except Exception as e:
-                    failed_rows.append(f"Row {index+2} (Request No: {row['Request No']}): Error - {str(e)}")
-            conn.commit()
-            conn.close()
-            
-            message = f"Successfully uploaded {inserted_count} requests."
-            if failed_rows:
-                message += f" Failed to upload {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
-                return jsonify({'message': message, 'failed_rows': failed_rows}), 200 # Return 200 even if some failed but some succeeded
-            return jsonify({'message': message}), 200
-
-        except Exception as e:
-            return jsonify({'error': f'Error processing Excel file: {str(e)}'}), 500
+    if file and file.filename.endswith(UPLOAD_EXTENSIONS):
+        return submit_upload_job('requests', process_requests_upload, file)
     else:
-        return jsonify({'error': 'Invalid file type. Please upload an Excel file (.xlsx or .xls)'}), 400
+        return jsonify({'error': 'Invalid file type. Please upload an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
 
 @app.route('/api/requests/download', methods=['GET'])
+@reads_snapshot
 def download_requests_data():
-    """Downloads all existing requests data as an Excel file."""
-    conn = get_db()
-    df = pd.read_sql_query("SELECT request_no, requested_by, department, category, request_date, request_title, description FROM requests ORDER BY request_date DESC", conn)
+    """Downloads all existing requests data as an Excel file, archived requests too with ?include_archived=true."""
+    conn = get_read_db()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT request_no, requested_by, department, category, request_date, request_title, description FROM {archive_source('requests', include_archived_requested(request.args))} ORDER BY request_date DESC")
+    response = stream_excel_export(cursor, 'Requests', 'requests_data.xlsx')
     conn.close()
-
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Requests')
-    writer.close() # Use .close() for pandas >= 1.3.0, .save() for older versions
-    output.seek(0)
-
-    return send_file(output, download_name='requests_data.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return response
 
 @app.route('/api/requests/template', methods=['GET'])
 def download_requests_template():
@@ -413,8 +2315,6 @@ def get_request_details(request_id):
 def update_request_details(request_id):
     """Updates specific fields for a request in the RequestUpdates table."""
     data = request.get_json()
-    conn = get_db()
-    cursor = conn.cursor()
 
     update_fields = [
         'srs_sent_date', 'srs_approval_date', 'estimation_received_date',
@@ -430,7 +2330,8 @@ def update_request_details(request_id):
     if not filtered_data:
         return jsonify({'error': 'No valid fields provided for update'}), 400
 
-    try:
+    def write(conn):
+        cursor = conn.cursor()
         # Check if an entry already exists in request_updates for this request_id
         cursor.execute('SELECT COUNT(*) FROM request_updates WHERE request_id = ?', (request_id,))
         exists = cursor.fetchone()[0]
@@ -457,19 +2358,19 @@ def update_request_details(request_id):
             query = f"INSERT INTO request_updates ({col_names}) VALUES ({placeholders})"
             cursor.execute(query, tuple(values))
 
-        conn.commit()
+    try:
+        run_write(write)
         return jsonify({'message': 'Request details updated successfully'})
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/update-request/download', methods=['GET'])
+@reads_snapshot
 def download_update_request_data():
-    """Downloads all existing request update data as an Excel file."""
-    conn = get_db()
-    query = '''
+    """Downloads all existing request update data as an Excel file, archived requests too with ?include_archived=true."""
+    conn = get_read_db()
+    include_archived = include_archived_requested(request.args)
+    query = f'''
         SELECT
             r.request_no,
             r.request_title,
@@ -485,20 +2386,15 @@ def download_update_request_data():
             ru.uat_mail_date,
             ru.uat_confirmation_date,
             ru.current_status -- New column
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
+        FROM {archive_source('requests', include_archived)} r
+        LEFT JOIN {archive_source('request_updates', include_archived)} ru ON r.id = ru.request_id
         ORDER BY r.request_date DESC
     '''
-    df = pd.read_sql_query(query, conn)
+    cursor = conn.cursor()
+    cursor.execute(query)
+    response = stream_excel_export(cursor, 'Request Updates', 'request_updates_data.xlsx')
     conn.close()
-
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Request Updates')
-    writer.close()
-    output.seek(0)
-
-    return send_file(output, download_name='request_updates_data.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return response
 
 @app.route('/api/update-request/template', methods=['GET'])
 def download_update_request_template():
@@ -528,142 +2424,136 @@ def download_update_request_template():
 
     return send_file(output, download_name='update_request_template.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
+def process_request_updates_upload(file, job):
+    """Applies the request updates of an uploaded Excel or CSV file; returns the response payload and status code."""
+    try:
+        expected_cols = [
+            'Request No', 'SRS Sent Date', 'SRS Approval Date', 'Estimation Received Date',
+            'Indent Sent Date', 'Signed Indent Received Date', 'Estimated Man-hours BA',
+            'Estimated Man-hours Developers', 'Estimated Man-hours Tester',
+            'Development Start Date', 'UAT Mail Date', 'UAT Confirmation Date',
+            'Current Status' # New column
+        ]
+        # It's okay if not all expected_cols are in the uploaded file, but we should process what's there
+        # if not all(col in df.columns for col in expected_cols):
+        #     return {'error': 'Missing required columns in Excel file for bulk update. Ensure all expected columns are present.'}, 400
+
+        date_fields = {
+            'SRS Sent Date': 'srs_sent_date', 'SRS Approval Date': 'srs_approval_date',
+            'Estimation Received Date': 'estimation_received_date', 'Indent Sent Date': 'indent_sent_date',
+            'Signed Indent Received Date': 'signed_indent_received_date',
+            'Development Start Date': 'development_start_date', 'UAT Mail Date': 'uat_mail_date',
+            'UAT Confirmation Date': 'uat_confirmation_date'
+        }
+        man_hour_fields = {
+            'Estimated Man-hours BA': 'estimated_man_hours_ba',
+            'Estimated Man-hours Developers': 'estimated_man_hours_dev',
+            'Estimated Man-hours Tester': 'estimated_man_hours_tester'
+        }
+
+        updated_count, failed_rows = 0, []
+        for df in read_upload_batches(file, job['filename'], app.config['UPLOAD_BATCH_ROWS']):
+            errors = {} # Row index -> error messages
+
+            request_nos = df['Request No'] if 'Request No' in df.columns else pd.Series(None, index=df.index, dtype=object)
+            for index in df.index[request_nos.isna()]:
+                errors[index] = [f"Row {index+2}: 'Request No' is missing."]
+
+            # Normalize the columns present in the sheet; absent columns are left untouched,
+            # blank cells in a present column clear the stored value
+            columns = {}
+            for excel_col, db_col in date_fields.items():
+                if excel_col in df.columns:
+                    columns[db_col] = excel_dates_to_str(df[excel_col])
+            for excel_col, db_col in man_hour_fields.items():
+                if excel_col in df.columns:
+                    man_hours = pd.to_numeric(df[excel_col], errors='coerce')
+                    man_hours = man_hours.where(man_hours.abs() != float('inf')) # Not convertible to int either
+                    for index in df.index[df[excel_col].notna() & man_hours.isna() & request_nos.notna()]:
+                        errors.setdefault(index, []).append(f"Row {index+2} (Request No: {request_nos[index]}): Invalid numeric value for '{excel_col}'.")
+                    columns[db_col] = man_hours.map(int, na_action='ignore').astype(object).where(man_hours.notna(), None)
+            if 'Current Status' in df.columns:
+                statuses = df['Current Status']
+                columns['current_status'] = statuses.map(str).where(statuses.notna(), None)
+
+            # Stage the rows that have a Request No
+            staged = request_nos.notna()
+            rows = list(zip(
+                df.index[staged].tolist(),
+                request_nos[staged].map(str).tolist(),
+                [index in errors for index in df.index[staged]],
+                *(values[staged].tolist() for values in columns.values())
+            ))
+
+            def write(conn):
+                cursor = conn.cursor()
+                # Resolve the staged rows' ids with one join, then upsert every valid row in a single statement
+                cursor.execute('DROP TABLE IF EXISTS temp.request_update_staging')
+                cursor.execute(f'''
+                    CREATE TEMP TABLE request_update_staging (
+                        row_index INTEGER PRIMARY KEY, request_no TEXT, request_id INTEGER, invalid INTEGER NOT NULL
+                        {''.join(f', {db_col}' for db_col in columns)}
+                    )
+                ''')
+                staging_cols = ['row_index', 'request_no', 'invalid'] + list(columns)
+                cursor.executemany(f'''
+                    INSERT INTO temp.request_update_staging ({', '.join(staging_cols)})
+                    VALUES ({', '.join('?' for _ in staging_cols)})
+                ''', rows)
+                cursor.execute('''
+                    UPDATE temp.request_update_staging
+                    SET request_id = (SELECT r.id FROM requests r WHERE r.request_no = request_update_staging.request_no)
+                ''')
+
+                cursor.execute('SELECT row_index FROM temp.request_update_staging WHERE request_id IS NULL')
+                unknown = [row[0] for row in cursor.fetchall()]
+
+                if columns:
+                    conflict_action = 'DO UPDATE SET ' + ', '.join(f'{db_col} = excluded.{db_col}' for db_col in columns)
+                else:
+                    conflict_action = 'DO NOTHING'
+                cursor.execute(f'''
+                    INSERT INTO request_updates (request_id{''.join(f', {db_col}' for db_col in columns)})
+                    SELECT request_id{''.join(f', {db_col}' for db_col in columns)}
+                    FROM temp.request_update_staging
+                    WHERE request_id IS NOT NULL AND NOT invalid
+                    ORDER BY row_index
+                    ON CONFLICT (request_id) {conflict_action}
+                ''')
+                cursor.execute('SELECT COUNT(*) FROM temp.request_update_staging WHERE request_id IS NOT NULL AND NOT invalid')
+                updated_count = cursor.fetchone()[0]
+                cursor.execute('DROP TABLE temp.request_update_staging')
+                return updated_count, unknown
+
+            batch_updated, unknown = run_write(write)
+            updated_count += batch_updated
+            for index in unknown:
+                errors[index] = [f"Row {index+2} (Request No: {request_nos[index]}): Request No not found in system."]
+            failed_rows += [message for index in sorted(errors) for message in errors[index]]
+            update_upload_job(job, rows_processed=job['rows_processed'] + len(df))
+        update_upload_job(job, rows_total=job['rows_processed'])
+
+        message = f"Successfully updated {updated_count} request details."
+        if failed_rows:
+            message += f" Failed to process {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
+            return {'message': message, 'failed_rows': failed_rows}, 200
+        return {'message': message}, 200
+
+    except Exception as e:
+        return {'error': f'Error processing file for bulk update: {str(e)}'}, 500
+
 @app.route('/api/update-request/bulk-upload', methods=['POST'])
 def bulk_upload_request_updates_excel():
-    """Uploads bulk request updates from an Excel file."""
+    """Accepts an Excel or CSV file of bulk request updates and queues it as an upload job."""
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in the request'}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
-    if file and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        try:
-            df = pd.read_excel(file)
-            expected_cols = [
-                'Request No', 'SRS Sent Date', 'SRS Approval Date', 'Estimation Received Date',
-                'Indent Sent Date', 'Signed Indent Received Date', 'Estimated Man-hours BA',
-                'Estimated Man-hours Developers', 'Estimated Man-hours Tester',
-                'Development Start Date', 'UAT Mail Date', 'UAT Confirmation Date',
-                'Current Status' # New column
-            ]
-            # It's okay if not all expected_cols are in the uploaded file, but we should process what's there
-            # if not all(col in df.columns for col in expected_cols):
-            #     return jsonify({'error': 'Missing required columns in Excel file for bulk update. Ensure all expected columns are present.'}), 400
-
-            conn = get_db()
-            cursor = conn.cursor()
-            updated_count = 0
-            failed_rows = []
-
-            for index, row in df.iterrows():
-                request_no = row.get('Request No')
-                if pd.isna(request_no):
-                    failed_rows.append(f"Row {index+2}: 'Request No' is missing.")
-                    continue
-
-                try:
-                    cursor.execute('SELECT id FROM requests WHERE request_no = ?', (str(request_no),))
-                    req = cursor.fetchone()
-                    if not req:
-                        failed_rows.append(f"Row {index+2} (Request No: {request_no}): Request No not found in system.")
-                        continue
-                    request_id = req['id']
-
-                    update_data = {}
-                    # Date fields
-                    date_fields = {
-                        'SRS Sent Date': 'srs_sent_date', 'SRS Approval Date': 'srs_approval_date',
-                        'Estimation Received Date': 'estimation_received_date', 'Indent Sent Date': 'indent_sent_date',
-                        'Signed Indent Received Date': 'signed_indent_received_date',
-                        'Development Start Date': 'development_start_date', 'UAT Mail Date': 'uat_mail_date',
-                        'UAT Confirmation Date': 'uat_confirmation_date'
-                    }
-                    for excel_col, db_col in date_fields.items():
-                        if excel_col in row and pd.notna(row.get(excel_col)):
-                            date_val = row.get(excel_col)
-                            if isinstance(date_val, pd.Timestamp):
-                                update_data[db_col] = date_val.strftime('%Y-%m-%d')
-                            else:
-                                update_data[db_col] = str(date_val)
-                        else:
-                            update_data[db_col] = None # Ensure explicit NULL for empty date fields
-
-                    # Man-hour fields
-                    man_hour_fields = {
-                        'Estimated Man-hours BA': 'estimated_man_hours_ba',
-                        'Estimated Man-hours Developers': 'estimated_man_hours_dev',
-                        'Estimated Man-hours Tester': 'estimated_man_hours_tester'
-                    }
-                    for excel_col, db_col in man_hour_fields.items():
-                        if excel_col in row and pd.notna(row.get(excel_col)):
-                            mh_val = row.get(excel_col)
-                            try:
-                                update_data[db_col] = int(pd.to_numeric(mh_val, errors='raise'))
-                            except (ValueError, TypeError):
-                                failed_rows.append(f"Row {index+2} (Request No: {request_no}): Invalid numeric value for '{excel_col}'.")
-                                continue # Skip this row if man-hours is invalid
-                        else:
-                            update_data[db_col] = None # Ensure explicit NULL for empty man-hour fields
-
-                    # Current Status field
-                    if 'Current Status' in row and pd.notna(row.get('Current Status')):
-                        update_data['current_status'] = str(row.get('Current Status'))
-                    else:
-                        update_data['current_status'] = None
-
-
-                    # Check if an entry already exists in request_updates for this request_id
-                    cursor.execute('SELECT COUNT(*) FROM request_updates WHERE request_id = ?', (request_id,))
-                    exists = cursor.fetchone()[0]
-
-                    if exists:
-                        set_clauses = [f"{key} = ?" for key in update_data.keys()]
-                        params = list(update_data.values())
-                        params.append(request_id)
-                        query = f"UPDATE request_updates SET {', '.join(set_clauses)} WHERE request_id = ?"
-                        cursor.execute(query, tuple(params))
-                    else:
-                        # For insert, ensure all fields are explicitly present (even if None)
-                        # Build columns and values dynamically based on what was *attempted* to be updated
-                        all_update_cols_for_insert = ['request_id']
-                        insert_values = [request_id]
-                        
-                        # Add date fields
-                        for db_col in date_fields.values():
-                            all_update_cols_for_insert.append(db_col)
-                            insert_values.append(update_data.get(db_col))
-                        
-                        # Add man-hour fields
-                        for db_col in man_hour_fields.values():
-                            all_update_cols_for_insert.append(db_col)
-                            insert_values.append(update_data.get(db_col))
-
-                        # Add current_status
-                        all_update_cols_for_insert.append('current_status')
-                        insert_values.append(update_data.get('current_status'))
-
-                        placeholders = ', '.join(['?' for _ in all_update_cols_for_insert])
-                        col_names = ', '.join(all_update_cols_for_insert)
-                        query = f"INSERT INTO request_updates ({col_names}) VALUES ({placeholders})"
-                        cursor.execute(query, tuple(insert_values))
-
-                    updated_count += 1
-
-                except Exception as e:
-                    failed_rows.append(f"Row {index+2} (Request No: {request_no}): Error - {str(e)}")
-            conn.commit()
-            conn.close()
-            
-            message = f"Successfully updated {updated_count} request details."
-            if failed_rows:
-                message += f" Failed to process {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
-                return jsonify({'message': message, 'failed_rows': failed_rows}), 200
-            return jsonify({'message': message}), 200
-
-        except Exception as e:
-            return jsonify({'error': f'Error processing Excel file for bulk update: {str(e)}'}), 500
+    if file and file.filename.endswith(UPLOAD_EXTENSIONS):
+        return submit_upload_job('request_updates', process_request_updates_upload, file)
     else:
-        return jsonify({'error': 'Invalid file type. Please upload an Excel file (.xlsx or .xls)'}), 400
+        return jsonify({'error': 'Invalid file type. Please upload an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
 
 
 # --- Routes for Update Man-hours ---
@@ -673,116 +2563,288 @@ def update_manhours_page():
     return render_template('update_manhours.html')
 
 
+def process_actual_manhours_upload(file, job, force=False):
+    """
+    Upserts the actual man-hours of an uploaded Excel or CSV file; returns the response payload and status code.
+    A file identical to one applied before without failed rows is skipped unless `force` is set, and of
+    the other files only the entries that are new or whose hours changed are written.
+    """
+    try:
+        digest = hashlib.sha256()
+        while chunk := file.read(1 << 16):
+            digest.update(chunk)
+        file.seek(0)
+        file_sha256 = digest.hexdigest()
+        if not force:
+            previous = get_db().execute(
+                "SELECT row_count, uploaded_at FROM upload_fingerprints WHERE upload_type = 'actual_manhours' AND file_sha256 = ?",
+                (file_sha256,)).fetchone()
+            if previous is not None:
+                update_upload_job(job, rows_total=previous['row_count'], rows_processed=previous['row_count'])
+                return {
+                    'message': f"File is identical to one already applied at {previous['uploaded_at']} UTC; nothing was written. "
+                               "Upload it with ?force=true to apply it again.",
+                    'counts': {'inserted': 0, 'updated': 0, 'unchanged': previous['row_count'], 'archived': 0},
+                }, 200
+
+        counts, failed_rows = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'archived': 0}, []
+        for df in read_upload_batches(file, job['filename'], app.config['UPLOAD_BATCH_ROWS']):
+            # Added 'Task Date' to required columns
+            required_cols = ['Request No', 'Stakeholder Name', 'Actual Man-Hours', 'Task Date']
+            if not all(col in df.columns for col in required_cols):
+                return {'error': 'Missing required columns in file. Ensure "Request No", "Stakeholder Name", "Actual Man-Hours", "Task Date" are present.'}, 400
+
+            # Validate and coerce whole columns at once
+            missing = df[required_cols].isna().any(axis=1)
+            man_hours = pd.to_numeric(df['Actual Man-Hours'], errors='coerce')
+            invalid_man_hours = ~missing & man_hours.isna()
+            infinite_man_hours = ~missing & (man_hours.abs() == float('inf'))
+
+            task_dates = excel_dates_to_str(df['Task Date'])
+
+            # Rows that pass the checks above are staged with their names; ids are resolved on the writer
+            failed = {} # Row index -> error message, first failing check wins like the row loop did
+            checks = [
+                (missing, "Row {row}: Missing data in Request No, Stakeholder Name, Actual Man-Hours, or Task Date."),
+                (invalid_man_hours, "Row {row} (Request No: {request_no}, Stakeholder: {stakeholder_name}): Invalid 'Actual Man-Hours' value."),
+                (infinite_man_hours, "Row {row} (Request No: {request_no}, Stakeholder: {stakeholder_name}): Error processing 'Actual Man-Hours': cannot convert float infinity to integer."),
+            ]
+            for mask, template in checks:
+                for index in df.index[mask & ~df.index.isin(list(failed))]:
+                    failed[index] = template.format(row=index + 2, request_no=df.at[index, 'Request No'],
+                                                    stakeholder_name=df.at[index, 'Stakeholder Name'])
+            staged = ~df.index.isin(list(failed))
+            rows = list(zip(
+                df.index[staged].tolist(),
+                df['Request No'][staged].astype(str).tolist(),
+                df['Stakeholder Name'][staged].astype(str).tolist(),
+                man_hours[staged].astype('int64').tolist(),
+                task_dates[staged].tolist(),
+            ))
+
+            def write(conn):
+                cursor = conn.cursor()
+                stage_batch(cursor, 'manhour_upload_staging', ['request_no', 'stakeholder_name', 'actual_man_hours', 'task_date'], rows,
+                            extra_columns=['request_id', 'stakeholder_id', 'existing_id', 'existing_hours'])
+
+                # Resolve request numbers and stakeholder names in the same transaction as the insert so they
+                # cannot be deleted in between; entries of archived requests are skipped rather than failed,
+                # re-uploading an old timesheet is not an error
+                cursor.execute('''
+                    UPDATE temp.manhour_upload_staging SET
+                        request_id = (SELECT id FROM requests WHERE request_no = manhour_upload_staging.request_no),
+                        stakeholder_id = (SELECT id FROM stakeholders WHERE name = manhour_upload_staging.stakeholder_name)
+                ''')
+                cursor.execute('''
+                    UPDATE temp.manhour_upload_staging SET error = 'unknown_request'
+                    WHERE request_id IS NULL AND request_no NOT IN (SELECT request_no FROM archived_requests)
+                ''')
+                cursor.execute("UPDATE temp.manhour_upload_staging SET error = 'unknown_stakeholder' WHERE error IS NULL AND stakeholder_id IS NULL")
+                cursor.execute("UPDATE temp.manhour_upload_staging SET error = 'archived' WHERE error IS NULL AND request_id IS NULL")
+                cursor.execute('SELECT row_index, error FROM temp.manhour_upload_staging WHERE error IS NOT NULL')
+                errors = [tuple(row) for row in cursor.fetchall()]
+
+                # One entry per (request, stakeholder, task date); when the batch repeats one, its last row
+                # wins, and a later batch overwrites it again
+                cursor.execute('''
+                    DELETE FROM temp.manhour_upload_staging
+                    WHERE error IS NOT NULL OR row_index NOT IN (
+                        SELECT MAX(row_index) FROM temp.manhour_upload_staging
+                        WHERE error IS NULL
+                        GROUP BY request_id, stakeholder_id, task_date
+                    )
+                ''')
+
+                # Compare with the stored entries and write only the new and changed ones; rewriting an
+                # unchanged entry would still cost its rollup trigger updates
+                cursor.execute('''
+                    UPDATE temp.manhour_upload_staging AS b SET existing_id = a.id, existing_hours = a.actual_man_hours
+                    FROM actual_man_hours a
+                    WHERE a.request_id = b.request_id AND a.stakeholder_id = b.stakeholder_id AND a.task_date = b.task_date
+                ''')
+                cursor.execute('''
+                    SELECT COUNT(*) FILTER (WHERE existing_id IS NULL) AS inserted,
+                           COUNT(*) FILTER (WHERE existing_hours != actual_man_hours) AS updated,
+                           COUNT(*) FILTER (WHERE existing_hours = actual_man_hours) AS unchanged
+                    FROM temp.manhour_upload_staging
+                ''')
+                counts = dict(cursor.fetchone())
+                cursor.execute('''
+                    UPDATE actual_man_hours AS a SET actual_man_hours = b.actual_man_hours
+                    FROM temp.manhour_upload_staging b
+                    WHERE a.id = b.existing_id AND b.existing_hours != b.actual_man_hours
+                ''')
+                cursor.execute('''
+                    INSERT INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date)
+                    SELECT request_id, stakeholder_id, actual_man_hours, task_date
+                    FROM temp.manhour_upload_staging
+                    WHERE existing_id IS NULL
+                    ORDER BY row_index
+                ''')
+                cursor.execute('DROP TABLE temp.manhour_upload_staging')
+                return counts, errors
+
+            batch_counts, batch_errors = run_write(write)
+            templates = {
+                'unknown_request': "Row {row} (Request No: {request_no}): Request No not found in system.",
+                'unknown_stakeholder': "Row {row} (Stakeholder: {stakeholder_name}): Stakeholder not found in system.",
+            }
+            batch_counts['archived'] = sum(error == 'archived' for _, error in batch_errors)
+            for index, error in batch_errors:
+                if error in templates:
+                    failed[index] = templates[error].format(row=index + 2, request_no=df.at[index, 'Request No'],
+                                                            stakeholder_name=df.at[index, 'Stakeholder Name'])
+            counts = {key: counts[key] + batch_counts[key] for key in counts}
+            failed_rows += [failed[index] for index in sorted(failed)]
+            update_upload_job(job, rows_processed=job['rows_processed'] + len(df))
+        update_upload_job(job, rows_total=job['rows_processed'])
+
+        if not failed_rows:
+            run_write(lambda conn: conn.execute('''
+                INSERT INTO upload_fingerprints (upload_type, file_sha256, filename, row_count, uploaded_at)
+                VALUES ('actual_manhours', ?, ?, ?, datetime('now'))
+                ON CONFLICT DO UPDATE SET filename = excluded.filename, row_count = excluded.row_count, uploaded_at = excluded.uploaded_at
+            ''', (file_sha256, job['filename'], sum(counts.values()))))
+
+        message = (f"Successfully uploaded {counts['inserted']} new and updated {counts['updated']} actual man-hours entries; "
+                   f"{counts['unchanged']} were unchanged.")
+        if counts['archived']:
+            message = message[:-1] + f"; {counts['archived']} belonged to archived requests and were skipped."
+        if failed_rows:
+            message += f" Failed to process {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
+            return {'message': message, 'failed_rows': failed_rows, 'counts': counts}, 200
+        return {'message': message, 'counts': counts}, 200
+
+    except Exception as e:
+        return {'error': f'Error processing file: {str(e)}'}, 500
+
 @app.route('/api/actual-manhours/upload', methods=['POST'])
 def upload_actual_manhours_excel():
-    """Uploads actual man-hours from an Excel file."""
+    """Accepts an Excel or CSV file of actual man-hours and queues it as an upload job."""
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in the request'}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
-    if file and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        try:
-            df = pd.read_excel(file)
-            # Added 'Task Date' to required columns
-            required_cols = ['Request No', 'Stakeholder Name', 'Actual Man-Hours', 'Task Date']
-            if not all(col in df.columns for col in required_cols):
-                return jsonify({'error': 'Missing required columns in Excel file. Ensure "Request No", "Stakeholder Name", "Actual Man-Hours", "Task Date" are present.'}), 400
-
-            conn = get_db()
-            cursor = conn.cursor()
-            uploaded_count = 0
-            failed_rows = []
-
-            for index, row in df.iterrows():
-                request_no = row.get('Request No')
-                stakeholder_name = row.get('Stakeholder Name')
-                actual_man_hours = row.get('Actual Man-Hours')
-                task_date_raw = row.get('Task Date') # Get Task Date
-
-                if pd.isna(request_no) or pd.isna(stakeholder_name) or pd.isna(actual_man_hours) or pd.isna(task_date_raw):
-                    failed_rows.append(f"Row {index+2}: Missing data in Request No, Stakeholder Name, Actual Man-Hours, or Task Date.")
-                    continue
-
-                # Process Actual Man-Hours
-                try:
-                    processed_actual_man_hours = pd.to_numeric(actual_man_hours, errors='coerce')
-                    if pd.isna(processed_actual_man_hours):
-                        failed_rows.append(f"Row {index+2} (Request No: {request_no}, Stakeholder: {stakeholder_name}): Invalid 'Actual Man-Hours' value.")
-                        continue
-                    actual_man_hours_int = int(processed_actual_man_hours)
-                except Exception as e:
-                    failed_rows.append(f"Row {index+2} (Request No: {request_no}, Stakeholder: {stakeholder_name}): Error processing 'Actual Man-Hours': {str(e)}.")
-                    continue
-
-                # Process Task Date
-                task_date_str = None
-                if pd.notna(task_date_raw):
-                    if isinstance(task_date_raw, pd.Timestamp):
-                        task_date_str = task_date_raw.strftime('%Y-%m-%d')
-                    else:
-                        task_date_str = str(task_date_raw) # Fallback
+    if file and file.filename.endswith(UPLOAD_EXTENSIONS):
+        force = request.args.get('force', 'false').lower() in ('true', '1') # Apply a file even if it was applied before
+        return submit_upload_job('actual_manhours', functools.partial(process_actual_manhours_upload, force=force), file)
+    else:
+        return jsonify({'error': 'Invalid file type. Please upload an Excel (.xlsx or .xls) or CSV (.csv) file'}), 400
 
-                try:
-                    # Get request_id
-                    cursor.execute('SELECT id FROM requests WHERE request_no = ?', (request_no,))
-                    req = cursor.fetchone()
-                    if not req:
-                        failed_rows.append(f"Row {index+2} (Request No: {request_no}): Request No not found in system.")
-                        continue
-                    request_id = req['id']
-
-                    # Get stakeholder_id
-                    cursor.execute('SELECT id FROM stakeholders WHERE name = ?', (stakeholder_name,))
-                    stk = cursor.fetchone()
-                    if not stk:
-                        failed_rows.append(f"Row {index+2} (Stakeholder: {stakeholder_name}): Stakeholder not found in system.")
-                        continue
-                    stakeholder_id = stk['id']
-
-                    # Check if entry already exists for this request_id, stakeholder_id AND task_date
-                    cursor.execute('SELECT id FROM actual_man_hours WHERE request_id = ? AND stakeholder_id = ? AND task_date = ?',
-                                   (request_id, stakeholder_id, task_date_str))
-                    existing_entry = cursor.fetchone()
-
-                    if existing_entry:
-                        cursor.execute('''
-                            UPDATE actual_man_hours
-                            SET actual_man_hours = ?
-                            WHERE id = ?
-                        ''', (actual_man_hours_int, existing_entry['id']))
-                    else:
-                        cursor.execute('''
-                            INSERT INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date)
-                            VALUES (?, ?, ?, ?)
-                        ''', (request_id, stakeholder_id, actual_man_hours_int, task_date_str))
-                    uploaded_count += 1
-
-                except Exception as e:
-                    failed_rows.append(f"Row {index+2} (Request No: {request_no}, Stakeholder: {stakeholder_name}): Error - {str(e)}")
-            conn.commit()
-            conn.close()
+@app.route('/api/actual-manhours/batch', methods=['POST'])
+def upsert_actual_manhours_batch():
+    """
+    Upserts a batch of man-hour entries in one transaction. Records name the request by request_id or
+    request_no and the stakeholder by stakeholder_id or stakeholder_name, plus actual_man_hours and
+    task_date; an existing entry for the same request, stakeholder and task date gets its hours replaced.
+    """
+    try:
+        mode, records, errors = read_batch_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = []
+    for index, record in enumerate(records):
+        if index in errors:
+            continue
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('Each record must be a JSON object.')
+            rows.append((index, *batch_reference(record, 'request_id', 'request_no'),
+                         *batch_reference(record, 'stakeholder_id', 'stakeholder_name'),
+                         batch_integer(record, 'actual_man_hours'), batch_text(record, 'task_date')))
+        except ValueError as e:
+            errors[index] = str(e)
+
+    def write(conn):
+        cursor = conn.cursor()
+        stage_batch(cursor, 'manhour_batch_staging',
+                    ['request_id', 'request_no', 'stakeholder_id', 'stakeholder_name', 'actual_man_hours', 'task_date'], rows,
+                    extra_columns=['existing'])
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging
+            SET request_id = (SELECT id FROM requests WHERE request_no = manhour_batch_staging.request_no)
+            WHERE request_no IS NOT NULL
+        ''')
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging
+            SET stakeholder_id = (SELECT id FROM stakeholders WHERE name = manhour_batch_staging.stakeholder_name)
+            WHERE stakeholder_name IS NOT NULL
+        ''')
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging SET error = 'Request is archived.'
+            WHERE request_id IN (SELECT id FROM archived_requests) OR request_no IN (SELECT request_no FROM archived_requests)
+        ''')
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging SET error = 'Request not found.'
+            WHERE error IS NULL AND (request_id IS NULL OR request_id NOT IN (SELECT id FROM requests))
+        ''')
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging SET error = 'Stakeholder not found.'
+            WHERE error IS NULL AND (stakeholder_id IS NULL OR stakeholder_id NOT IN (SELECT id FROM stakeholders))
+        ''')
+        cursor.execute('''
+            UPDATE temp.manhour_batch_staging SET error = 'task_date must be a date in YYYY-MM-DD format.'
+            WHERE error IS NULL AND date(task_date) IS NULL
+        ''')
+        cursor.execute('UPDATE temp.manhour_batch_staging SET task_date = date(task_date) WHERE error IS NULL')
+        errors.update(cursor.execute('SELECT row_index, error FROM temp.manhour_batch_staging WHERE error IS NOT NULL').fetchall())
+        applied = {}
+        if not (errors and mode == 'atomic'):
+            # An entry is updated rather than created if it exists already or an earlier record of the batch creates it
+            cursor.execute('''
+                CREATE INDEX temp.ix_manhour_batch_staging_key
+                ON manhour_batch_staging (request_id, stakeholder_id, task_date, row_index)
+            ''')
+            cursor.execute('''
+                UPDATE temp.manhour_batch_staging SET existing = EXISTS (
+                    SELECT 1 FROM actual_man_hours a
+                    WHERE a.request_id = manhour_batch_staging.request_id AND a.stakeholder_id = manhour_batch_staging.stakeholder_id
+                      AND a.task_date = manhour_batch_staging.task_date
+                ) OR EXISTS (
+                    SELECT 1 FROM temp.manhour_batch_staging earlier
+                    WHERE earlier.request_id = manhour_batch_staging.request_id AND earlier.stakeholder_id = manhour_batch_staging.stakeholder_id
+                      AND earlier.task_date = manhour_batch_staging.task_date AND earlier.row_index < manhour_batch_staging.row_index
+                      AND earlier.error IS NULL
+                )
+                WHERE error IS NULL
+            ''')
+            cursor.execute('''
+                INSERT INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date)
+                SELECT request_id, stakeholder_id, actual_man_hours, task_date
+                FROM temp.manhour_batch_staging
+                WHERE error IS NULL
+                ORDER BY row_index
+                ON CONFLICT (request_id, stakeholder_id, task_date) DO UPDATE SET actual_man_hours = excluded.actual_man_hours
+            ''')
+            cursor.execute('''
+                SELECT b.row_index, b.existing, a.id FROM temp.manhour_batch_staging b
+                JOIN actual_man_hours a
+                  ON a.request_id = b.request_id AND a.stakeholder_id = b.stakeholder_id AND a.task_date = b.task_date
+                WHERE b.error IS NULL
+            ''')
+            applied = {row_index: ('updated' if existing else 'created', entry_id) for row_index, existing, entry_id in cursor.fetchall()}
+        cursor.execute('DROP TABLE temp.manhour_batch_staging')
+        return applied
 
-            message = f"Successfully uploaded/updated {uploaded_count} actual man-hours entries."
-            if failed_rows:
-                message += f" Failed to process {len(failed_rows)} rows due to errors: " + "; ".join(failed_rows)
-                return jsonify({'message': message, 'failed_rows': failed_rows}), 200
-            return jsonify({'message': message}), 200
+    try:
+        applied = run_write(write)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return batch_response(mode, len(records), errors, applied)
 
-        except Exception as e:
-            return jsonify({'error': f'Error processing Excel file: {str(e)}'}), 500
-    else:
-        return jsonify({'error': 'Invalid file type. Please upload an Excel file (.xlsx or .xls)'}), 400
 
+ACTUAL_MANHOURS_SORT_COLUMNS = ('task_date', 'request_no', 'stakeholder_name', 'actual_man_hours', 'id')
 
 @app.route('/api/actual-manhours', methods=['GET'])
 def get_actual_manhours():
-    """Retrieves a list of requests with associated actual man-hours."""
+    """Retrieves a list of requests with associated actual man-hours, paged when a limit is given."""
     conn = get_db()
-    cursor = conn.cursor()
     # Changed 'r.request_date' to 'amh.task_date'
-    cursor.execute('''
+    query = '''
         SELECT
+            amh.id,
             r.request_no,
             amh.task_date, -- Display task_date instead of request_date
             s.name AS stakeholder_name,
@@ -790,37 +2852,48 @@ def get_actual_manhours():
         FROM actual_man_hours amh
         JOIN requests r ON amh.request_id = r.id
         JOIN stakeholders s ON amh.stakeholder_id = s.id
-        ORDER BY amh.task_date DESC, r.request_no ASC, s.name ASC
-    ''')
-    data = cursor.fetchall()
+    '''
+    if 'limit' in request.args:
+        try:
+            # Foreign keys guarantee every entry joins, so counting the table alone gives the same total
+            page = fetch_page(conn, query, request.args, ACTUAL_MANHOURS_SORT_COLUMNS, 'task_date', 'desc',
+                              nullable_columns=('task_date',), count_query='SELECT COUNT(*) FROM actual_man_hours')
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        conn.close()
+        return jsonify(page)
+    try:
+        columnar = columnar_requested(request.args)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    data = query_rows(conn, query + ' ORDER BY amh.task_date DESC, r.request_no ASC, s.name ASC', columnar=columnar)
     conn.close()
-    return jsonify([dict(d) for d in data])
+    return jsonify(data)
 
 @app.route('/api/actual-manhours/download', methods=['GET'])
+@reads_snapshot
 def download_actual_manhours_data():
-    """Downloads all existing actual man-hours data as an Excel file."""
-    conn = get_db()
-    query = '''
+    """Downloads all existing actual man-hours data as an Excel file, archived requests' too with ?include_archived=true."""
+    conn = get_read_db()
+    include_archived = include_archived_requested(request.args)
+    query = f'''
         SELECT
             r.request_no AS "Request No",
             s.name AS "Stakeholder Name",
             amh.actual_man_hours AS "Actual Man-Hours",
             amh.task_date AS "Task Date"
-        FROM actual_man_hours amh
-        JOIN requests r ON amh.request_id = r.id
+        FROM {archive_source('actual_man_hours', include_archived)} amh
+        JOIN {archive_source('requests', include_archived)} r ON amh.request_id = r.id
         JOIN stakeholders s ON amh.stakeholder_id = s.id
         ORDER BY amh.task_date DESC, r.request_no ASC, s.name ASC
     '''
-    df = pd.read_sql_query(query, conn)
+    cursor = conn.cursor()
+    cursor.execute(query)
+    response = stream_excel_export(cursor, 'Actual Man-Hours Data', 'actual_manhours_data.xlsx')
     conn.close()
-
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Actual Man-Hours Data')
-    writer.close()
-    output.seek(0)
-
-    return send_file(output, download_name='actual_manhours_data.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return response
 
 @app.route('/api/actual-manhours/template', methods=['GET'])
 def download_actual_manhours_template():
@@ -848,90 +2921,118 @@ def report_page():
     """Renders the consolidated report page."""
     return render_template('report.html')
 
-@app.route('/api/report', methods=['GET'])
-def generate_report():
+# Consolidated report columns: (JSON key, Excel header, SQL expression).
+# A header of None keeps the column out of the Excel download.
+TOTAL_ESTIMATED_SQL = 'COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)'
+TOTAL_ACTUAL_SQL = 'COALESCE(amh.actual_ba, 0) + COALESCE(amh.actual_dev, 0) + COALESCE(amh.actual_tester, 0)'
+
+REPORT_COLUMNS = [
+    ('request_internal_id', None, 'r.id'), # Keep internal ID for potential detail view
+    ('request_no', 'Request No', 'r.request_no'),
+    ('current_status', 'Current Status', 'ru.current_status'),
+    ('requested_by', 'Requested By', 'r.requested_by'),
+    ('department', 'Department', 'r.department'),
+    ('category', 'Category', 'r.category'),
+    ('request_date', 'Request Date', 'r.request_date'),
+    ('request_title', 'Request Title', 'r.request_title'),
+    ('srs_sent_date', 'SRS Sent Date', 'ru.srs_sent_date'),
+    ('srs_approval_date', 'SRS Approval Date', 'ru.srs_approval_date'),
+    ('estimation_received_date', 'Estimation Received Date', 'ru.estimation_received_date'),
+    ('indent_sent_date', 'Indent Sent Date', 'ru.indent_sent_date'),
+    ('signed_indent_received_date', 'Signed Indent Received Date', 'ru.signed_indent_received_date'),
+    ('estimated_man_hours_ba', 'Est. MH BA', 'COALESCE(ru.estimated_man_hours_ba, 0)'),
+    ('actual_man_hours_ba', 'Actual MH BA', 'COALESCE(amh.actual_ba, 0)'),
+    ('estimated_man_hours_developers', 'Est. MH Dev', 'COALESCE(ru.estimated_man_hours_dev, 0)'),
+    ('actual_man_hours_developers', 'Actual MH Dev', 'COALESCE(amh.actual_dev, 0)'),
+    ('estimated_man_hours_tester', 'Est. MH Tester', 'COALESCE(ru.estimated_man_hours_tester, 0)'),
+    ('actual_man_hours_tester', 'Actual MH Tester', 'COALESCE(amh.actual_tester, 0)'),
+    ('total_estimated', 'Total Estimated', f'({TOTAL_ESTIMATED_SQL})'),
+    ('total_actual', 'Total Actual', f'({TOTAL_ACTUAL_SQL})'),
+    # Difference: Total Estimated - Total Actual
+    ('difference_man_hours', 'Difference', f'(({TOTAL_ESTIMATED_SQL}) - ({TOTAL_ACTUAL_SQL}))'),
+    ('development_start_date', 'Dev Start Date', 'ru.development_start_date'),
+    ('uat_mail_date', 'UAT Mail Date', 'ru.uat_mail_date'),
+    ('uat_confirmation_date', 'UAT Conf. Date', 'ru.uat_confirmation_date'),
+    # TAT: UAT Mail Date - Development Start date
+    ('tat_days', 'TAT (Days)',
+     'CASE WHEN ru.uat_mail_date IS NOT NULL AND ru.development_start_date IS NOT NULL '
+     'THEN JULIANDAY(ru.uat_mail_date) - JULIANDAY(ru.development_start_date) ELSE NULL END'),
+]
+
+def substring_condition(column, text, include_archived=False):
     """
-    Generates the consolidated report with calculated fields,
-    applying filters from query parameters if present.
+    Returns the condition for "requests.column contains text" (bound to f'%{text}%'). Text with
+    three or more consecutive literal characters is looked up in the requests_fts trigram index
+    instead of scanning requests with a leading-wildcard LIKE. Each filter gets its own lookup:
+    SQLite 3.40 can crash when one FTS5 query mixes short and long LIKE patterns.
+    requests_fts only indexes the hot requests, so with include_archived the LIKE is always used.
     """
-    conn = get_db()
-    cursor = conn.cursor()
+    if re.search(r'[^%_]{3}', text) and not include_archived:
+        return f"r.id IN (SELECT rowid FROM requests_fts WHERE {column} LIKE ?)"
+    return f"r.{column} LIKE ?"
 
-    # Get filter parameters from request arguments
-    request_no_filter = request.args.get('request_no')
-    department_filter = request.args.get('department')
-    category_filter = request.args.get('category')
-    request_date_filter = request.args.get('request_date')
-    current_status_filters = request.args.getlist('current_status') # Get list of statuses
+def build_report_query(args, for_excel=False):
+    """
+    Builds the consolidated report query and its parameters from the request arguments.
+    Actual man-hours come from request_manhour_rollup, pivoted by role, and are
+    joined to requests/request_updates once instead of per row and role.
+    With ?include_archived=true archived requests are added, their man-hours summed from the archive.
+    """
+    include_archived = include_archived_requested(args)
+    manhours_source = 'request_manhour_rollup'
+    if include_archived:
+        manhours_source = '''(
+                SELECT request_id, role, actual_man_hours FROM request_manhour_rollup
+                UNION ALL
+                SELECT a.request_id, s.role, a.actual_man_hours
+                FROM archive.actual_man_hours a
+                JOIN stakeholders s ON a.stakeholder_id = s.id
+                WHERE a.request_id IN (SELECT id FROM main.archived_requests)
+            )'''
+    if for_excel:
+        select_list = [f'{expr} AS "{header}"' for _, header, expr in REPORT_COLUMNS if header]
+    else:
+        select_list = [f'{expr} AS {key}' for key, _, expr in REPORT_COLUMNS]
 
-    # Base query for the report
     query = '''
+        WITH amh AS (
+            SELECT
+                request_id,
+                SUM(CASE WHEN role = 'BA' THEN actual_man_hours END) AS actual_ba,
+                SUM(CASE WHEN role = 'Developer' THEN actual_man_hours END) AS actual_dev,
+                SUM(CASE WHEN role = 'Tester' THEN actual_man_hours END) AS actual_tester
+            FROM ''' + manhours_source + '''
+            GROUP BY request_id
+        )
         SELECT
-            r.id AS request_internal_id, -- Keep internal ID for potential detail view
-            r.request_no,
-            ru.current_status, -- New column
-            r.requested_by,
-            r.department,
-            r.category,
-            r.request_date,
-            r.request_title,
-            ru.srs_sent_date,
-            ru.srs_approval_date,
-            ru.estimation_received_date,
-            ru.indent_sent_date,
-            ru.signed_indent_received_date,
-            -- Estimated Man-hours
-            COALESCE(ru.estimated_man_hours_ba, 0) AS estimated_man_hours_ba,
-            COALESCE(ru.estimated_man_hours_dev, 0) AS estimated_man_hours_developers,
-            COALESCE(ru.estimated_man_hours_tester, 0) AS estimated_man_hours_tester,
-            
-            -- Actual Man-hours (summed by role)
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) AS actual_man_hours_ba,
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) AS actual_man_hours_developers,
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0) AS actual_man_hours_tester,
-            
-            -- Calculated Fields
-            (COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) AS total_estimated,
-            (COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) +
-             COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) +
-             COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0)) AS total_actual,
-            
-            -- Difference: Total Estimated - Total Actual
-            ((COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) -
-             (COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) +
-              COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) +
-              COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0))) AS difference_man_hours,
-
-            ru.development_start_date,
-            ru.uat_mail_date,
-            ru.uat_confirmation_date,
-            
-            -- TAT: UAT Mail Date - Development Start date
-            CASE
-                WHEN ru.uat_mail_date IS NOT NULL AND ru.development_start_date IS NOT NULL THEN
-                    JULIANDAY(ru.uat_mail_date) - JULIANDAY(ru.development_start_date)
-                ELSE NULL
-            END AS tat_days
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
+            ''' + ',\n            '.join(select_list) + f'''
+        FROM {archive_source('requests', include_archived)} r
+        LEFT JOIN {archive_source('request_updates', include_archived)} ru ON r.id = ru.request_id
+        LEFT JOIN amh ON r.id = amh.request_id
     '''
-    
+
+    request_no_filter = args.get('request_no')
+    department_filter = args.get('department')
+    category_filter = args.get('category')
+    request_date_filter = args.get('request_date')
+    current_status_filters = args.getlist('current_status') # Get list of statuses
+
     conditions = []
     params = []
 
     if request_no_filter:
-        conditions.append("r.request_no LIKE ?")
+        conditions.append(substring_condition('request_no', request_no_filter, include_archived))
         params.append(f"%{request_no_filter}%")
     if department_filter:
-        conditions.append("r.department LIKE ?")
+        conditions.append(substring_condition('department', department_filter, include_archived))
         params.append(f"%{department_filter}%")
     if category_filter:
-        conditions.append("r.category LIKE ?")
+        conditions.append(substring_condition('category', category_filter, include_archived))
         params.append(f"%{category_filter}%")
     if request_date_filter:
         conditions.append("r.request_date = ?")
         params.append(request_date_filter)
-    
+
     if current_status_filters:
         # Handle multiple status selections using IN clause
         placeholders = ','.join('?' * len(current_status_filters))
@@ -941,115 +3042,48 @@ def generate_report():
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
 
-    query += " GROUP BY r.id ORDER BY r.request_date DESC" # Group by r.id to handle multiple actual_man_hours entries per request
+    query += " ORDER BY r.request_date DESC"
 
-    cursor.execute(query, tuple(params))
-    report_data = cursor.fetchall()
-    conn.close()
+    return query, params
+
+@app.route('/api/report', methods=['GET'])
+@cached_json_response
+def generate_report():
+    """
+    Generates the consolidated report with calculated fields,
+    applying filters from query parameters if present.
+    """
+    try:
+        columnar = columnar_requested(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    conn = get_db()
 
-    report_list = []
-    for row in report_data:
-        row_dict = dict(row)
-        report_list.append(row_dict)
+    query, params = build_report_query(request.args)
+    report_data = query_rows(conn, query, tuple(params), columnar=columnar)
+    conn.close()
 
-    return jsonify(report_list)
+    return jsonify(report_data)
 
 
 @app.route('/api/report/download', methods=['GET'])
+@reads_snapshot
 def download_report_data():
     """Downloads the consolidated report data as an Excel file, applying filters if any."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    request_no_filter = request.args.get('request_no')
-    department_filter = request.args.get('department')
-    category_filter = request.args.get('category')
-    request_date_filter = request.args.get('request_date')
-    current_status_filters = request.args.getlist('current_status')
-
-    query = '''
-        SELECT
-            r.request_no AS "Request No",
-            ru.current_status AS "Current Status", -- New column
-            r.requested_by AS "Requested By",
-            r.department AS "Department",
-            r.category AS "Category",
-            r.request_date AS "Request Date",
-            r.request_title AS "Request Title",
-            ru.srs_sent_date AS "SRS Sent Date",
-            ru.srs_approval_date AS "SRS Approval Date",
-            ru.estimation_received_date AS "Estimation Received Date",
-            ru.indent_sent_date AS "Indent Sent Date",
-            ru.signed_indent_received_date AS "Signed Indent Received Date",
-            COALESCE(ru.estimated_man_hours_ba, 0) AS "Est. MH BA",
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) AS "Actual MH BA",
-            COALESCE(ru.estimated_man_hours_dev, 0) AS "Est. MH Dev",
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) AS "Actual MH Dev",
-            COALESCE(ru.estimated_man_hours_tester, 0) AS "Est. MH Tester",
-            COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0) AS "Actual MH Tester",
-            (COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) AS "Total Estimated",
-            (COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) +
-             COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) +
-             COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0)) AS "Total Actual",
-            ((COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) -
-             (COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'BA'), 0) +
-              COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Developer'), 0) +
-              COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = 'Tester'), 0))) AS "Difference",
-            ru.development_start_date AS "Dev Start Date",
-            ru.uat_mail_date AS "UAT Mail Date",
-            ru.uat_confirmation_date AS "UAT Conf. Date",
-            CASE
-                WHEN ru.uat_mail_date IS NOT NULL AND ru.development_start_date IS NOT NULL THEN
-                    JULIANDAY(ru.uat_mail_date) - JULIANDAY(ru.development_start_date)
-                ELSE NULL
-            END AS "TAT (Days)"
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
-    '''
-    conditions = []
-    params = []
-
-    if request_no_filter:
-        conditions.append("r.request_no LIKE ?")
-        params.append(f"%{request_no_filter}%")
-    if department_filter:
-        conditions.append("r.department LIKE ?")
-        params.append(f"%{department_filter}%")
-    if category_filter:
-        conditions.append("r.category LIKE ?")
-        params.append(f"%{category_filter}%")
-    if request_date_filter:
-        conditions.append("r.request_date = ?")
-        params.append(request_date_filter)
-    
-    if current_status_filters:
-        # Handle multiple status selections using IN clause
-        placeholders = ','.join('?' * len(current_status_filters))
-        conditions.append(f"ru.current_status IN ({placeholders})")
-        params.extend(current_status_filters)
-
+    conn = get_read_db()
 
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-
-    query += " GROUP BY r.id ORDER BY r.request_date DESC" # Group by r.id
-
-    df = pd.read_sql_query(query, conn, params=params)
+    query, params = build_report_query(request.args, for_excel=True)
+    cursor = conn.cursor()
+    cursor.execute(query, tuple(params))
+    response = stream_excel_export(cursor, 'Consolidated Report', 'consolidated_report.xlsx')
     conn.close()
-
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Consolidated Report')
-    writer.close()
-    output.seek(0)
-
-    return send_file(output, download_name='consolidated_report.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return response
 
 @app.route('/api/report/manhours-breakup/<int:request_id>', methods=['GET'])
 def get_manhours_breakup(request_id):
     """
     Provides a detailed breakup of actual man-hours for a specific request,
-    stakeholder and task date wise, with an optional role filter.
+    stakeholder and task date wise, with an optional role filter and ?include_archived=true.
     """
     conn = get_db()
     cursor = conn.cursor()
@@ -1057,13 +3091,13 @@ def get_manhours_breakup(request_id):
     # Get optional role filter from query parameters
     role_filter = request.args.get('role')
 
-    base_query = '''
+    base_query = f'''
         SELECT
             s.name AS stakeholder_name,
             s.role AS stakeholder_role,
             amh.actual_man_hours,
             amh.task_date
-        FROM actual_man_hours amh
+        FROM {archive_source('actual_man_hours', include_archived_requested(request.args))} amh
         JOIN stakeholders s ON amh.stakeholder_id = s.id
         WHERE amh.request_id = ?
     '''
@@ -1086,7 +3120,42 @@ def dashboard_page():
     """Renders the dashboard page."""
     return render_template('dashboard.html')
 
+# Dashboard roles and the request_updates column holding each one's estimate
+DASHBOARD_ROLES = [
+    ('BA', 'estimated_man_hours_ba'),
+    ('Developer', 'estimated_man_hours_dev'),
+    ('Tester', 'estimated_man_hours_tester'),
+]
+
+def compute_manhours_comparison(conn):
+    """
+    Totals estimated and actual man-hours per role across all requests. Estimates come from one
+    pass over request_updates and actuals from one grouped pass over request_manhour_rollup;
+    the two are never joined row to row, so neither total is multiplied by the other's rows.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT ''' + ', '.join(f'COALESCE(SUM(ru.{column}), 0)' for _, column in DASHBOARD_ROLES) + '''
+        FROM request_updates ru
+        JOIN requests r ON ru.request_id = r.id
+    ''')
+    estimated = cursor.fetchone()
+
+    cursor.execute('''
+        SELECT rr.role, SUM(rr.actual_man_hours) AS actual
+        FROM request_manhour_rollup rr
+        JOIN requests r ON rr.request_id = r.id
+        GROUP BY rr.role
+    ''')
+    actual = {row['role']: row['actual'] for row in cursor.fetchall()}
+
+    return [
+        {'role': role, 'estimated': estimated[index], 'actual': actual.get(role, 0)}
+        for index, (role, _) in enumerate(DASHBOARD_ROLES)
+    ]
+
 @app.route('/api/dashboard/data', methods=['GET'])
+@cached_json_response
 def get_dashboard_data():
     """Provides aggregated data for dashboard charts."""
     conn = get_db()
@@ -1097,38 +3166,7 @@ def get_dashboard_data():
     requests_by_category = [dict(row) for row in cursor.fetchall()]
 
     # Example: Estimated vs Actual Man-hours by Role (across all requests)
-    cursor.execute('''
-        SELECT
-            'BA' AS role,
-            SUM(COALESCE(ru.estimated_man_hours_ba, 0)) AS estimated,
-            SUM(COALESCE(amh_ba.actual_man_hours, 0)) AS actual
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
-        LEFT JOIN actual_man_hours amh_ba ON r.id = amh_ba.request_id
-        LEFT JOIN stakeholders s_ba ON amh_ba.stakeholder_id = s_ba.id AND s_ba.role = 'BA'
-        GROUP BY 1
-        UNION ALL
-        SELECT
-            'Developer' AS role,
-            SUM(COALESCE(ru.estimated_man_hours_dev, 0)) AS estimated,
-            SUM(COALESCE(amh_dev.actual_man_hours, 0)) AS actual
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
-        LEFT JOIN actual_man_hours amh_dev ON r.id = amh_dev.request_id
-        LEFT JOIN stakeholders s_dev ON amh_dev.stakeholder_id = s_dev.id AND s_dev.role = 'Developer'
-        GROUP BY 1
-        UNION ALL
-        SELECT
-            'Tester' AS role,
-            SUM(COALESCE(ru.estimated_man_hours_tester, 0)) AS estimated,
-            SUM(COALESCE(amh_tester.actual_man_hours, 0)) AS actual
-        FROM requests r
-        LEFT JOIN request_updates ru ON r.id = ru.request_id
-        LEFT JOIN actual_man_hours amh_tester ON r.id = amh_tester.request_id
-        LEFT JOIN stakeholders s_tester ON amh_tester.stakeholder_id = s_tester.id AND s_tester.role = 'Tester'
-        GROUP BY 1
-    ''')
-    man_hours_comparison = [dict(row) for row in cursor.fetchall()]
+    man_hours_comparison = compute_manhours_comparison(conn)
 
     conn.close()
 
@@ -1137,6 +3175,293 @@ def get_dashboard_data():
         'man_hours_comparison': man_hours_comparison
     })
 
+# --- Routes for Analytics ---
+def parse_date_arg(args, name):
+    """Returns the named query argument if it is a YYYY-MM-DD date (None when absent), raising ValueError otherwise."""
+    value = args.get(name)
+    if value is not None:
+        try:
+            # fromisoformat alone also takes forms such as 20240101, which SQLite's date() reads as NULL
+            if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+                raise ValueError
+            date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'{name} must be a date in YYYY-MM-DD format.')
+    return value
+
+# Trend groupings: the label each row of the response is grouped under
+TREND_GROUP_SQL = {
+    'stakeholder': 's.name',
+    'role': 's.role',
+    'department': 'r.department',
+    'category': 'r.category',
+    'none': 'NULL',
+}
+
+# Optional exact-match filters: query argument -> column
+TREND_FILTER_SQL = {
+    'stakeholder_id': 'p.stakeholder_id',
+    'role': 's.role',
+    'department': 'r.department',
+    'category': 'r.category',
+}
+
+@app.route('/api/analytics/manhours-trend', methods=['GET'])
+@reads_snapshot
+@cached_json_response
+def get_manhours_trend():
+    """
+    Returns actual man-hours per week or month, grouped by stakeholder, role, department or category,
+    over an optional start/end date range. Answered from manhour_period_rollup alone; a range that
+    starts mid-period is widened to include that whole period.
+    """
+    granularity = request.args.get('granularity', 'month')
+    group_by = request.args.get('group_by', 'role')
+
+    if granularity not in PERIOD_BUCKET_SQL:
+        return jsonify({'error': f'granularity must be one of: {", ".join(PERIOD_BUCKET_SQL)}.'}), 400
+    if group_by not in TREND_GROUP_SQL:
+        return jsonify({'error': f'group_by must be one of: {", ".join(TREND_GROUP_SQL)}.'}), 400
+    try:
+        start = parse_date_arg(request.args, 'start')
+        end = parse_date_arg(request.args, 'end')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conditions = ['p.granularity = ?']
+    params = [granularity]
+    if start:
+        conditions.append(f"p.bucket_start >= {PERIOD_BUCKET_SQL[granularity].format('?')}")
+        params.append(start)
+    if end:
+        conditions.append("p.bucket_start <= ?")
+        params.append(end)
+    for arg, column in TREND_FILTER_SQL.items():
+        if request.args.get(arg):
+            conditions.append(f"{column} = ?")
+            params.append(request.args[arg])
+
+    conn = get_read_db()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT
+            p.bucket_start AS bucket,
+            {TREND_GROUP_SQL[group_by]} AS "group",
+            SUM(p.actual_man_hours) AS actual_man_hours
+        FROM manhour_period_rollup p
+        JOIN stakeholders s ON p.stakeholder_id = s.id
+        JOIN requests r ON p.request_id = r.id
+        WHERE {' AND '.join(conditions)}
+        GROUP BY p.bucket_start, "group"
+        HAVING SUM(p.actual_man_hours) <> 0
+        ORDER BY p.bucket_start, "group"
+    ''', params)
+    rows = cursor.fetchall()
+    conn.close()
+
+    return jsonify({
+        'granularity': granularity,
+        'group_by': group_by,
+        'start': start,
+        'end': end,
+        'rows': [dict(row) for row in rows],
+    })
+
+
+# --- Utilization ---
+# Weekly hours per stakeholder are read from the weekly period rollup into NumPy arrays and
+# summed into a stakeholder x week matrix; utilization is that matrix over the weekly capacity.
+
+MAX_UTILIZATION_DAYS = 3653 # Ten years of weeks per stakeholder is the largest matrix served
+
+def parse_utilization_args(args):
+    """Validates the utilization query arguments, raising ValueError with a message for bad ones."""
+    params = {
+        'start': parse_date_arg(args, 'start'),
+        'end': parse_date_arg(args, 'end'),
+        'role': args.get('role') or None,
+    }
+    for name, default in (('capacity', app.config['UTILIZATION_WEEKLY_CAPACITY_HOURS']),
+                          ('under_threshold', app.config['UTILIZATION_UNDER_THRESHOLD']),
+                          ('spike_z', app.config['UTILIZATION_SPIKE_Z'])):
+        try:
+            params[name] = float(args.get(name, default))
+        except ValueError:
+            raise ValueError(f'{name} must be a number.')
+        if params[name] <= 0:
+            raise ValueError(f'{name} must be greater than zero.')
+    return params
+
+def check_utilization_range(conn, params):
+    """
+    Raises ValueError if the weeks compute_utilization would cover span more than MAX_UTILIZATION_DAYS.
+    An open end of the range is resolved as compute_utilization does, to the first/last week with data
+    (today without any), so a one-sided range cannot ask for an unbounded matrix either.
+    """
+    first_week, last_week = conn.execute(
+        "SELECT MIN(bucket_start), MAX(bucket_start) FROM manhour_period_rollup WHERE granularity = 'week'").fetchone()
+    start = date.fromisoformat(params['start'] or first_week or date.today().isoformat())
+    end = date.fromisoformat(params['end'] or last_week or date.today().isoformat())
+    if (end - start).days > MAX_UTILIZATION_DAYS:
+        raise ValueError('The date range can span at most ten years.')
+
+def compute_utilization(conn, start=None, end=None, role=None, capacity=40.0, under_threshold=0.5, spike_z=2.0):
+    """
+    Computes weekly hours and utilization for every stakeholder (optionally one role) over the
+    Monday-based weeks from start to end, defaulting to the weeks that have data. A stakeholder is
+    'over' when their mean utilization exceeds 1, 'under' when it is below under_threshold. A spike
+    is a week more than spike_z standard deviations above the stakeholder's own mean.
+    """
+    stakeholder_query = 'SELECT id, name, role FROM stakeholders'
+    stakeholder_params = []
+    if role:
+        stakeholder_query += ' WHERE role = ?'
+        stakeholder_params.append(role)
+    stakeholders = conn.execute(stakeholder_query + ' ORDER BY id', stakeholder_params).fetchall()
+    stakeholder_ids = np.array([s['id'] for s in stakeholders], dtype=np.int64)
+
+    conditions = ["p.granularity = 'week'"]
+    params = []
+    if start:
+        conditions.append("p.bucket_start >= date(?, 'weekday 0', '-6 days')")
+        params.append(start)
+    if end:
+        conditions.append("p.bucket_start <= ?")
+        params.append(end)
+    # Week starts come back as days since 1970-01-01 so the whole result loads as one integer array;
+    # plain tuples instead of sqlite3.Row keep the conversion cheap
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    entries = np.array(cursor.execute(f'''
+        SELECT CAST(julianday(p.bucket_start) - 2440587.5 AS INTEGER), p.stakeholder_id, SUM(p.actual_man_hours)
+        FROM manhour_period_rollup p
+        JOIN requests r ON p.request_id = r.id
+        WHERE {' AND '.join(conditions)}
+        GROUP BY p.bucket_start, p.stakeholder_id
+    ''', params).fetchall(), dtype=np.int64).reshape(-1, 3)
+    entry_days, entry_stakeholders, entry_hours = entries.T
+
+    # Map stakeholder ids to matrix rows, dropping entries of stakeholders not selected
+    rows = np.searchsorted(stakeholder_ids, entry_stakeholders)
+    selected = rows < len(stakeholder_ids)
+    selected[selected] = stakeholder_ids[rows[selected]] == entry_stakeholders[selected]
+    entry_days, rows, entry_hours = entry_days[selected], rows[selected], entry_hours[selected]
+
+    def week_of(day):
+        return day - (day - 4) % 7 # Day 4 (1970-01-05) was a Monday
+
+    # Open ends of the range default to the first/last week with data
+    first_week = week_of(np.datetime64(start, 'D').astype(np.int64)) if start else entry_days.min(initial=np.iinfo(np.int64).max)
+    last_week = week_of(np.datetime64(end, 'D').astype(np.int64)) if end else entry_days.max(initial=np.iinfo(np.int64).min)
+    week_starts = np.arange(first_week, last_week + 1, 7) if first_week <= last_week else np.array([], dtype=np.int64)
+
+    columns = (entry_days - first_week) // 7
+    in_range = (columns >= 0) & (columns < len(week_starts))
+    cells = rows[in_range] * len(week_starts) + columns[in_range]
+    matrix = np.bincount(cells, weights=entry_hours[in_range],
+                         minlength=len(stakeholders) * len(week_starts)).reshape(len(stakeholders), len(week_starts))
+
+    utilization = matrix / capacity
+    if len(week_starts):
+        mean_utilization = utilization.mean(axis=1)
+        peak_utilization = utilization.max(axis=1)
+        mean_hours = matrix.mean(axis=1, keepdims=True)
+        std_hours = matrix.std(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(std_hours > 0, (matrix - mean_hours) / std_hours, 0.0)
+        spike_rows, spike_columns = np.nonzero(z_scores > spike_z)
+    else:
+        mean_utilization = peak_utilization = np.zeros(len(stakeholders))
+        spike_rows = spike_columns = np.array([], dtype=np.int64)
+
+    week_labels = week_starts.astype('datetime64[D]').astype(str).tolist()
+    summary = []
+    for index, s in enumerate(stakeholders):
+        status = 'over' if mean_utilization[index] > 1 else 'under' if mean_utilization[index] < under_threshold else 'ok'
+        summary.append({
+            'id': s['id'],
+            'name': s['name'],
+            'role': s['role'],
+            'total_hours': float(matrix[index].sum()),
+            'mean_utilization': round(float(mean_utilization[index]), 4),
+            'peak_utilization': round(float(peak_utilization[index]), 4),
+            'weeks_over_capacity': int((utilization[index] > 1).sum()),
+            'weeks_under_threshold': int((utilization[index] < under_threshold).sum()),
+            'status': status,
+        })
+
+    return {
+        'capacity_hours': capacity,
+        'under_threshold': under_threshold,
+        'spike_z': spike_z,
+        'weeks': week_labels,
+        'stakeholders': summary,
+        'hours': matrix.tolist(), # One row per stakeholder, one column per week
+        'spikes': [
+            {
+                'stakeholder_id': stakeholders[row]['id'],
+                'name': stakeholders[row]['name'],
+                'week': week_labels[column],
+                'hours': float(matrix[row, column]),
+                'utilization': round(float(utilization[row, column]), 4),
+            }
+            for row, column in zip(spike_rows.tolist(), spike_columns.tolist())
+        ],
+    }
+
+@app.route('/api/analytics/utilization', methods=['GET'])
+@reads_snapshot
+@cached_json_response
+def get_utilization():
+    """Returns weekly utilization per stakeholder with over/under-allocation flags and spikes."""
+    conn = get_read_db()
+    try:
+        params = parse_utilization_args(request.args)
+        check_utilization_range(conn, params)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    utilization = compute_utilization(conn, **params)
+    conn.close()
+    return jsonify(utilization)
+
+@app.route('/api/analytics/utilization/download', methods=['GET'])
+@reads_snapshot
+def download_utilization():
+    """Downloads the utilization summary, stakeholder x week hours and spikes as an Excel file."""
+    conn = get_read_db()
+    try:
+        params = parse_utilization_args(request.args)
+        check_utilization_range(conn, params)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    utilization = compute_utilization(conn, **params)
+    conn.close()
+
+    summary_df = pd.DataFrame(utilization['stakeholders']).rename(columns={
+        'id': 'Stakeholder ID', 'name': 'Stakeholder Name', 'role': 'Role', 'total_hours': 'Total Hours',
+        'mean_utilization': 'Mean Utilization', 'peak_utilization': 'Peak Utilization',
+        'weeks_over_capacity': 'Weeks Over Capacity', 'weeks_under_threshold': 'Weeks Under Threshold',
+        'status': 'Status',
+    })
+    hours_df = pd.DataFrame(utilization['hours'], columns=utilization['weeks'])
+    hours_df.insert(0, 'Stakeholder Name', [s['name'] for s in utilization['stakeholders']])
+    spikes_df = pd.DataFrame(utilization['spikes'], columns=['stakeholder_id', 'name', 'week', 'hours', 'utilization']).rename(columns={
+        'stakeholder_id': 'Stakeholder ID', 'name': 'Stakeholder Name', 'week': 'Week Starting',
+        'hours': 'Hours', 'utilization': 'Utilization',
+    })
+
+    output = BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    summary_df.to_excel(writer, index=False, sheet_name='Summary')
+    hours_df.to_excel(writer, index=False, sheet_name='Weekly Hours')
+    spikes_df.to_excel(writer, index=False, sheet_name='Spikes')
+    writer.close()
+    output.seek(0)
+
+    return send_file(output, download_name='utilization.xlsx', as_attachment=True, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,86 @@
+# benchmarks/dashboard_benchmark.py
+"""
+Times compute_manhours_comparison against the legacy dashboard query as the data grows.
+
+Every size is populated with random data, then stakeholders change roles and some requests and
+stakeholders are deleted so the rollup has been maintained by its triggers, not just built.
+Its correctness against a brute-force reference is covered by tests/test_dashboard.py.
+
+Usage: python benchmarks/dashboard_benchmark.py [--requests 2000] [--manhours 100000] [--scales 1,2,4,8]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from report_benchmark import ROLES, populate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The dashboard query before the rollup: one UNION ALL branch per role, each joining request_updates
+# to every timesheet entry of the request (inflating estimates) with the role test in the ON clause.
+LEGACY_COMPARISON_QUERY = '\nUNION ALL\n'.join(f'''
+    SELECT '{role}' AS role, SUM(COALESCE(ru.{column}, 0)) AS estimated, SUM(COALESCE(amh.actual_man_hours, 0)) AS actual
+    FROM requests r
+    LEFT JOIN request_updates ru ON r.id = ru.request_id
+    LEFT JOIN actual_man_hours amh ON r.id = amh.request_id
+    LEFT JOIN stakeholders s ON amh.stakeholder_id = s.id AND s.role = '{role}'
+    GROUP BY 1
+''' for role, column in [('BA', 'estimated_man_hours_ba'), ('Developer', 'estimated_man_hours_dev'),
+                         ('Tester', 'estimated_man_hours_tester')])
+
+
+def mutate(conn, seed=7):
+    """Changes roles and deletes some rows so the rollup is maintained by its triggers, not just built."""
+    rng = random.Random(seed)
+    conn.execute('PRAGMA foreign_keys = ON')
+    stakeholder_ids = [row[0] for row in conn.execute('SELECT id FROM stakeholders')]
+    request_ids = [row[0] for row in conn.execute('SELECT id FROM requests')]
+    for stakeholder_id in rng.sample(stakeholder_ids, len(stakeholder_ids) // 10):
+        conn.execute('UPDATE stakeholders SET role = ? WHERE id = ?', (rng.choice(ROLES), stakeholder_id))
+    conn.executemany('DELETE FROM stakeholders WHERE id = ?', [(i,) for i in rng.sample(stakeholder_ids, 3)])
+    conn.executemany('DELETE FROM requests WHERE id = ?', [(i,) for i in rng.sample(request_ids, len(request_ids) // 50)])
+    conn.executemany('UPDATE actual_man_hours SET actual_man_hours = actual_man_hours + 1 WHERE id = ?',
+                     [(i,) for i in rng.sample(range(1, 1000), 100)])
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--manhours', type=int, default=100000)
+    parser.add_argument('--scales', default='1,2,4,8')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='dashboard_bench_')
+    os.chdir(workdir) # app.py creates its database relative to the working directory
+    import app
+
+    print(f'{"requests":>9} {"man-hours":>10} {"aggregate":>10} {"ns/row":>7} {"legacy":>9}')
+    for scale in (int(s) for s in args.scales.split(',')):
+        app.DATABASE = os.path.join(workdir, f'scale_{scale}.db')
+        app.init_db()
+        conn = sqlite3.connect(app.DATABASE)
+        conn.row_factory = sqlite3.Row
+        populate(conn, args.requests * scale, args.manhours * scale)
+        mutate(conn)
+
+        started = time.perf_counter()
+        app.compute_manhours_comparison(conn)
+        elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        conn.execute(LEGACY_COMPARISON_QUERY).fetchall()
+        legacy_elapsed = time.perf_counter() - started
+
+        rows = conn.execute('SELECT (SELECT COUNT(*) FROM request_updates) + (SELECT COUNT(*) FROM request_manhour_rollup)').fetchone()[0]
+        print(f'{args.requests * scale:>9} {args.manhours * scale:>10} {elapsed * 1000:>8.1f}ms {elapsed * 1e9 / rows:>7.0f} '
+              f'{legacy_elapsed * 1000:>7.1f}ms')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+# benchmarks/endpoint_benchmark.py
+"""
+Drives every route of the app through Flask's test client at several data scales and reports each one's cost as JSON.
+
+Each scale runs in its own process. The process generates a fresh database with generate_data.py
+(the base sizes times the scale) and then calls every route.
+
+For every route the harness records:
+- latency: min, median and max over --repeat timed calls
+- the Python heap peak (tracemalloc) and the SQL statements executed, including trigger runs, both
+  measured on one extra untimed call (tracing would slow the timed ones down)
+
+Uploads are timed from submission until their job has finished. Write routes get fresh data on
+every call so each repeat does the same work. The JSON result is written to stdout or --output and
+a summary table to stderr. Exits with status 1 if a route fails or is not covered by CASES.
+
+Usage: python benchmarks/endpoint_benchmark.py [--scales 1,4,16] [--requests 2000] [--manhours 50000]
+       [--stakeholders 100] [--upload-rows 1000] [--repeat 5] [--cache] [--output results.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from io import BytesIO
+
+import pandas as pd
+
+from generate_data import ROLES, generate, write_upload_files
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+
+class Context:
+    """State shared by the cases of one scale: generated ids, upload files and a counter for unique values."""
+
+    def __init__(self, app, conn, upload_files, upload_rows):
+        self.app = app
+        self.upload_rows = upload_rows
+        self.request_ids = [row[0] for row in conn.execute('SELECT id FROM requests ORDER BY id')]
+        self.stakeholder_ids = [row[0] for row in conn.execute('SELECT id FROM stakeholders ORDER BY id')]
+        self.stakeholder_names = [row[0] for row in conn.execute('SELECT name FROM stakeholders ORDER BY id')]
+        self.busiest_request_id = conn.execute(
+            'SELECT request_id FROM actual_man_hours GROUP BY request_id ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0]
+        self.upload_files = {name: open(path, 'rb').read() for name, path in upload_files.items()}
+        self.requests_sheet = pd.read_excel(BytesIO(self.upload_files['requests']))
+        self.manhours_csv = pd.read_excel(BytesIO(self.upload_files['manhours'])).to_csv(index=False).encode()
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix} {self.counter}'
+
+    def requests_upload(self):
+        """The requests upload file with request numbers no earlier call has used."""
+        tag = self.unique('UP').replace(' ', '')
+        sheet = self.requests_sheet.assign(**{'Request No': [f'{tag}-{i:06d}' for i in range(len(self.requests_sheet))]})
+        output = BytesIO()
+        sheet.to_excel(output, index=False, engine='xlsxwriter')
+        return output.getvalue()
+
+
+def upload(client, url, data, filename):
+    """Posts an upload and polls its job until it is done; returns the final job status response."""
+    response = client.post(url, data={'file': (BytesIO(data), filename)})
+    if response.status_code != 202:
+        return response
+    status_url = response.get_json()['status_url']
+    while True:
+        response = client.get(status_url)
+        if response.get_json()['status'] in ('finished', 'failed'):
+            return response
+        time.sleep(0.005)
+
+
+def add_stakeholder(client, ctx):
+    name = ctx.unique('Bench Stakeholder')
+    return lambda: client.post('/api/stakeholders', json={'name': name, 'role': 'Developer'})
+
+
+def change_stakeholder_role(client, ctx):
+    """Moves all of one stakeholder's hours to another role."""
+    role = ROLES[ctx.counter % len(ROLES)]
+    ctx.counter += 1
+    return lambda: client.put(f'/api/stakeholders/{ctx.stakeholder_ids[0]}', json={'name': ctx.stakeholder_names[0], 'role': role})
+
+
+def add_request(client, ctx):
+    record = {'request_no': ctx.unique('BENCH'), 'requested_by': 'Bench', 'department': 'Finance', 'category': 'Report',
+              'request_date': '2025-12-01', 'request_title': 'Benchmark request'}
+    return lambda: client.post('/api/requests', json=record)
+
+
+def update_request(client, ctx):
+    title = ctx.unique('Retitled request')
+    return lambda: client.put(f'/api/requests/{ctx.busiest_request_id}', json={'request_title': title})
+
+
+def add_stakeholders_batch(client, ctx):
+    tag = ctx.unique('Batch')
+    records = [{'name': f'{tag}-{i}', 'role': 'Tester'} for i in range(ctx.upload_rows)]
+    return lambda: client.post('/api/stakeholders/batch', json=records)
+
+
+def add_requests_batch(client, ctx):
+    tag = ctx.unique('BATCH').replace(' ', '')
+    records = [{'request_no': f'{tag}-{i}', 'requested_by': 'Bench', 'department': 'Sales', 'category': 'Enhancement',
+                'request_date': '2025-11-15', 'request_title': f'Batch request {i}'} for i in range(ctx.upload_rows)]
+    return lambda: client.post('/api/requests/batch', json=records)
+
+
+def upsert_manhours_batch(client, ctx):
+    records = [{'request_id': ctx.request_ids[i % len(ctx.request_ids)],
+                'stakeholder_name': ctx.stakeholder_names[i % len(ctx.stakeholder_names)],
+                'actual_man_hours': 1 + i % 8, 'task_date': f'2025-12-{1 + i % 28:02d}'} for i in range(ctx.upload_rows)]
+    return lambda: client.post('/api/actual-manhours/batch', json=records)
+
+
+def get_job_status(client, ctx):
+    job_id = upload(client, '/api/actual-manhours/upload', ctx.upload_files['manhours'], 'manhours.xlsx').get_json()['id']
+    return lambda: client.get(f'/api/jobs/{job_id}')
+
+
+def delete_request(client, ctx):
+    request_id = ctx.request_ids.pop()
+    return lambda: client.delete(f'/api/requests/{request_id}')
+
+
+def delete_stakeholder(client, ctx):
+    stakeholder_id = ctx.stakeholder_ids.pop()
+    return lambda: client.delete(f'/api/stakeholders/{stakeholder_id}')
+
+
+# Each case is (name, method, rule, prepare). prepare(client, ctx) does any untimed setup and returns
+# the call to time, which must return the response (for uploads, the finished job's status).
+CASES = [
+    ('index page', 'GET', '/', lambda client, ctx: lambda: client.get('/')),
+    ('stakeholders page', 'GET', '/stakeholders', lambda client, ctx: lambda: client.get('/stakeholders')),
+    ('requests page', 'GET', '/requests', lambda client, ctx: lambda: client.get('/requests')),
+    ('update request page', 'GET', '/update-request', lambda client, ctx: lambda: client.get('/update-request')),
+    ('update man-hours page', 'GET', '/update-manhours', lambda client, ctx: lambda: client.get('/update-manhours')),
+    ('report page', 'GET', '/report', lambda client, ctx: lambda: client.get('/report')),
+    ('dashboard page', 'GET', '/dashboard', lambda client, ctx: lambda: client.get('/dashboard')),
+
+    ('list stakeholders', 'GET', '/api/stakeholders', lambda client, ctx: lambda: client.get('/api/stakeholders')),
+    ('list requests', 'GET', '/api/requests', lambda client, ctx: lambda: client.get('/api/requests')),
+    ('list requests, page', 'GET', '/api/requests',
+     lambda client, ctx: lambda: client.get('/api/requests', query_string={'limit': 50, 'sort': 'request_no'})),
+    ('search requests', 'GET', '/api/requests/search',
+     lambda client, ctx: lambda: client.get('/api/requests/search', query_string={'q': 'invoice workflow'})),
+    ('request details', 'GET', '/api/request-details/<int:request_id>',
+     lambda client, ctx: lambda: client.get(f'/api/request-details/{ctx.busiest_request_id}')),
+    ('list man-hours', 'GET', '/api/actual-manhours', lambda client, ctx: lambda: client.get('/api/actual-manhours')),
+    ('list man-hours, columns', 'GET', '/api/actual-manhours',
+     lambda client, ctx: lambda: client.get('/api/actual-manhours', query_string={'format': 'columns'})),
+    ('list man-hours, page', 'GET', '/api/actual-manhours',
+     lambda client, ctx: lambda: client.get('/api/actual-manhours', query_string={'limit': 50})),
+    ('report', 'GET', '/api/report', lambda client, ctx: lambda: client.get('/api/report')),
+    ('report, filtered', 'GET', '/api/report',
+     lambda client, ctx: lambda: client.get('/api/report', query_string={'department': 'Fin', 'current_status': ['In Progress', 'On Hold']})),
+    ('report, columns + gzip', 'GET', '/api/report',
+     lambda client, ctx: lambda: client.get('/api/report', query_string={'format': 'columns'}, headers={'Accept-Encoding': 'gzip'})),
+    ('man-hours breakup', 'GET', '/api/report/manhours-breakup/<int:request_id>',
+     lambda client, ctx: lambda: client.get(f'/api/report/manhours-breakup/{ctx.busiest_request_id}')),
+    ('dashboard data', 'GET', '/api/dashboard/data', lambda client, ctx: lambda: client.get('/api/dashboard/data')),
+    # Analytics and downloads read the snapshot taken here
+    ('refresh snapshot', 'POST', '/api/snapshot', lambda client, ctx: lambda: client.post('/api/snapshot', query_string={'force': 'true'})),
+    ('snapshot', 'GET', '/api/snapshot', lambda client, ctx: lambda: client.get('/api/snapshot')),
+    ('man-hours trend', 'GET', '/api/analytics/manhours-trend',
+     lambda client, ctx: lambda: client.get('/api/analytics/manhours-trend', query_string={'granularity': 'week', 'group_by': 'stakeholder'})),
+    ('utilization', 'GET', '/api/analytics/utilization', lambda client, ctx: lambda: client.get('/api/analytics/utilization')),
+    ('metrics', 'GET', '/metrics', lambda client, ctx: lambda: client.get('/metrics')),
+
+    ('download requests', 'GET', '/api/requests/download', lambda client, ctx: lambda: client.get('/api/requests/download')),
+    ('download request updates', 'GET', '/api/update-request/download', lambda client, ctx: lambda: client.get('/api/update-request/download')),
+    ('download man-hours', 'GET', '/api/actual-manhours/download', lambda client, ctx: lambda: client.get('/api/actual-manhours/download')),
+    ('download report', 'GET', '/api/report/download', lambda client, ctx: lambda: client.get('/api/report/download')),
+    ('download report, live', 'GET', '/api/report/download',
+     lambda client, ctx: lambda: client.get('/api/report/download', query_string={'consistency': 'live'})),
+    ('download utilization', 'GET', '/api/analytics/utilization/download',
+     lambda client, ctx: lambda: client.get('/api/analytics/utilization/download')),
+    ('requests template', 'GET', '/api/requests/template', lambda client, ctx: lambda: client.get('/api/requests/template')),
+    ('request updates template', 'GET', '/api/update-request/template', lambda client, ctx: lambda: client.get('/api/update-request/template')),
+    ('man-hours template', 'GET', '/api/actual-manhours/template', lambda client, ctx: lambda: client.get('/api/actual-manhours/template')),
+
+    ('add stakeholder', 'POST', '/api/stakeholders', add_stakeholder),
+    ('change stakeholder role', 'PUT', '/api/stakeholders/<int:stakeholder_id>', change_stakeholder_role),
+    ('add request', 'POST', '/api/requests', add_request),
+    ('update request', 'PUT', '/api/requests/<int:request_id>', update_request),
+    ('update request details', 'PUT', '/api/update-request/<int:request_id>',
+     lambda client, ctx: lambda: client.put(f'/api/update-request/{ctx.busiest_request_id}', json={'current_status': 'On Hold', 'estimated_man_hours_dev': 200})),
+    ('add stakeholders batch', 'POST', '/api/stakeholders/batch', add_stakeholders_batch),
+    ('add requests batch', 'POST', '/api/requests/batch', add_requests_batch),
+    ('upsert man-hours batch', 'POST', '/api/actual-manhours/batch', upsert_manhours_batch),
+    ('upload requests', 'POST', '/api/requests/upload',
+     lambda client, ctx: (lambda data: lambda: upload(client, '/api/requests/upload', data, 'requests.xlsx'))(ctx.requests_upload())),
+    ('upload request updates', 'POST', '/api/update-request/bulk-upload',
+     lambda client, ctx: lambda: upload(client, '/api/update-request/bulk-upload', ctx.upload_files['request_updates'], 'request_updates.xlsx')),
+    ('upload man-hours', 'POST', '/api/actual-manhours/upload',
+     lambda client, ctx: lambda: upload(client, '/api/actual-manhours/upload?force=true', ctx.upload_files['manhours'], 'manhours.xlsx')),
+    ('upload man-hours, same file again', 'POST', '/api/actual-manhours/upload',
+     lambda client, ctx: lambda: upload(client, '/api/actual-manhours/upload', ctx.upload_files['manhours'], 'manhours.xlsx')),
+    ('upload man-hours CSV', 'POST', '/api/actual-manhours/upload',
+     lambda client, ctx: lambda: upload(client, '/api/actual-manhours/upload?force=true', ctx.manhours_csv, 'manhours.csv')),
+    ('upload job status', 'GET', '/api/jobs/<job_id>', get_job_status),
+
+    # Deletes go last: each removes a request or stakeholder with all of its man-hours
+    ('delete request', 'DELETE', '/api/requests/<int:request_id>', delete_request),
+    ('delete stakeholder', 'DELETE', '/api/stakeholders/<int:stakeholder_id>', delete_stakeholder),
+]
+
+
+class StatementCounter:
+    """
+    sqlite3 trace callback counting statements while enabled. SQLite also traces every trigger program
+    it runs (under the text of the statement that fired it), so per-row trigger work shows up in the
+    count. Queries that virtual tables such as FTS5 run internally come prefixed with "-- " and are
+    counted separately.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counts = Counter()
+
+    def __call__(self, statement):
+        if self.enabled:
+            self.counts['internal' if statement.startswith('-- ') else 'statements'] += 1
+
+
+def run_case(client, ctx, counter, prepare, repeat):
+    """Runs one case once traced (heap peak, statement counts) and `repeat` times timed."""
+    call = prepare(client, ctx)
+    counter.counts.clear()
+    counter.enabled = True
+    tracemalloc.start()
+    response = call()
+    body = response.get_data() # Streams the body of downloads, inside the measured call
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    counter.enabled = False
+    result = {
+        'status': response.status_code,
+        'response_bytes': len(body),
+        'peak_python_kb': round(peak / 1024),
+        'sql_statements': counter.counts['statements'],
+        'internal_sql_statements': counter.counts['internal'],
+        'error': None,
+    }
+    payload = response.get_json(silent=True)
+    payload = payload if isinstance(payload, dict) else {}
+    if response.status_code >= 400:
+        result['error'] = payload.get('error', f'HTTP {response.status_code}')
+    elif payload.get('status') == 'failed': # An upload job that failed
+        result['error'] = payload['error']
+
+    timings = []
+    for _ in range(repeat):
+        call = prepare(client, ctx)
+        started = time.perf_counter()
+        call().get_data()
+        timings.append(time.perf_counter() - started)
+    result.update(min_ms=round(min(timings) * 1000, 2), median_ms=round(statistics.median(timings) * 1000, 2),
+                  max_ms=round(max(timings) * 1000, 2))
+    return result
+
+
+def run_scale(workdir, scale, args, results):
+    """Generates the database for one scale in a fresh process and measures every case against it."""
+    os.chdir(workdir) # app.py creates its database relative to the working directory
+    import app
+
+    counts = {'stakeholders': args.stakeholders * scale, 'requests': args.requests * scale, 'manhours': args.manhours * scale}
+    conn = sqlite3.connect(app.DATABASE)
+    started = time.perf_counter()
+    generate(conn, counts['stakeholders'], counts['requests'], counts['manhours'], args.seed)
+    generate_seconds = time.perf_counter() - started
+    ctx = Context(app, conn, write_upload_files(conn, workdir, args.upload_rows, args.seed), args.upload_rows)
+    conn.close()
+
+    if not args.cache:
+        app.app.config['RESPONSE_CACHE_MAX_BYTES'] = 0 # Measure building responses, not serving them from the cache
+    counter = StatementCounter()
+
+    def traced(connect):
+        def traced_connect(pool):
+            conn = connect(pool)
+            conn.set_trace_callback(counter)
+            return conn
+        return traced_connect
+    app.ConnectionPool._connect = traced(app.ConnectionPool._connect) # Also covers the write queue's connection
+    app.SnapshotPool._connect = traced(app.SnapshotPool._connect)
+
+    client = app.app.test_client()
+    endpoints = []
+    for name, method, rule, prepare in CASES:
+        endpoints.append({'name': name, 'method': method, 'rule': rule, **run_case(client, ctx, counter, prepare, args.repeat)})
+        print(f'  scale {scale}: {name} {endpoints[-1]["median_ms"]:.1f}ms', file=sys.stderr)
+
+    covered = {(method, rule) for _, method, rule, _ in CASES}
+    uncovered = sorted(f'{method} {rule.rule}' for rule in app.app.url_map.iter_rules() if rule.endpoint != 'static'
+                       for method in rule.methods - {'HEAD', 'OPTIONS'} if (method, rule.rule) not in covered)
+    results.put({
+        'scale': scale,
+        **counts,
+        'generate_seconds': round(generate_seconds, 2),
+        'database_bytes': os.path.getsize(app.DATABASE),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'endpoints': endpoints,
+        'uncovered_routes': uncovered,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1,4,16')
+    parser.add_argument('--stakeholders', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--manhours', type=int, default=50000)
+    parser.add_argument('--upload-rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled')
+    parser.add_argument('--output', help='Write the JSON result to this file instead of stdout')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='endpoint_bench_')
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'settings': vars(args),
+        'scales': [],
+    }
+    for scale in (int(s) for s in args.scales.split(',')):
+        scale_dir = os.path.join(workdir, f'scale_{scale}')
+        os.makedirs(scale_dir)
+        results = context.Queue()
+        process = context.Process(target=run_scale, args=(scale_dir, scale, args, results))
+        process.start()
+        while True:
+            try:
+                report['scales'].append(results.get(timeout=1))
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    sys.exit(f'The benchmark process for scale {scale} died with exit code {process.exitcode}.')
+        process.join()
+
+    print(f'{"route":<28}' + ''.join(f'{"x" + str(s["scale"]) + " median":>14} {"heap KB":>9} {"SQL":>6}' for s in report['scales']),
+          file=sys.stderr)
+    for i, (name, _, _, _) in enumerate(CASES):
+        print(f'{name:<28}' + ''.join(f'{s["endpoints"][i]["median_ms"]:>12.1f}ms {s["endpoints"][i]["peak_python_kb"]:>9} '
+                                      f'{s["endpoints"][i]["sql_statements"]:>6}' for s in report['scales']), file=sys.stderr)
+    failures = [f'x{s["scale"]} {e["name"]}: {e["error"]}' for s in report['scales'] for e in s['endpoints'] if e['error']]
+    uncovered = sorted({route for s in report['scales'] for route in s['uncovered_routes']})
+    for failure in failures:
+        print(f'FAILED {failure}', file=sys.stderr)
+    for route in uncovered:
+        print(f'NOT COVERED {route} (add a case to CASES)', file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    sys.exit(1 if failures or uncovered else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# benchmarks/generate_data.py
+"""
+Generates a reproducible synthetic database, plus Excel upload files that match it.
+
+The data has realistic shapes rather than uniform noise:
+- departments and categories are skewed
+- requests arrive faster over time
+- each request's status decides how far its milestone dates got
+- estimates are log-normal
+- man-hours go mostly to large, started requests and busy stakeholders, on weekdays after the request date
+
+Everything is derived from --seed, so the same arguments always give the same rows.
+
+Usage: python benchmarks/generate_data.py [--stakeholders 200] [--requests 10000] [--manhours 1000000]
+       [--upload-rows 5000] [--seed 42] [--out DIR]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+END_DATE = date(2025, 12, 31) # Fixed rather than today so runs stay comparable
+YEARS = 4
+
+ROLES = ['BA', 'Developer', 'Tester']
+ROLE_WEIGHTS = [0.2, 0.55, 0.25]
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Meera',
+               'Karan', 'Divya', 'Aditya', 'Pooja', 'Siddharth', 'Neha', 'Manish', 'Isha', 'Nikhil', 'Riya']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Menon', 'Rao', 'Joshi', 'Kulkarni',
+              'Das', 'Bose', 'Mehta', 'Pillai', 'Chopra', 'Verma', 'Singh', 'Kapoor', 'Desai', 'Shah']
+DEPARTMENTS = ['Finance', 'Operations', 'Sales', 'Human Resources', 'Procurement', 'Customer Service',
+               'Marketing', 'Legal', 'Logistics', 'Compliance', 'Treasury', 'Facilities']
+CATEGORIES = ['Enhancement', 'New Development', 'Bug Fix', 'Report', 'Integration', 'Data Correction', 'Infrastructure']
+CATEGORY_WEIGHTS = [0.3, 0.15, 0.2, 0.15, 0.08, 0.08, 0.04]
+TITLE_ACTIONS = ['Add', 'Automate', 'Fix', 'Migrate', 'Improve', 'Build', 'Extend', 'Validate', 'Integrate', 'Retire']
+TITLE_SUBJECTS = ['invoice approval workflow', 'vendor master screen', 'monthly sales report', 'leave balance export',
+                  'payment reconciliation', 'customer onboarding form', 'inventory ageing dashboard', 'GST return file',
+                  'purchase order interface', 'audit trail', 'employee self service portal', 'collections MIS',
+                  'contract renewal alerts', 'ledger upload', 'SLA tracker']
+
+# Statuses, how likely each is for a request of a given age (new, mid, old), and how many of the
+# eight milestones (SRS sent ... UAT confirmation) a request in that status has reached
+STATUSES = ['Open', 'In Progress', 'On Hold', 'Completed', 'Cancelled']
+STATUS_WEIGHTS_BY_AGE = [
+    [0.55, 0.35, 0.05, 0.03, 0.02],
+    [0.1, 0.45, 0.1, 0.3, 0.05],
+    [0.02, 0.1, 0.08, 0.72, 0.08],
+]
+MILESTONES = ['srs_sent_date', 'srs_approval_date', 'estimation_received_date', 'indent_sent_date',
+              'signed_indent_received_date', 'development_start_date', 'uat_mail_date', 'uat_confirmation_date']
+MILESTONE_MEAN_DAYS = [4, 7, 6, 3, 8, 5, 30, 6] # Mean gap to the previous milestone (or the request date)
+STATUS_MILESTONES = {'Open': (0, 2), 'In Progress': (3, 7), 'On Hold': (1, 6), 'Completed': (8, 8), 'Cancelled': (0, 4)}
+# log-normal (mu, sigma) of the estimated hours per role, roughly 25h BA, 120h Dev, 45h Tester
+ESTIMATE_LOGNORMAL = {'estimated_man_hours_ba': (3.0, 0.6), 'estimated_man_hours_dev': (4.6, 0.8),
+                      'estimated_man_hours_tester': (3.6, 0.7)}
+HOURS = [1, 2, 3, 4, 5, 6, 7, 8]
+HOURS_WEIGHTS = [0.04, 0.08, 0.06, 0.2, 0.05, 0.1, 0.07, 0.4]
+
+
+def iso_dates(days):
+    """Turns day offsets from END_DATE (negative = earlier) into YYYY-MM-DD strings."""
+    return (np.datetime64(END_DATE) + days.astype('timedelta64[D]')).astype(str)
+
+
+def generate(conn, n_stakeholders=200, n_requests=10000, n_manhours=1000000, seed=42):
+    """Fills an empty, migrated database with synthetic data and returns the row counts per table."""
+    rng = np.random.default_rng(seed)
+    span = YEARS * 365
+
+    # Stakeholders: unique names, a role mix weighted towards developers
+    names = [f'{first} {last}' for last in LAST_NAMES for first in FIRST_NAMES]
+    names = [names[i % len(names)] + (f' {i // len(names) + 1}' if i >= len(names) else '')
+             for i in rng.permutation(max(n_stakeholders, len(names)))[:n_stakeholders]]
+    roles = rng.choice(ROLES, size=n_stakeholders, p=ROLE_WEIGHTS)
+    conn.executemany('INSERT INTO stakeholders (id, name, role) VALUES (?, ?, ?)',
+                     zip(range(1, n_stakeholders + 1), names, roles.tolist()))
+
+    # Requests: arrivals grow over time (density rising linearly), departments follow a Zipf-like skew
+    request_days = np.sort(-span + (np.sqrt(rng.random(n_requests)) * span).astype(int))
+    department_weights = 1 / np.arange(1, len(DEPARTMENTS) + 1)
+    departments = rng.choice(DEPARTMENTS, size=n_requests, p=department_weights / department_weights.sum())
+    categories = rng.choice(CATEGORIES, size=n_requests, p=CATEGORY_WEIGHTS)
+    requesters = [f'{FIRST_NAMES[a]} {LAST_NAMES[b]}' for a, b in rng.integers(0, len(FIRST_NAMES), size=(n_requests, 2))]
+    titles = [f'{TITLE_ACTIONS[a]} {TITLE_SUBJECTS[b]}' for a, b in zip(rng.integers(0, len(TITLE_ACTIONS), n_requests),
+                                                                        rng.integers(0, len(TITLE_SUBJECTS), n_requests))]
+    described = rng.random(n_requests) < 0.6
+    request_dates = iso_dates(request_days)
+    conn.executemany('''
+        INSERT INTO requests (id, request_no, requested_by, department, category, request_date, request_title, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', ((i + 1, f'REQ-{i + 1:06d}', requesters[i], departments[i], categories[i], request_dates[i], titles[i],
+           f'{titles[i]} for the {departments[i]} team.' if described[i] else None) for i in range(n_requests)))
+
+    # Request updates: status by age, then milestones reached in order with exponential gaps
+    age = np.digitize(-request_days, [90, 365])
+    statuses = np.empty(n_requests, dtype=object)
+    for bucket, weights in enumerate(STATUS_WEIGHTS_BY_AGE):
+        in_bucket = age == bucket
+        statuses[in_bucket] = rng.choice(STATUSES, size=in_bucket.sum(), p=weights)
+    low = np.array([STATUS_MILESTONES[s][0] for s in statuses])
+    high = np.array([STATUS_MILESTONES[s][1] for s in statuses])
+    reached = rng.integers(low, high + 1)
+    milestone_days = request_days[:, None] + np.cumsum(
+        np.ceil(rng.exponential(MILESTONE_MEAN_DAYS, size=(n_requests, len(MILESTONES)))).astype(int), axis=1)
+    reached = np.minimum(reached, (milestone_days <= 0).sum(axis=1)) # Nothing happens after END_DATE
+    update_columns = {}
+    for m, column in enumerate(MILESTONES):
+        update_columns[column] = np.where(reached > m, iso_dates(milestone_days[:, m]), None)
+    estimated = reached > MILESTONES.index('estimation_received_date')
+    for column, (mu, sigma) in ESTIMATE_LOGNORMAL.items():
+        hours = np.maximum(1, np.round(rng.lognormal(mu, sigma, n_requests))).astype(int)
+        update_columns[column] = np.where(estimated, hours, None)
+    update_columns['current_status'] = statuses
+    conn.executemany(f'''
+        INSERT INTO request_updates (request_id, {', '.join(update_columns)})
+        VALUES (?{', ?' * len(update_columns)})
+    ''', zip(range(1, n_requests + 1), *(values.tolist() for values in update_columns.values())))
+
+    # Actual man-hours: requests weighted by their estimate once development started (a trickle
+    # before that), stakeholders by a log-normal activity level, dates on weekdays after the request
+    started = reached > MILESTONES.index('signed_indent_received_date')
+    total_estimate = sum(np.where(estimated, update_columns[column], 0).astype(float) for column in ESTIMATE_LOGNORMAL)
+    request_weights = np.where(started, total_estimate + 10, 1.0)
+    request_weights /= request_weights.sum()
+    stakeholder_weights = rng.lognormal(0, 0.7, n_stakeholders)
+    stakeholder_weights /= stakeholder_weights.sum()
+    work_start = np.where(started, milestone_days[:, MILESTONES.index('development_start_date')], request_days)
+    keys = set()
+    rows = []
+    for _ in range(50): # Each round tops up the entries lost to duplicate keys
+        missing = n_manhours - len(rows)
+        if missing <= 0:
+            break
+        requests = rng.choice(n_requests, size=missing, p=request_weights)
+        stakeholders = rng.choice(n_stakeholders, size=missing, p=stakeholder_weights)
+        days = work_start[requests] + rng.geometric(1 / 45, size=missing)
+        weekday = (np.datetime64(END_DATE) + days.astype('timedelta64[D]') - np.datetime64('1970-01-05')).astype(int) % 7
+        days -= np.where(weekday >= 5, weekday - 5 + rng.integers(1, 6, size=missing), 0) # Weekend entries move to the week before
+        hours = rng.choice(HOURS, size=missing, p=HOURS_WEIGHTS)
+        days = np.maximum(days, request_days[requests]) # Never before the request itself
+        past = days <= 0 # Entries after END_DATE are dropped and topped up in the next round
+        requests, stakeholders, days, hours = requests[past], stakeholders[past], days[past], hours[past]
+        for request_id, stakeholder_id, hours_worked, task_date in zip(
+                (requests + 1).tolist(), (stakeholders + 1).tolist(), hours.tolist(), iso_dates(days).tolist()):
+            key = (request_id, stakeholder_id, task_date)
+            if key not in keys:
+                keys.add(key)
+                rows.append((request_id, stakeholder_id, hours_worked, task_date))
+    rows.sort() # Inserting in key order keeps the unique index and rollup updates local
+    conn.executemany('INSERT INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date) VALUES (?, ?, ?, ?)',
+                     rows[:n_manhours])
+    conn.commit()
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('stakeholders', 'requests', 'request_updates', 'actual_man_hours')}
+
+
+def write_excel(path, columns):
+    pd.DataFrame(columns).to_excel(path, index=False, engine='xlsxwriter')
+    return path
+
+
+def write_upload_files(conn, directory, n_rows=5000, seed=42):
+    """
+    Writes one upload file per Excel upload endpoint, shaped like its template: new requests, updates
+    of existing requests, and man-hours that partly overwrite existing entries. Returns {name: path}.
+    """
+    rng = np.random.default_rng(seed + 1)
+    requests = conn.execute('SELECT id, request_no, request_date FROM requests').fetchall()
+    stakeholder_names = [row[0] for row in conn.execute('SELECT name FROM stakeholders ORDER BY id')]
+    entries = conn.execute('''
+        SELECT r.request_no, s.name, a.task_date FROM actual_man_hours a
+        JOIN requests r ON r.id = a.request_id JOIN stakeholders s ON s.id = a.stakeholder_id
+        ORDER BY a.id DESC LIMIT ?
+    ''', (n_rows // 4,)).fetchall()
+    next_id = max((row[0] for row in requests), default=0) + 1
+    paths = {}
+
+    paths['requests'] = write_excel(os.path.join(directory, 'requests_upload.xlsx'), {
+        'Request No': [f'REQ-{next_id + i:06d}' for i in range(n_rows)],
+        'Requested By': [f'{FIRST_NAMES[i]} {LAST_NAMES[j]}' for i, j in rng.integers(0, len(FIRST_NAMES), size=(n_rows, 2))],
+        'Department': rng.choice(DEPARTMENTS, size=n_rows),
+        'Category': rng.choice(CATEGORIES, size=n_rows, p=CATEGORY_WEIGHTS),
+        'Request Date': pd.to_datetime(iso_dates(-rng.integers(0, 30, n_rows))),
+        'Request Title': [f'{TITLE_ACTIONS[i]} {TITLE_SUBJECTS[j]}' for i, j in zip(
+            rng.integers(0, len(TITLE_ACTIONS), n_rows), rng.integers(0, len(TITLE_SUBJECTS), n_rows))],
+        'Description': [None] * n_rows,
+    })
+
+    picked = [requests[i] for i in rng.integers(0, len(requests), n_rows)] if requests else []
+    paths['request_updates'] = write_excel(os.path.join(directory, 'request_updates_upload.xlsx'), {
+        'Request No': [row[1] for row in picked],
+        'Estimated Man-hours BA': np.maximum(1, np.round(rng.lognormal(3.0, 0.6, len(picked)))).astype(int),
+        'Estimated Man-hours Developers': np.maximum(1, np.round(rng.lognormal(4.6, 0.8, len(picked)))).astype(int),
+        'Estimated Man-hours Tester': np.maximum(1, np.round(rng.lognormal(3.6, 0.7, len(picked)))).astype(int),
+        'Development Start Date': pd.to_datetime([row[2] for row in picked]) + pd.to_timedelta(rng.integers(20, 60, len(picked)), unit='D'),
+        'Current Status': rng.choice(['In Progress', 'On Hold', 'Completed'], size=len(picked)),
+    })
+
+    fresh = n_rows - len(entries)
+    picked = [requests[i] for i in rng.integers(0, len(requests), fresh)] if requests else []
+    paths['manhours'] = write_excel(os.path.join(directory, 'manhours_upload.xlsx'), {
+        'Request No': [row[0] for row in entries] + [row[1] for row in picked],
+        'Stakeholder Name': [row[1] for row in entries] + [stakeholder_names[i] for i in rng.integers(0, len(stakeholder_names), len(picked))],
+        'Actual Man-Hours': rng.choice(HOURS, size=len(entries) + len(picked), p=HOURS_WEIGHTS),
+        'Task Date': pd.to_datetime([row[2] for row in entries] + iso_dates(-rng.integers(0, 14, len(picked))).tolist()),
+    })
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stakeholders', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--manhours', type=int, default=1000000)
+    parser.add_argument('--upload-rows', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='.', help='Directory for manpower_management.db and the upload files')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    os.chdir(args.out) # app.py creates its database relative to the working directory
+    if os.path.exists('manpower_management.db'):
+        sys.exit(f'{os.path.abspath("manpower_management.db")} already exists; pick an empty --out directory.')
+    import app
+
+    conn = sqlite3.connect(app.DATABASE)
+    started = time.perf_counter()
+    counts = generate(conn, args.stakeholders, args.requests, args.manhours, args.seed)
+    print(f'Generated {counts} in {time.perf_counter() - started:.1f}s')
+    for name, path in write_upload_files(conn, '.', args.upload_rows, args.seed).items():
+        print(f'Wrote {name} upload file {os.path.abspath(path)}')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
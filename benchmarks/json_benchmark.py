@@ -0,0 +1,88 @@
+# benchmarks/json_benchmark.py
+"""
+Times /api/report with the standard json module, with orjson, and in the columnar format, each with and without gzip.
+
+The response cache is disabled so every request builds and encodes the report. The columnar and
+compressed responses are checked against the plain one; exits with status 1 if any disagrees.
+
+Usage: python benchmarks/json_benchmark.py [--requests 10000] [--manhours 200000] [--repeat 5]
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from report_benchmark import populate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_of(repeat, fetch):
+    """Runs fetch `repeat` times and returns the fastest time along with the last response."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = fetch()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--manhours', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='json_bench_')
+    os.chdir(workdir) # app.py creates its database relative to the working directory
+    import app
+
+    conn = sqlite3.connect(app.DATABASE)
+    print(f'Populating {args.requests} requests / {args.manhours} man-hour rows in {workdir} ...')
+    populate(conn, args.requests, args.manhours)
+    conn.close()
+
+    app.app.config['RESPONSE_CACHE_MAX_BYTES'] = 0 # Measure building the response, not serving it from the cache
+    client = app.app.test_client()
+    fast_json = app.orjson
+
+    variants = [
+        ('json rows', None, '', {}),
+        ('orjson rows', fast_json, '', {}),
+        ('orjson columns', fast_json, '?format=columns', {}),
+        ('json rows + gzip', None, '', {'Accept-Encoding': 'gzip'}),
+        ('orjson columns + gzip', fast_json, '?format=columns', {'Accept-Encoding': 'gzip'}),
+    ]
+    expected = None
+    failures = 0
+    print(f'{"variant":<24} {"time":>9} {"bytes":>10}  check')
+    for name, encoder, query, headers in variants:
+        if encoder is None and name.startswith('orjson'):
+            print(f'{name:<24} skipped (orjson is not installed)')
+            continue
+        app.orjson = encoder
+        elapsed, response = best_of(args.repeat, lambda: client.get('/api/report' + query, headers=headers))
+        body = response.data
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        data = json.loads(body)
+        if 'columns' in query:
+            data = [dict(zip(data['columns'], row)) for row in data['rows']]
+        if expected is None:
+            expected = data
+        ok = data == expected
+        failures += not ok
+        print(f'{name:<24} {elapsed * 1000:>7.1f}ms {len(response.data):>10}  {"ok" if ok else "MISMATCH"}')
+    app.orjson = fast_json
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
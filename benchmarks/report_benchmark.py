@@ -0,0 +1,119 @@
+# benchmarks/report_benchmark.py
+"""
+Compares the consolidated report query against the old per-row correlated subqueries.
+
+Usage: python benchmarks/report_benchmark.py [--requests 10000] [--manhours 1000000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import zip_longest
+
+from werkzeug.datastructures import MultiDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROLES = ['BA', 'Developer', 'Tester']
+
+# The report query as it was before build_report_query: one correlated SUM per role and output column.
+_ROLE_SUM = "COALESCE((SELECT SUM(amh.actual_man_hours) FROM actual_man_hours amh JOIN stakeholders s ON amh.stakeholder_id = s.id WHERE amh.request_id = r.id AND s.role = '{role}'), 0)"
+LEGACY_REPORT_QUERY = f'''
+    SELECT
+        r.id AS request_internal_id, r.request_no, ru.current_status, r.requested_by, r.department,
+        r.category, r.request_date, r.request_title, ru.srs_sent_date, ru.srs_approval_date,
+        ru.estimation_received_date, ru.indent_sent_date, ru.signed_indent_received_date,
+        COALESCE(ru.estimated_man_hours_ba, 0) AS estimated_man_hours_ba,
+        COALESCE(ru.estimated_man_hours_dev, 0) AS estimated_man_hours_developers,
+        COALESCE(ru.estimated_man_hours_tester, 0) AS estimated_man_hours_tester,
+        {_ROLE_SUM.format(role='BA')} AS actual_man_hours_ba,
+        {_ROLE_SUM.format(role='Developer')} AS actual_man_hours_developers,
+        {_ROLE_SUM.format(role='Tester')} AS actual_man_hours_tester,
+        (COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) AS total_estimated,
+        ({_ROLE_SUM.format(role='BA')} + {_ROLE_SUM.format(role='Developer')} + {_ROLE_SUM.format(role='Tester')}) AS total_actual,
+        ((COALESCE(ru.estimated_man_hours_ba, 0) + COALESCE(ru.estimated_man_hours_dev, 0) + COALESCE(ru.estimated_man_hours_tester, 0)) -
+         ({_ROLE_SUM.format(role='BA')} + {_ROLE_SUM.format(role='Developer')} + {_ROLE_SUM.format(role='Tester')})) AS difference_man_hours,
+        ru.development_start_date, ru.uat_mail_date, ru.uat_confirmation_date,
+        CASE
+            WHEN ru.uat_mail_date IS NOT NULL AND ru.development_start_date IS NOT NULL THEN
+                JULIANDAY(ru.uat_mail_date) - JULIANDAY(ru.development_start_date)
+            ELSE NULL
+        END AS tat_days
+    FROM requests r
+    LEFT JOIN request_updates ru ON r.id = ru.request_id
+    GROUP BY r.id ORDER BY r.request_date DESC
+'''
+
+
+def populate(conn, n_requests, n_manhours, n_stakeholders=200, seed=42):
+    """Fills an empty database with reproducible random data."""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    conn.executemany('INSERT INTO stakeholders (id, name, role) VALUES (?, ?, ?)',
+                     [(i, f'Stakeholder {i}', rng.choice(ROLES)) for i in range(1, n_stakeholders + 1)])
+    conn.executemany('''
+        INSERT INTO requests (id, request_no, requested_by, department, category, request_date, request_title)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(i, f'REQ-{i:06d}', 'Bench', f'Dept {i % 20}', f'Category {i % 8}',
+           (start + timedelta(days=rng.randrange(1500))).isoformat(), f'Request {i}')
+          for i in range(1, n_requests + 1)])
+    conn.executemany('''
+        INSERT INTO request_updates (request_id, estimated_man_hours_ba, estimated_man_hours_dev,
+                                     estimated_man_hours_tester, current_status)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(i, rng.randrange(100), rng.randrange(400), rng.randrange(150), 'In Progress')
+          for i in range(1, n_requests + 1)])
+    conn.executemany('''
+        INSERT OR IGNORE INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date)
+        VALUES (?, ?, ?, ?)
+    ''', ((rng.randrange(1, n_requests + 1), rng.randrange(1, n_stakeholders + 1), rng.randrange(1, 9),
+           (start + timedelta(days=rng.randrange(1500))).isoformat()) for _ in range(n_manhours)))
+    conn.commit()
+
+
+def timed(conn, query, params=()):
+    started = time.perf_counter()
+    rows = conn.execute(query, params).fetchall()
+    return time.perf_counter() - started, [dict(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--manhours', type=int, default=1000000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='report_bench_')
+    os.chdir(workdir) # app.py creates its database relative to the working directory
+    import app
+
+    conn = sqlite3.connect(app.DATABASE)
+    conn.row_factory = sqlite3.Row
+    print(f'Populating {args.requests} requests / {args.manhours} man-hour rows in {workdir} ...')
+    populate(conn, args.requests, args.manhours)
+
+    query, params = app.build_report_query(MultiDict())
+    new_time, new_rows = timed(conn, query, params)
+    print(f'build_report_query: {new_time:.3f}s ({len(new_rows)} rows)')
+
+    legacy_time, legacy_rows = timed(conn, LEGACY_REPORT_QUERY)
+    print(f'legacy correlated subqueries: {legacy_time:.3f}s ({len(legacy_rows)} rows)')
+
+    new_rows.sort(key=lambda row: row['request_internal_id'])
+    legacy_rows.sort(key=lambda row: row['request_internal_id'])
+    if new_rows != legacy_rows:
+        # Rows past the end of the shorter result pair up with None
+        index, (got, expected) = next((index, pair) for index, pair in enumerate(zip_longest(new_rows, legacy_rows)) if pair[0] != pair[1])
+        print(f'MISMATCH at row {index}:\n  got      {got}\n  expected {expected}')
+        conn.close()
+        sys.exit(1)
+    print(f'speedup: {legacy_time / new_time:.1f}x')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/write_benchmark.py
+"""
+Runs a mixed read/write load from several worker processes against one database and reports throughput and latency.
+
+Each process loads the app and runs client threads that mix list and report reads with stakeholder,
+request and request-update writes, while one thread in the first process keeps re-uploading a
+man-hours sheet. Pass --app to measure another version of app.py (e.g. one checked out from git).
+
+Usage: python benchmarks/write_benchmark.py [--processes 4] [--threads 4] [--seconds 10] [--write-ratio 0.3] [--app app.py]
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from io import BytesIO
+
+import pandas as pd
+
+from report_benchmark import populate
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+
+def load_app(app_path):
+    spec = importlib.util.spec_from_file_location('app', app_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['app'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def client_thread(client, rng, deadline, write_ratio, n_requests, prefix, samples):
+    """Issues random reads and writes until the deadline, recording (kind, seconds, error) per call."""
+    counter = 0
+    while time.perf_counter() < deadline:
+        counter += 1
+        request_id = rng.randrange(1, n_requests + 1)
+        if rng.random() < write_ratio:
+            kind = 'write'
+            choice = rng.randrange(3)
+            started = time.perf_counter()
+            if choice == 0:
+                response = client.post('/api/stakeholders', json={'name': f'{prefix}-{counter}', 'role': 'BA'})
+            elif choice == 1:
+                response = client.put(f'/api/requests/{request_id}', json={'request_title': f'Request {request_id} ({prefix}-{counter})'})
+            else:
+                response = client.put(f'/api/update-request/{request_id}', json={'current_status': rng.choice(['New', 'In Progress', 'Done'])})
+        else:
+            kind = 'read'
+            started = time.perf_counter()
+            if rng.random() < 0.5:
+                response = client.get('/api/requests', query_string={'limit': 50, 'sort': 'request_no'})
+            else:
+                response = client.get('/api/report', query_string={'department': f'Dept {rng.randrange(20)}'})
+        elapsed = time.perf_counter() - started
+        error = None if response.status_code < 400 else (response.get_json() or {}).get('error', str(response.status_code))
+        samples.append((kind, elapsed, error))
+
+
+def upload_thread(client, sheet, deadline, samples):
+    """Re-uploads the man-hours sheet until the deadline, timing each job from submission to completion."""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        job = client.post('/api/actual-manhours/upload', data={'file': (BytesIO(sheet), 'manhours.xlsx')}).get_json()
+        while True:
+            status = client.get(f"/api/jobs/{job['job_id']}").get_json()
+            if status['status'] in ('finished', 'failed'):
+                break
+            time.sleep(0.02)
+        samples.append(('upload', time.perf_counter() - started, status['error']))
+
+
+def worker(app_path, workdir, index, args, sheet, results):
+    os.chdir(workdir) # app.py creates its database relative to the working directory
+    app = load_app(app_path)
+    deadline = time.perf_counter() + args.seconds
+    samples = []
+    threads = [threading.Thread(target=client_thread, args=(app.app.test_client(), random.Random(index * 100 + t), deadline,
+                                                          args.write_ratio, args.requests, f'bench-{index}-{t}', samples))
+               for t in range(args.threads)]
+    if index == 0:
+        threads.append(threading.Thread(target=upload_thread, args=(app.app.test_client(), sheet, deadline, samples)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(samples)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--manhours', type=int, default=100000)
+    parser.add_argument('--upload-rows', type=int, default=5000)
+    parser.add_argument('--app', default=os.path.join(REPO, 'app.py'))
+    args = parser.parse_args()
+    app_path = os.path.abspath(args.app)
+
+    workdir = tempfile.mkdtemp(prefix='write_bench_')
+    os.chdir(workdir)
+    app = load_app(app_path)
+    conn = sqlite3.connect(app.DATABASE)
+    print(f'Populating {args.requests} requests / {args.manhours} man-hour rows in {workdir} ...')
+    populate(conn, args.requests, args.manhours)
+    rng = random.Random(1)
+    sheet = BytesIO()
+    pd.DataFrame({
+        'Request No': [f'REQ-{rng.randrange(1, args.requests + 1):06d}' for _ in range(args.upload_rows)],
+        'Stakeholder Name': [f'Stakeholder {rng.randrange(1, 201)}' for _ in range(args.upload_rows)],
+        'Actual Man-Hours': [rng.randrange(1, 9) for _ in range(args.upload_rows)],
+        'Task Date': pd.to_datetime([f'2030-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}' for _ in range(args.upload_rows)]),
+    }).to_excel(sheet, index=False)
+    conn.close()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(app_path, workdir, index, args, sheet.getvalue(), results))
+                 for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    samples = [sample for _ in processes for sample in results.get()]
+    for process in processes:
+        process.join()
+
+    by_kind = defaultdict(list)
+    errors = defaultdict(int)
+    for kind, elapsed, error in samples:
+        by_kind[kind].append(elapsed)
+        if error:
+            errors[(kind, error)] += 1
+    print(f'{args.processes} processes x {args.threads} threads for {args.seconds:.0f}s, {args.write_ratio:.0%} writes')
+    print(f'{"kind":<7} {"count":>7} {"per sec":>8} {"p50":>9} {"p99":>9} {"max":>9} {"errors":>7}')
+    for kind in ('read', 'write', 'upload'):
+        latencies = by_kind[kind]
+        failed = sum(count for (error_kind, _), count in errors.items() if error_kind == kind)
+        print(f'{kind:<7} {len(latencies):>7} {len(latencies) / args.seconds:>8.1f} {percentile(latencies, 0.5) * 1000:>7.1f}ms '
+              f'{percentile(latencies, 0.99) * 1000:>7.1f}ms {max(latencies, default=float("nan")) * 1000:>7.1f}ms {failed:>7}')
+    for (kind, error), count in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+        print(f'  {count} {kind} errors: {error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,12 +11,22 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 5000);
     }
 
+    // The dashboard refreshes itself; the browser revalidates with the last ETag, so unchanged
+    // data costs a 304 and the charts are only redrawn when the ETag moves on
+    const refreshIntervalMs = 60000;
+    let lastETag = null;
+
     async function fetchDashboardData() {
         try {
             const response = await fetch('/api/dashboard/data');
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
+            const etag = response.headers.get('ETag');
+            if (etag && etag === lastETag) {
+                return;
+            }
+            lastETag = etag;
             const data = await response.json();
             
             renderRequestsByCategoryChart(data.requests_by_category);
@@ -190,4 +200,5 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     fetchDashboardData();
+    setInterval(fetchDashboardData, refreshIntervalMs);
 });
\ No newline at end of file
@@ -44,14 +44,15 @@ document.addEventListener('DOMContentLoaded', () => {
         selectedStatuses.forEach(status => {
             queryParams.append('current_status', status);
         });
+        queryParams.append('format', 'columns'); // Column names once, then one array per row
 
         try {
             const response = await fetch(`/api/report?${queryParams.toString()}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-            const reportData = await response.json();
-            renderReport(reportData);
+            const { columns, rows } = await response.json();
+            renderReport(rows.map(values => Object.fromEntries(columns.map((column, i) => [column, values[i]]))));
         } catch (error) {
             console.error('Error fetching report:', error);
             showMessage(errorBox, 'Failed to load report. ' + error.message, 'error');
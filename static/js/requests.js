@@ -23,6 +23,18 @@ document.addEventListener('DOMContentLoaded', () => {
     const downloadRequestsDataBtn = document.getElementById('download-requests-data-btn');
     const downloadRequestsTemplateBtn = document.getElementById('download-requests-template-btn');
 
+    const requestsPageInfo = document.getElementById('requests-page-info');
+    const requestsPrevBtn = document.getElementById('requests-prev-btn');
+    const requestsNextBtn = document.getElementById('requests-next-btn');
+
+    // Paging state: the list is fetched one page at a time, sorted on the server.
+    // pageCursors holds the cursor of every page visited so far so Previous can step back.
+    const pageSize = 50;
+    let sortColumn = 'request_date';
+    let sortOrder = 'desc';
+    let pageCursors = [null];
+    let nextCursor = null;
+
 
     // Function to display messages
     function showMessage(element, message, type = 'success') {
@@ -34,15 +46,34 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 5000); // Hide after 5 seconds
     }
 
-    // Function to fetch and display requests
+    // Polls an upload job until it has finished or failed and returns its final state
+    async function waitForUploadJob(jobId) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok || job.status === 'finished' || job.status === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    // Function to fetch and display the current page of requests
     async function fetchRequests() {
         try {
-            const response = await fetch('/api/requests');
+            const params = new URLSearchParams({ limit: pageSize, sort: sortColumn, order: sortOrder });
+            const cursor = pageCursors[pageCursors.length - 1];
+            if (cursor) {
+                params.append('after', cursor);
+            }
+            const response = await fetch(`/api/requests?${params.toString()}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-            const requests = await response.json();
-            renderRequests(requests);
+            const page = await response.json();
+            nextCursor = page.next_cursor;
+            renderRequests(page.items);
+            renderPageInfo(page);
         } catch (error) {
             console.error('Error fetching requests:', error);
             showMessage(errorBox, 'Failed to load requests. ' + error.message, 'error');
@@ -83,6 +114,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Function to update the paging summary and buttons
+    function renderPageInfo(page) {
+        const first = (pageCursors.length - 1) * pageSize + 1;
+        const last = first + page.items.length - 1;
+        requestsPageInfo.textContent = page.items.length ? `Showing ${first}-${last} of ${page.total}` : '';
+        requestsPrevBtn.disabled = pageCursors.length === 1;
+        requestsNextBtn.disabled = !nextCursor;
+    }
+
     // Add event listeners to dynamically created edit/delete buttons
     function addEventListenersToButtons() {
         document.querySelectorAll('.btn-edit').forEach(button => {
@@ -230,8 +270,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: formData
             });
 
-            const result = await response.json();
+            let result = await response.json();
             if (response.ok) {
+                result = await waitForUploadJob(result.job_id);
+            }
+            if (response.ok && result.status === 'finished') {
                 showMessage(excelUploadMessageBox, result.message, 'success');
                 fetchRequests(); // Refresh requests list after upload
                 excelFileInput.value = ''; // Clear file input
@@ -265,6 +308,27 @@ document.addEventListener('DOMContentLoaded', () => {
         cancelEditButton.classList.add('hidden');
     });
 
+    // Paging buttons
+    requestsPrevBtn.addEventListener('click', () => {
+        pageCursors.pop();
+        fetchRequests();
+    });
+
+    requestsNextBtn.addEventListener('click', () => {
+        pageCursors.push(nextCursor);
+        fetchRequests();
+    });
+
+    // Clicking a column header sorts by it, toggling the direction on repeated clicks
+    document.querySelectorAll('th[data-sort]').forEach(header => {
+        header.addEventListener('click', () => {
+            sortOrder = header.dataset.sort === sortColumn && sortOrder === 'asc' ? 'desc' : 'asc';
+            sortColumn = header.dataset.sort;
+            pageCursors = [null];
+            fetchRequests();
+        });
+    });
+
     // Initial fetch of requests when the page loads
     fetchRequests();
 });
\ No newline at end of file
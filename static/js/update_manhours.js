@@ -9,6 +9,18 @@ document.addEventListener('DOMContentLoaded', () => {
     const downloadManhoursDataBtn = document.getElementById('download-manhours-data-btn');
     const downloadManhoursTemplateBtn = document.getElementById('download-manhours-template-btn');
 
+    const manhoursPageInfo = document.getElementById('manhours-page-info');
+    const manhoursPrevBtn = document.getElementById('manhours-prev-btn');
+    const manhoursNextBtn = document.getElementById('manhours-next-btn');
+
+    // Paging state: the list is fetched one page at a time, sorted on the server.
+    // pageCursors holds the cursor of every page visited so far so Previous can step back.
+    const pageSize = 50;
+    let sortColumn = 'task_date';
+    let sortOrder = 'desc';
+    let pageCursors = [null];
+    let nextCursor = null;
+
     // Function to display messages
     function showMessage(element, message, type = 'success') {
         element.textContent = message;
@@ -19,15 +31,34 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 5000); // Hide after 5 seconds
     }
 
-    // Function to fetch and display actual man-hours
+    // Polls an upload job until it has finished or failed and returns its final state
+    async function waitForUploadJob(jobId) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok || job.status === 'finished' || job.status === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    // Function to fetch and display the current page of actual man-hours
     async function fetchActualManHours() {
         try {
-            const response = await fetch('/api/actual-manhours');
+            const params = new URLSearchParams({ limit: pageSize, sort: sortColumn, order: sortOrder });
+            const cursor = pageCursors[pageCursors.length - 1];
+            if (cursor) {
+                params.append('after', cursor);
+            }
+            const response = await fetch(`/api/actual-manhours?${params.toString()}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-            const data = await response.json();
-            renderActualManHours(data);
+            const page = await response.json();
+            nextCursor = page.next_cursor;
+            renderActualManHours(page.items);
+            renderPageInfo(page);
         } catch (error) {
             console.error('Error fetching actual man-hours:', error);
             showMessage(manhoursExcelErrorBox, 'Failed to load actual man-hours. ' + error.message, 'error');
@@ -54,6 +85,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Function to update the paging summary and buttons
+    function renderPageInfo(page) {
+        const first = (pageCursors.length - 1) * pageSize + 1;
+        const last = first + page.items.length - 1;
+        manhoursPageInfo.textContent = page.items.length ? `Showing ${first}-${last} of ${page.total}` : '';
+        manhoursPrevBtn.disabled = pageCursors.length === 1;
+        manhoursNextBtn.disabled = !nextCursor;
+    }
+
     // Handle Excel upload for actual man-hours
     manhoursExcelUploadForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -73,8 +113,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: formData
             });
 
-            const result = await response.json();
+            let result = await response.json();
             if (response.ok) {
+                result = await waitForUploadJob(result.job_id);
+            }
+            if (response.ok && result.status === 'finished') {
                 showMessage(manhoursExcelMessageBox, result.message, 'success');
                 fetchActualManHours(); // Refresh list after upload
                 manhoursExcelFileInput.value = ''; // Clear file input
@@ -100,6 +143,27 @@ document.addEventListener('DOMContentLoaded', () => {
         window.location.href = '/api/actual-manhours/template';
     });
 
+    // Paging buttons
+    manhoursPrevBtn.addEventListener('click', () => {
+        pageCursors.pop();
+        fetchActualManHours();
+    });
+
+    manhoursNextBtn.addEventListener('click', () => {
+        pageCursors.push(nextCursor);
+        fetchActualManHours();
+    });
+
+    // Clicking a column header sorts by it, toggling the direction on repeated clicks
+    document.querySelectorAll('th[data-sort]').forEach(header => {
+        header.addEventListener('click', () => {
+            sortOrder = header.dataset.sort === sortColumn && sortOrder === 'asc' ? 'desc' : 'asc';
+            sortColumn = header.dataset.sort;
+            pageCursors = [null];
+            fetchActualManHours();
+        });
+    });
+
     // Initial fetch of actual man-hours when the page loads
     fetchActualManHours();
 });
\ No newline at end of file
@@ -52,6 +52,18 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 5000);
     }
 
+    // Polls an upload job until it has finished or failed and returns its final state
+    async function waitForUploadJob(jobId) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok || job.status === 'finished' || job.status === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     async function fetchRequestsForSelection() {
         try {
             const response = await fetch('/api/requests');
@@ -181,8 +193,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: formData
             });
 
-            const result = await response.json();
+            let result = await response.json();
             if (response.ok) {
+                result = await waitForUploadJob(result.job_id);
+            }
+            if (response.ok && result.status === 'finished') {
                 showMessage(bulkUploadMessageBox, result.message, 'success');
                 if (currentRequestIdInput.value) {
                     fetchRequestDetails(currentRequestIdInput.value);
@@ -0,0 +1,75 @@
+# tests/conftest.py
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, 'benchmarks'))
+os.chdir(tempfile.mkdtemp(prefix='manpower_tests_')) # app.py creates its database relative to the working directory
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """The app module over a database seeded with generate_data.py."""
+    import app
+    from generate_data import generate
+
+    conn = sqlite3.connect(app.DATABASE)
+    generate(conn, 20, 200, 5000)
+    conn.close()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def logged_request(client):
+    """
+    A new request with estimates and three new stakeholders, one per role, who logged man-hours on it across
+    two months through the batch API. Returns {'request_id': ..., 'stakeholder_ids': {role: id}}.
+    """
+    tag = uuid.uuid4().hex[:8]
+    stakeholder_ids = {}
+    for role in ('BA', 'Developer', 'Tester'):
+        response = client.post('/api/stakeholders', json={'name': f'Test {role} {tag}', 'role': role})
+        assert response.status_code == 201
+        stakeholder_ids[role] = response.get_json()['id']
+    response = client.post('/api/requests', json={
+        'request_no': f'TEST-{tag}', 'requested_by': 'Tests', 'department': 'QA', 'category': 'Test',
+        'request_date': '2025-03-01', 'request_title': f'Test request {tag}',
+    })
+    assert response.status_code == 201
+    request_id = response.get_json()['id']
+    response = client.put(f'/api/update-request/{request_id}', json={
+        'estimated_man_hours_ba': 10, 'estimated_man_hours_dev': 20, 'estimated_man_hours_tester': 30})
+    assert response.status_code == 200
+    response = client.post('/api/actual-manhours/batch', json=[
+        {'request_id': request_id, 'stakeholder_id': stakeholder_id, 'actual_man_hours': hours, 'task_date': task_date}
+        for stakeholder_id in stakeholder_ids.values()
+        for task_date, hours in (('2025-03-03', 4), ('2025-03-31', 5), ('2025-04-02', 6))
+    ])
+    assert response.status_code == 200
+    return {'request_id': request_id, 'stakeholder_ids': stakeholder_ids}
+
+
+@pytest.fixture
+def upload(client):
+    """Posts file content to an upload endpoint and returns its job once finished or failed."""
+    def upload(url, content, filename):
+        response = client.post(url, data={'file': (BytesIO(content), filename)})
+        assert response.status_code == 202
+        status_url = response.get_json()['status_url']
+        while (job := client.get(status_url).get_json())['status'] not in ('finished', 'failed'):
+            time.sleep(0.01)
+        return job
+    return upload
@@ -0,0 +1,114 @@
+# tests/test_archive.py
+import sqlite3
+from datetime import date
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+
+def query(app_module, sql, params=()):
+    conn = sqlite3.connect(app_module.DATABASE)
+    conn.execute('ATTACH ? AS archive', (app_module.ARCHIVE_DATABASE,))
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def archived_request(app_module, logged_request):
+    """logged_request, archived; also returns its request_no and its man-hours entries as they were in main."""
+    request_id = logged_request['request_id']
+    entries = query(app_module, 'SELECT * FROM actual_man_hours WHERE request_id = ? ORDER BY id', (request_id,))
+    (request_no,), = query(app_module, 'SELECT request_no FROM requests WHERE id = ?', (request_id,))
+    assert app_module.archive_requests([request_id]) == 1
+    return {**logged_request, 'request_no': request_no, 'entries': entries}
+
+
+def report_row(client, request_no, **args):
+    rows = client.get('/api/report', query_string={'request_no': request_no, **args}).get_json()
+    return [row for row in rows if row['request_no'] == request_no]
+
+
+def test_archive_moves_the_request_with_its_updates_and_manhours(app_module, archived_request):
+    request_id = archived_request['request_id']
+    for table, key in app_module.ARCHIVED_TABLES.items():
+        assert query(app_module, f'SELECT COUNT(*) FROM main.{table} WHERE {key} = ?', (request_id,)) == [(0,)]
+        assert query(app_module, f'SELECT COUNT(*) FROM archive.{table} WHERE {key} = ?', (request_id,)) != [(0,)]
+    assert query(app_module, 'SELECT * FROM archive.actual_man_hours WHERE request_id = ? ORDER BY id', (request_id,)) == archived_request['entries']
+    assert query(app_module, 'SELECT COUNT(*) FROM request_manhour_rollup WHERE request_id = ?', (request_id,)) == [(0,)]
+
+
+def test_include_archived_adds_archived_requests_to_the_report(client, archived_request):
+    assert report_row(client, archived_request['request_no']) == []
+    row, = report_row(client, archived_request['request_no'], include_archived='true')
+    assert (row['total_estimated'], row['actual_man_hours_ba'], row['total_actual']) == (60, 15, 45)
+
+
+def test_include_archived_adds_archived_manhours_to_the_breakup(client, archived_request):
+    url = f"/api/report/manhours-breakup/{archived_request['request_id']}"
+    assert client.get(url).get_json() == []
+    assert sum(row['actual_man_hours'] for row in client.get(url, query_string={'include_archived': 'true'}).get_json()) == 45
+
+
+@pytest.mark.parametrize('url, column', [
+    ('/api/requests/download', 'request_no'),
+    ('/api/update-request/download', 'request_no'),
+    ('/api/actual-manhours/download', 'Request No'),
+    ('/api/report/download', 'Request No'),
+])
+def test_include_archived_adds_archived_requests_to_the_downloads(client, archived_request, url, column):
+    def request_nos(**args):
+        response = client.get(url, query_string={'consistency': 'live', **args})
+        assert response.status_code == 200
+        return set(pd.read_excel(BytesIO(response.data))[column].astype(str))
+
+    assert archived_request['request_no'] not in request_nos()
+    assert archived_request['request_no'] in request_nos(include_archived='true')
+
+
+def test_archived_request_numbers_stay_reserved(app_module, client, archived_request):
+    request = {'request_no': archived_request['request_no'], 'requested_by': 'Tests', 'department': 'QA', 'category': 'Test',
+               'request_date': '2025-03-01', 'request_title': 'Reuse'}
+    assert client.post('/api/requests', json=request).status_code == 409
+    assert client.post('/api/requests/batch', json=[request]).get_json()['results'][0]['error'] == 'Request with this number already exists'
+    response = client.post('/api/actual-manhours/batch', json=[{
+        'request_no': archived_request['request_no'], 'stakeholder_id': archived_request['stakeholder_ids']['BA'],
+        'actual_man_hours': 1, 'task_date': '2025-06-01'}])
+    assert response.get_json()['results'][0]['error'] == 'Request is archived.'
+
+
+def test_unarchive_restores_the_rows_and_their_report_totals(app_module, client, archived_request):
+    assert app_module.unarchive_requests([archived_request['request_id']]) == 1
+    request_id = archived_request['request_id']
+    assert query(app_module, 'SELECT * FROM actual_man_hours WHERE request_id = ? ORDER BY id', (request_id,)) == archived_request['entries']
+    for table, key in app_module.ARCHIVED_TABLES.items():
+        assert query(app_module, f'SELECT COUNT(*) FROM archive.{table} WHERE {key} = ?', (request_id,)) == [(0,)]
+    row, = report_row(client, archived_request['request_no'])
+    assert row['total_actual'] == 45
+
+
+def test_unarchive_drops_manhours_of_stakeholders_deleted_meanwhile(app_module, client, archived_request):
+    assert client.delete(f"/api/stakeholders/{archived_request['stakeholder_ids']['Tester']}").status_code == 200
+    assert app_module.unarchive_requests([archived_request['request_id']]) == 1
+    row, = report_row(client, archived_request['request_no'])
+    assert (row['actual_man_hours_tester'], row['total_actual']) == (0, 30)
+
+
+def test_cli_archives_requests_confirmed_before_the_cutoff_and_restores_them_by_number(app_module, client, logged_request):
+    request_id = logged_request['request_id']
+    assert client.put(f'/api/update-request/{request_id}', json={'uat_confirmation_date': '1999-12-31'}).status_code == 200
+    (request_no,), = query(app_module, 'SELECT request_no FROM requests WHERE id = ?', (request_id,))
+    runner = app_module.app.test_cli_runner()
+    older_than_days = str((date.today() - date(2000, 1, 1)).days) # Only requests confirmed before 2000
+
+    result = runner.invoke(args=['archive-requests', '--older-than-days', older_than_days, '--dry-run'])
+    assert result.output.strip() == '1 requests would be archived.'
+    result = runner.invoke(args=['archive-requests', '--older-than-days', older_than_days])
+    assert result.output.startswith('Archived 1 of 1 requests')
+    assert query(app_module, 'SELECT id FROM archived_requests WHERE request_no = ?', (request_no,)) == [(request_id,)]
+
+    result = runner.invoke(args=['unarchive-requests', request_no, 'NO-SUCH-REQUEST'])
+    assert result.output.splitlines() == ['Not archived: NO-SUCH-REQUEST', 'Restored 1 requests.']
+    assert query(app_module, 'SELECT COUNT(*) FROM requests WHERE id = ?', (request_id,)) == [(1,)]
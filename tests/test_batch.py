@@ -0,0 +1,131 @@
+# tests/test_batch.py
+import json
+import sqlite3
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def tag():
+    return uuid.uuid4().hex[:8]
+
+
+def count(app_module, query, params=()):
+    conn = sqlite3.connect(app_module.DATABASE)
+    try:
+        return conn.execute(query, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def statuses(response):
+    return [result['status'] for result in response.get_json()['results']]
+
+
+def test_atomic_batch_with_an_invalid_record_writes_nothing(app_module, client, tag):
+    response = client.post('/api/stakeholders/batch', json=[
+        {'name': f'A {tag}', 'role': 'BA'}, {'name': f'B {tag}'}, {'name': f'A {tag}', 'role': 'Tester'}])
+    assert response.status_code == 422
+    body = response.get_json()
+    assert (body['mode'], body['applied'], body['created'], body['failed'], body['skipped']) == ('atomic', False, 0, 2, 1)
+    assert statuses(response) == ['skipped', 'failed', 'failed']
+    assert body['results'][1]['error'] == 'role is required.'
+    assert body['results'][2]['error'] == 'Stakeholder with this name already exists'
+    assert count(app_module, 'SELECT COUNT(*) FROM stakeholders WHERE name LIKE ?', (f'% {tag}',)) == 0
+
+
+def test_best_effort_batch_applies_the_valid_records(app_module, client, tag):
+    response = client.post('/api/stakeholders/batch?mode=best_effort', json=[
+        {'name': f'A {tag}', 'role': 'BA'}, 'not an object', {'name': f'B {tag}', 'role': 'Developer'}])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['applied'], body['total'], body['created'], body['failed']) == (True, 3, 2, 1)
+    assert statuses(response) == ['created', 'failed', 'created']
+    assert body['results'][1]['error'] == 'Each record must be a JSON object.'
+    conn = sqlite3.connect(app_module.DATABASE)
+    stored = dict(conn.execute('SELECT id, name FROM stakeholders WHERE name LIKE ?', (f'% {tag}',)).fetchall())
+    conn.close()
+    assert {body['results'][0]['id']: f'A {tag}', body['results'][2]['id']: f'B {tag}'} == stored
+
+
+def test_ndjson_batch_reports_invalid_lines(app_module, client, tag):
+    lines = [
+        json.dumps({'request_no': f'N1-{tag}', 'requested_by': 'Tests', 'department': 'QA', 'category': 'Test',
+                    'request_date': '2025-03-01', 'request_title': 'First'}),
+        '{not json',
+        '',
+        json.dumps({'request_no': f'N1-{tag}', 'requested_by': 'Tests', 'department': 'QA', 'category': 'Test',
+                    'request_date': '2025-03-02', 'request_title': 'Same number'}),
+        json.dumps({'request_no': f'N2-{tag}', 'requested_by': 'Tests', 'department': 'QA', 'category': 'Test',
+                    'request_date': '01/03/2025', 'request_title': 'Bad date'}),
+    ]
+    response = client.post('/api/requests/batch?mode=best_effort', data='\n'.join(lines) + '\n',
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert [(result['status'], result.get('error')) for result in response.get_json()['results']] == [
+        ('created', None),
+        ('failed', 'Invalid JSON.'),
+        ('failed', 'Request with this number already exists'),
+        ('failed', 'request_date must be a date in YYYY-MM-DD format.'),
+    ]
+    assert count(app_module, 'SELECT COUNT(*) FROM requests WHERE request_no LIKE ?', (f'%-{tag}',)) == 1
+
+
+def test_manhours_batch_creates_then_updates_and_resolves_natural_keys(app_module, client, logged_request):
+    request_id = logged_request['request_id']
+    ba = logged_request['stakeholder_ids']['BA']
+    conn = sqlite3.connect(app_module.DATABASE)
+    request_no = conn.execute('SELECT request_no FROM requests WHERE id = ?', (request_id,)).fetchone()[0]
+    ba_name = conn.execute('SELECT name FROM stakeholders WHERE id = ?', (ba,)).fetchone()[0]
+    conn.close()
+    response = client.post('/api/actual-manhours/batch?mode=best_effort', json=[
+        {'request_no': request_no, 'stakeholder_name': ba_name, 'actual_man_hours': 7, 'task_date': '2025-06-01'},
+        {'request_id': request_id, 'stakeholder_id': ba, 'actual_man_hours': 8, 'task_date': '2025-06-01'},
+        {'request_id': request_id, 'stakeholder_id': ba, 'actual_man_hours': 1, 'task_date': '2025-03-03'},
+        {'request_no': 'NO-SUCH-REQUEST', 'stakeholder_id': ba, 'actual_man_hours': 1, 'task_date': '2025-06-01'},
+        {'request_id': request_id, 'stakeholder_name': 'Nobody', 'actual_man_hours': 1, 'task_date': '2025-06-01'},
+        {'request_id': request_id, 'stakeholder_id': ba, 'actual_man_hours': 1.5, 'task_date': '2025-06-01'},
+        {'request_id': request_id, 'stakeholder_id': ba, 'actual_man_hours': 1, 'task_date': 'June'},
+    ])
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(result['status'], result.get('error')) for result in results] == [
+        ('created', None),
+        ('updated', None),
+        ('updated', None),
+        ('failed', 'Request not found.'),
+        ('failed', 'Stakeholder not found.'),
+        ('failed', 'actual_man_hours must be an integer.'),
+        ('failed', 'task_date must be a date in YYYY-MM-DD format.'),
+    ]
+    assert results[0]['id'] == results[1]['id']
+    conn = sqlite3.connect(app_module.DATABASE)
+    stored = dict(conn.execute('SELECT task_date, actual_man_hours FROM actual_man_hours WHERE request_id = ? AND stakeholder_id = ?',
+                               (request_id, ba)).fetchall())
+    conn.close()
+    assert stored == {'2025-03-03': 1, '2025-03-31': 5, '2025-04-02': 6, '2025-06-01': 8} # The last record of a key wins
+
+
+@pytest.mark.parametrize('url, kwargs, error', [
+    ('/api/stakeholders/batch?mode=all_or_nothing', {'json': [{'name': 'x', 'role': 'BA'}]}, 'mode must be atomic or best_effort.'),
+    ('/api/stakeholders/batch', {'json': []}, 'The batch contains no records.'),
+    ('/api/stakeholders/batch', {'json': {'name': 'x', 'role': 'BA'}},
+     'The request body must be a JSON array or NDJSON (application/x-ndjson).'),
+    ('/api/stakeholders/batch', {'data': '\n\n', 'content_type': 'application/x-ndjson'}, 'The batch contains no records.'),
+])
+def test_rejects_malformed_batches(client, url, kwargs, error):
+    response = client.post(url, **kwargs)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'json': [{'name': 'x', 'role': 'BA'}] * 3},
+    {'data': '{"name": "x", "role": "BA"}\n' * 3, 'content_type': 'application/x-ndjson'},
+])
+def test_rejects_batches_over_the_record_limit(app_module, client, monkeypatch, kwargs):
+    monkeypatch.setitem(app_module.app.config, 'BATCH_MAX_RECORDS', 2)
+    response = client.post('/api/stakeholders/batch', **kwargs)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'A batch can hold at most 2 records.'
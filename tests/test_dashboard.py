@@ -0,0 +1,61 @@
+# tests/test_dashboard.py
+import sqlite3
+from collections import defaultdict
+
+import pytest
+
+
+def reference_comparison(conn):
+    """Per-role totals summed in Python straight from actual_man_hours and the request estimates."""
+    request_ids = {row[0] for row in conn.execute('SELECT id FROM requests')}
+    roles = dict(conn.execute('SELECT id, role FROM stakeholders'))
+    estimated = defaultdict(int)
+    for request_id, ba, dev, tester in conn.execute(
+            'SELECT request_id, estimated_man_hours_ba, estimated_man_hours_dev, estimated_man_hours_tester FROM request_updates'):
+        if request_id in request_ids:
+            estimated['BA'] += ba or 0
+            estimated['Developer'] += dev or 0
+            estimated['Tester'] += tester or 0
+    actual = defaultdict(int)
+    for request_id, stakeholder_id, hours in conn.execute('SELECT request_id, stakeholder_id, actual_man_hours FROM actual_man_hours'):
+        if request_id in request_ids and stakeholder_id in roles:
+            actual[roles[stakeholder_id]] += hours
+    return [{'role': role, 'estimated': estimated[role], 'actual': actual[role]} for role in ('BA', 'Developer', 'Tester')]
+
+
+@pytest.fixture
+def conn(app_module):
+    conn = sqlite3.connect(app_module.DATABASE)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def assert_matches_reference(app_module, conn):
+    conn.rollback() # Read the writes committed since the last check
+    assert app_module.compute_manhours_comparison(conn) == reference_comparison(conn)
+
+
+def test_matches_reference_on_seeded_data(app_module, conn):
+    assert_matches_reference(app_module, conn)
+
+
+def test_matches_reference_after_logging_hours(app_module, conn, logged_request):
+    assert_matches_reference(app_module, conn)
+
+
+def test_matches_reference_after_role_change(app_module, client, conn, logged_request):
+    stakeholder_id = logged_request['stakeholder_ids']['BA']
+    name = conn.execute('SELECT name FROM stakeholders WHERE id = ?', (stakeholder_id,)).fetchone()[0]
+    assert client.put(f'/api/stakeholders/{stakeholder_id}', json={'name': name, 'role': 'Tester'}).status_code == 200
+    assert_matches_reference(app_module, conn)
+
+
+def test_matches_reference_after_stakeholder_deletion(app_module, client, conn, logged_request):
+    assert client.delete(f"/api/stakeholders/{logged_request['stakeholder_ids']['Developer']}").status_code == 200
+    assert_matches_reference(app_module, conn)
+
+
+def test_matches_reference_after_request_deletion(app_module, client, conn, logged_request):
+    assert client.delete(f"/api/requests/{logged_request['request_id']}").status_code == 200
+    assert_matches_reference(app_module, conn)
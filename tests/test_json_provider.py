@@ -0,0 +1,21 @@
+# tests/test_json_provider.py
+import json
+from datetime import date
+
+import pytest
+
+pytest.importorskip('orjson')
+
+
+def test_orjson_responses_decode_to_the_default_providers_json(app_module):
+    payload = {'name': 'Zoë', 'day': date(2025, 3, 1), 'ids': {2: 'b', 1: 'a'}, 'hours': [1, 2.5, None]}
+    with app_module.app.app_context():
+        fast = app_module.app.json.response(payload).get_data()
+        default = super(app_module.FastJSONProvider, app_module.app.json).response(payload).get_data()
+    assert json.loads(fast) == json.loads(default)
+    assert 'Zoë'.encode() in fast and b'Zo\\u00eb' in default # Raw UTF-8 instead of escapes
+
+
+def test_orjson_writes_nan_as_null(app_module):
+    with app_module.app.app_context():
+        assert json.loads(app_module.app.json.response({'value': float('nan')}).get_data()) == {'value': None}
@@ -0,0 +1,28 @@
+# tests/test_manhours_trend.py
+import pytest
+
+
+@pytest.mark.parametrize('args', [
+    {'start': '20240101'},
+    {'start': '2024-W01-1'},
+    {'end': '20240101'},
+    {'end': '2024-W01-1'},
+    {'end': '2024-1-1'},
+    {'start': 'yesterday'},
+])
+def test_rejects_dates_not_in_yyyy_mm_dd_format(client, args):
+    response = client.get('/api/analytics/manhours-trend', query_string={'granularity': 'week', **args, 'consistency': 'live'})
+    assert response.status_code == 400
+    assert 'YYYY-MM-DD' in response.get_json()['error']
+
+
+def test_range_bounds_filter_the_buckets(client):
+    def buckets(**args):
+        response = client.get('/api/analytics/manhours-trend', query_string={'granularity': 'week', **args, 'consistency': 'live'})
+        assert response.status_code == 200
+        return {row['bucket'] for row in response.get_json()['rows']}
+
+    everything = buckets()
+    start, end = sorted(everything)[len(everything) // 3], sorted(everything)[2 * len(everything) // 3]
+    assert buckets(start=start) == {bucket for bucket in everything if bucket >= start}
+    assert buckets(end=end) == {bucket for bucket in everything if bucket <= end}
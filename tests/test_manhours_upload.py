@@ -0,0 +1,93 @@
+# tests/test_manhours_upload.py
+import sqlite3
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def names(app_module, logged_request):
+    """logged_request's request number and its stakeholders' names by role."""
+    conn = sqlite3.connect(app_module.DATABASE)
+    request_no = conn.execute('SELECT request_no FROM requests WHERE id = ?', (logged_request['request_id'],)).fetchone()[0]
+    stakeholders = {role: conn.execute('SELECT name FROM stakeholders WHERE id = ?', (stakeholder_id,)).fetchone()[0]
+                    for role, stakeholder_id in logged_request['stakeholder_ids'].items()}
+    conn.close()
+    return request_no, stakeholders
+
+
+def excel(rows):
+    buffer = BytesIO()
+    pd.DataFrame(rows, columns=['Request No', 'Stakeholder Name', 'Actual Man-Hours', 'Task Date']).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def stored_hours(app_module, request_id):
+    conn = sqlite3.connect(app_module.DATABASE)
+    try:
+        return dict(((role, task_date), hours) for role, task_date, hours in conn.execute('''
+            SELECT s.role, a.task_date, a.actual_man_hours FROM actual_man_hours a JOIN stakeholders s ON s.id = a.stakeholder_id
+            WHERE a.request_id = ?
+        ''', (request_id,)))
+    finally:
+        conn.close()
+
+
+def data_generation(app_module):
+    conn = sqlite3.connect(app_module.DATABASE)
+    try:
+        return app_module.current_data_generation(conn)
+    finally:
+        conn.close()
+
+
+def test_upload_writes_only_new_and_changed_entries(app_module, upload, logged_request, names):
+    request_no, stakeholders = names
+    job = upload('/api/actual-manhours/upload', excel([
+        (request_no, stakeholders['BA'], 4, '2025-03-03'), # Unchanged
+        (request_no, stakeholders['BA'], 8, '2025-03-31'), # Changed from 5
+        (request_no, stakeholders['Tester'], 3, '2025-06-02'), # New
+        (request_no, stakeholders['Tester'], 1, '2025-06-03'), # New, then repeated: the last row wins
+        (request_no, stakeholders['Tester'], 2, '2025-06-03'),
+    ]), 'hours.xlsx')
+    assert job['status'] == 'finished'
+    assert job['counts'] == {'inserted': 2, 'updated': 1, 'unchanged': 1, 'archived': 0}
+    hours = stored_hours(app_module, logged_request['request_id'])
+    assert (hours[('BA', '2025-03-03')], hours[('BA', '2025-03-31')]) == (4, 8)
+    assert (hours[('Tester', '2025-06-02')], hours[('Tester', '2025-06-03')]) == (3, 2)
+
+
+def test_identical_file_is_skipped_unless_forced(app_module, upload, logged_request, names):
+    request_no, stakeholders = names
+    content = excel([(request_no, stakeholders['BA'], 7, '2025-07-01'), (request_no, stakeholders['BA'], 4, '2025-03-03')])
+    assert upload('/api/actual-manhours/upload', content, 'hours.xlsx')['counts'] == {'inserted': 1, 'updated': 0, 'unchanged': 1, 'archived': 0}
+
+    generation = data_generation(app_module)
+    job = upload('/api/actual-manhours/upload', content, 'same hours.xlsx')
+    assert job['status'] == 'finished'
+    assert job['message'].startswith('File is identical to one already applied at ')
+    assert job['counts'] == {'inserted': 0, 'updated': 0, 'unchanged': 2, 'archived': 0}
+    assert data_generation(app_module) == generation # Nothing was written
+
+    job = upload('/api/actual-manhours/upload?force=true', content, 'hours.xlsx')
+    assert job['counts'] == {'inserted': 0, 'updated': 0, 'unchanged': 2, 'archived': 0}
+    assert not job['message'].startswith('File is identical')
+
+
+def test_file_with_failed_rows_is_not_fingerprinted(app_module, upload, logged_request, names):
+    request_no, stakeholders = names
+    content = excel([(request_no, stakeholders['BA'], 2, '2025-07-02'), (request_no, 'Nobody', 1, '2025-07-02')])
+    for _ in range(2): # Applied both times, so the row can be fixed by creating the stakeholder
+        job = upload('/api/actual-manhours/upload', content, 'hours.xlsx')
+        assert job['failed_rows'] == ['Row 3 (Stakeholder: Nobody): Stakeholder not found in system.']
+        assert not job['message'].startswith('File is identical')
+
+
+def test_entries_of_archived_requests_are_skipped(app_module, upload, logged_request, names):
+    request_no, stakeholders = names
+    assert app_module.archive_requests([logged_request['request_id']]) == 1
+    job = upload('/api/actual-manhours/upload', excel([(request_no, stakeholders['BA'], 9, '2025-03-03')]), 'hours.xlsx')
+    assert job['status'] == 'finished' and job['failed_rows'] == []
+    assert job['counts'] == {'inserted': 0, 'updated': 0, 'unchanged': 0, 'archived': 1}
+    assert 'belonged to archived requests and were skipped' in job['message']
@@ -0,0 +1,88 @@
+# tests/test_pagination.py
+import sqlite3
+
+import pytest
+
+VALUES = ['b', None, 'a', 'b', None, 'c', 'a', None, 'b', 'c', 'd']
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)')
+    conn.execute('CREATE INDEX ix_t_v ON t (v)')
+    conn.executemany('INSERT INTO t (v) VALUES (?)', [(value,) for value in VALUES])
+    yield conn
+    conn.close()
+
+
+def expected_ids(order):
+    """NULLs first ascending and last descending, ties broken by id in the same direction."""
+    rows = sorted(enumerate(VALUES, start=1), key=lambda row: (row[1] is not None, row[1] or '', row[0]))
+    return [row_id for row_id, _ in (reversed(rows) if order == 'desc' else rows)]
+
+
+def page_through(app_module, conn, **args):
+    ids, after, pages = [], None, 0
+    while True:
+        page = app_module.fetch_page(conn, 'SELECT * FROM t', {**args, **({'after': after} if after else {})},
+                                     ('v', 'id'), 'v', nullable_columns=('v',))
+        assert page['total'] == len(VALUES)
+        ids += [item['id'] for item in page['items']]
+        pages += 1
+        if page['next_cursor'] is None:
+            return ids, pages
+        after = page['next_cursor']
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, len(VALUES), 100])
+def test_pages_cover_every_row_once_in_order_across_null_sort_values(app_module, conn, order, limit):
+    ids, pages = page_through(app_module, conn, order=order, limit=str(limit))
+    assert ids == expected_ids(order)
+    assert pages == max(1, -(-len(VALUES) // limit))
+
+
+def test_columnar_pages(app_module, conn):
+    page = app_module.fetch_page(conn, 'SELECT * FROM t', {'limit': '3', 'format': 'columns'}, ('v', 'id'), 'v')
+    assert page['columns'] == ['id', 'v']
+    assert [tuple(row) for row in page['rows']] == [(2, None), (5, None), (8, None)]
+    assert 'items' not in page
+
+
+@pytest.mark.parametrize('args, error', [
+    ({'limit': '0'}, 'limit must be between 1 and 1000.'),
+    ({'limit': '1001'}, 'limit must be between 1 and 1000.'),
+    ({'limit': 'ten'}, 'limit must be an integer.'),
+    ({'sort': 'name'}, 'sort must be one of: v, id.'),
+    ({'order': 'up'}, 'order must be asc or desc.'),
+    ({'after': 'not-a-cursor'}, 'Invalid cursor.'),
+    ({'format': 'csv'}, 'format must be rows or columns.'),
+])
+def test_rejects_bad_arguments(app_module, conn, args, error):
+    with pytest.raises(ValueError, match=error):
+        app_module.fetch_page(conn, 'SELECT * FROM t', args, ('v', 'id'), 'v')
+
+
+def test_manhours_pages_include_entries_without_task_date(app_module, client, logged_request):
+    conn = sqlite3.connect(app_module.DATABASE)
+    with conn:
+        conn.execute('INSERT INTO actual_man_hours (request_id, stakeholder_id, actual_man_hours, task_date) VALUES (?, ?, 1, NULL)',
+                     (logged_request['request_id'], logged_request['stakeholder_ids']['BA']))
+    all_ids = {row[0] for row in conn.execute('SELECT id FROM actual_man_hours')}
+    conn.close()
+
+    for order in ('desc', 'asc'):
+        items, after = [], None
+        while True:
+            response = client.get('/api/actual-manhours', query_string={'limit': 1000, 'order': order, **({'after': after} if after else {})})
+            assert response.status_code == 200
+            page = response.get_json()
+            assert page['total'] == len(all_ids)
+            items += page['items']
+            if (after := page['next_cursor']) is None:
+                break
+        assert [item['id'] for item in items if item['task_date'] is None] != []
+        assert len(items) == len(all_ids) and {item['id'] for item in items} == all_ids
+        keys = [(item['task_date'] is not None, item['task_date'] or '', item['id']) for item in items]
+        assert keys == sorted(keys, reverse=order == 'desc')
@@ -0,0 +1,173 @@
+# tests/test_query_plans.py
+"""
+Checks the query plans of the hot SQL statements, so a change that turns one into a full table scan fails here.
+
+The hot routes are called through the test client. Every statement they run is captured and explained on
+the connection that ran it, so statements over temp staging tables can be explained too. For each route:
+- the plans use the expected indexes and tables (CHECKS `uses`)
+- no plan line scans actual_man_hours (or its archive copy), unless the route lists that exact line, with its reason,
+  under `allowed_scans`; changing the index such a scan walks fails the check as well
+"""
+import os
+import re
+import sqlite3
+import time
+from io import BytesIO
+
+import pytest
+
+from generate_data import write_upload_files
+
+PAGED_MANHOURS_SCANS = {
+    'SCAN amh USING INDEX ix_actual_man_hours_task_date': 'the first page walks the task_date index in order and stops at LIMIT',
+    'SCAN actual_man_hours USING COVERING INDEX ix_actual_man_hours_task_date': 'the page total counts every entry',
+}
+
+# (name, method, url or (url, JSON body or upload file name), {'uses': [...], 'allowed_scans': {plan line: reason}})
+CHECKS = [
+    ('report', 'GET', '/api/report', {
+        'uses': ['SCAN r USING INDEX ix_requests_request_date', 'SCAN request_manhour_rollup', 'SEARCH ru USING INTEGER PRIMARY KEY'],
+    }),
+    ('report by request date', 'GET', '/api/report?request_date=2025-06-02', {
+        'uses': ['SEARCH r USING INDEX ix_requests_request_date (request_date=?)'],
+    }),
+    ('report by text filters', 'GET', '/api/report?request_no=REQ-0001&department=Fin&category=Report', {
+        'uses': ['SEARCH r USING INTEGER PRIMARY KEY (rowid=?)', 'SCAN requests_fts VIRTUAL TABLE'],
+    }),
+    ('report by status', 'GET', '/api/report?current_status=Open&current_status=On+Hold', {
+        'uses': ['SCAN request_manhour_rollup'],
+    }),
+    ('report including archived', 'GET', '/api/report?include_archived=true', {
+        'uses': ['SCAN main.requests USING INDEX ix_requests_request_date', 'SEARCH archive.requests USING INTEGER PRIMARY KEY (rowid=?)',
+                 'SEARCH a USING INDEX ix_actual_man_hours_request (request_id=?)'],
+    }),
+    ('report download', 'GET', '/api/report/download', {
+        'uses': ['SCAN r USING INDEX ix_requests_request_date', 'SCAN request_manhour_rollup'],
+    }),
+    ('man-hours breakup', 'GET', '/api/report/manhours-breakup/{busiest_request_id}', {
+        'uses': ['SEARCH amh USING INDEX ux_actual_man_hours_request_stakeholder_date (request_id=?)'],
+    }),
+    ('man-hours breakup by role', 'GET', '/api/report/manhours-breakup/{busiest_request_id}?role=Developer', {
+        'uses': ['SEARCH amh USING INDEX ux_actual_man_hours_request_stakeholder_date (request_id=?)'],
+    }),
+    ('man-hours breakup including archived', 'GET', '/api/report/manhours-breakup/{busiest_request_id}?include_archived=true', {
+        'uses': ['SEARCH main.actual_man_hours USING INDEX ux_actual_man_hours_request_stakeholder_date (request_id=?)',
+                 'SEARCH archive.actual_man_hours USING INDEX ix_actual_man_hours_request (request_id=?)'],
+    }),
+    ('man-hours, first page', 'GET', '/api/actual-manhours?limit=50', {
+        'uses': ['SCAN amh USING INDEX ix_actual_man_hours_task_date'],
+        'allowed_scans': PAGED_MANHOURS_SCANS,
+    }),
+    ('man-hours, next page', 'GET', '/api/actual-manhours?limit=50&after={manhours_cursor}', {
+        'uses': ['SEARCH amh USING INDEX ix_actual_man_hours_task_date (task_date<?)'],
+        'allowed_scans': PAGED_MANHOURS_SCANS,
+    }),
+    ('man-hours, all', 'GET', '/api/actual-manhours', {
+        'uses': ['SCAN amh USING INDEX ix_actual_man_hours_task_date'],
+        'allowed_scans': {'SCAN amh USING INDEX ix_actual_man_hours_task_date': 'the unpaged list returns every entry'},
+    }),
+    ('man-hours download', 'GET', '/api/actual-manhours/download', {
+        'uses': ['SCAN amh USING INDEX ix_actual_man_hours_task_date'],
+        'allowed_scans': {'SCAN amh USING INDEX ix_actual_man_hours_task_date': 'the download exports every entry'},
+    }),
+    ('dashboard', 'GET', '/api/dashboard/data', {
+        'uses': ['SCAN rr', 'SEARCH r USING INTEGER PRIMARY KEY (rowid=?)'],
+    }),
+    ('man-hours trend', 'GET', '/api/analytics/manhours-trend?granularity=week&group_by=department&start=2025-01-01&end=2025-06-30', {
+        'uses': ['SEARCH p USING INDEX sqlite_autoindex_manhour_period_rollup_1 (granularity=? AND bucket_start>? AND bucket_start<?)'],
+    }),
+    ('utilization', 'GET', '/api/analytics/utilization?start=2025-01-01&end=2025-06-30', {
+        'uses': ['SEARCH p USING INDEX sqlite_autoindex_manhour_period_rollup_1 (granularity=? AND bucket_start>? AND bucket_start<?)'],
+    }),
+    ('man-hours batch', 'POST', ('/api/actual-manhours/batch?mode=best_effort', [
+        {'request_no': 'REQ-000001', 'stakeholder_name': '{stakeholder_name}', 'actual_man_hours': 4, 'task_date': '2025-12-01'},
+        {'request_id': 2, 'stakeholder_id': 1, 'actual_man_hours': 2, 'task_date': '2025-12-02'},
+    ]), {
+        'uses': ['SEARCH a USING COVERING INDEX ux_actual_man_hours_request_stakeholder_date'],
+    }),
+    ('man-hours upload', 'POST', ('/api/actual-manhours/upload?force=true', 'manhours'), {
+        'uses': ['SEARCH a USING INDEX ux_actual_man_hours_request_stakeholder_date (request_id=? AND stakeholder_id=? AND task_date=?)',
+                 'SEARCH a USING INTEGER PRIMARY KEY (rowid=?)'],
+    }),
+]
+
+# Words that can follow a table name without being its alias
+SQL_KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'CROSS', 'ON', 'USING', 'GROUP', 'ORDER', 'LIMIT', 'SET', 'VALUES',
+                'FROM', 'END', 'THEN', 'ELSE', 'WHEN', 'AND', 'OR', 'IS', 'IN', 'NOT', 'ASC', 'DESC', 'UNION', 'HAVING',
+                'INDEXED', 'RETURNING', 'DEFAULT', 'SELECT', 'WINDOW'}
+TABLE_REFERENCE_RE = re.compile(r'(?<![.\w])(?:(?:main|archive)\.)?actual_man_hours\s+(?:AS\s+)?(\w+)', re.IGNORECASE)
+
+
+def manhour_aliases(sql):
+    """The names a statement may refer to actual_man_hours, hot or archived, by in its plan."""
+    return {'actual_man_hours', 'main.actual_man_hours', 'archive.actual_man_hours'} | {alias for alias in TABLE_REFERENCE_RE.findall(sql) if alias.upper() not in SQL_KEYWORDS}
+
+
+def scans_of_manhours(sql, plan):
+    """The plan lines that scan actual_man_hours (as opposed to searching it through an index key)."""
+    aliases = manhour_aliases(sql)
+    return [line.strip() for line in plan.splitlines()
+            if line.strip().startswith('SCAN ') and line.split()[1] in aliases]
+
+
+@pytest.fixture(scope='module')
+def placeholders(app_module, tmp_path_factory):
+    """Values the CHECKS urls and bodies are formatted with, and the upload files by name."""
+    conn = sqlite3.connect(app_module.DATABASE)
+    values = {
+        'busiest_request_id': conn.execute(
+            'SELECT request_id FROM actual_man_hours GROUP BY request_id ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0],
+        'stakeholder_name': conn.execute('SELECT name FROM stakeholders WHERE id = 1').fetchone()[0],
+        'upload_files': write_upload_files(conn, str(tmp_path_factory.mktemp('uploads')), 200, seed=42),
+    }
+    conn.close()
+    values['manhours_cursor'] = app_module.app.test_client().get(
+        '/api/actual-manhours?limit=50&consistency=live').get_json()['next_cursor']
+    return values
+
+
+@pytest.fixture
+def captured(app_module, monkeypatch):
+    """The (sql, plan) of every statement run while the test runs."""
+    monkeypatch.setitem(app_module.app.config, 'RESPONSE_CACHE_MAX_BYTES', 0) # Cached responses would run no statements
+    monkeypatch.setitem(app_module.app.config, 'METRICS_ENABLED', True) # Statements are captured through the metrics instrumentation
+    statements = []
+    record_statement = app_module.record_statement
+
+    def capture(conn, sql, parameters, *rest):
+        statements.append((sql, app_module.explain_query_plan(conn, sql, parameters)))
+        return record_statement(conn, sql, parameters, *rest)
+    monkeypatch.setattr(app_module, 'record_statement', capture)
+    return statements
+
+
+@pytest.mark.parametrize('method, target, expected', [check[1:] for check in CHECKS], ids=[check[0] for check in CHECKS])
+def test_query_plans(client, placeholders, captured, method, target, expected):
+    url, body = target if isinstance(target, tuple) else (target, None)
+    if isinstance(body, list):
+        body = [{key: value.format(**placeholders) if isinstance(value, str) else value for key, value in record.items()}
+                for record in body]
+    if isinstance(body, str): # An upload: poll its job until done; a failed job counts as an error
+        path = placeholders['upload_files'][body]
+        with open(path, 'rb') as f:
+            response = client.post(url, data={'file': (BytesIO(f.read()), os.path.basename(path))})
+        if response.status_code == 202:
+            status_url = response.get_json()['status_url']
+            while (response := client.get(status_url)).get_json()['status'] not in ('finished', 'failed'):
+                time.sleep(0.01)
+            if response.get_json()['status'] == 'failed':
+                response.status_code = 500
+    else:
+        response = client.open(url.format(**placeholders), method=method, json=body)
+    response.get_data()
+
+    problems = []
+    if response.status_code >= 400:
+        problems.append(f'HTTP {response.status_code}')
+    plans = '\n'.join(plan for _, plan in captured)
+    problems += [f'expected {use!r} in a plan' for use in expected['uses'] if use not in plans]
+    allowed = expected.get('allowed_scans', {})
+    for sql, plan in captured:
+        problems += [f'{scan!r} scans actual_man_hours in: {" ".join(sql.split())[:160]}'
+                     for scan in scans_of_manhours(sql, plan) if scan not in allowed]
+    assert not problems, '\n'.join(problems + [f'{" ".join(sql.split())[:160]}\n{plan}' for sql, plan in captured])
@@ -0,0 +1,76 @@
+# tests/test_read_snapshots.py
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+
+@pytest.mark.parametrize('path, args', [
+    ('/api/analytics/manhours-trend', {'granularity': 'week', 'group_by': 'stakeholder'}),
+    ('/api/analytics/utilization', {}),
+])
+@pytest.mark.parametrize('consistency', ['snapshot', 'live'])
+def test_analytics_gzip_decodes_once(client, path, args, consistency):
+    assert client.post('/api/snapshot').status_code == 200
+    for _ in range(2): # The second response comes from the response cache
+        response = client.get(path, query_string={**args, 'consistency': consistency}, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert isinstance(json.loads(gzip.decompress(response.get_data())), dict)
+        assert ('X-Snapshot-Taken-At' in response.headers) == (consistency == 'snapshot')
+
+
+def write_manhours(client, hours):
+    """Changes the data, so the next refresh takes a new snapshot."""
+    response = client.post('/api/actual-manhours/batch', json=[
+        {'request_id': 1, 'stakeholder_id': 1, 'actual_man_hours': hours, 'task_date': '2025-01-01'}])
+    assert response.status_code == 200
+
+
+def age(path, seconds):
+    for file in (path, path[:-len('.db')] + '.archive.db'):
+        os.utime(file, (time.time() - seconds, time.time() - seconds))
+
+
+def test_shared_snapshot_directory_keeps_snapshots_other_managers_read(app_module, client, tmp_path):
+    config = {**app_module.app.config, 'SNAPSHOT_REFRESH_SECONDS': 3600} # Refresh threads sleep after their first refresh
+    first = app_module.SnapshotManager(str(tmp_path), config)
+    second = app_module.SnapshotManager(str(tmp_path), config)
+    write_manhours(client, 1)
+    old = first.refresh()
+    assert second.refresh()['path'] == old['path'] # Shared, not taken twice
+
+    # The first manager moves on twice while the second still reads the old snapshot, created long ago
+    age(old['path'], 3 * 3600)
+    write_manhours(client, 2)
+    first.refresh()
+    write_manhours(client, 3)
+    first.refresh()
+    assert os.path.exists(old['path'])
+    conn = old['pool']._connect() # A new connection on the second manager's snapshot still opens
+    assert conn.execute('SELECT COUNT(*) FROM actual_man_hours').fetchone()[0] > 0
+    conn.close()
+
+    # Two intervals after it was superseded, and once the second manager has moved on, it is removed
+    assert second.refresh()['path'] == first.current['path']
+    previous = first.current['path']
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (time.time() - 3 * 3600, time.time() - 3 * 3600))
+    write_manhours(client, 4)
+    first.refresh()
+    # Only the snapshot superseded just now stays, next to the current one
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for snapshot_path in (previous, first.current['path'])
+        for path in (snapshot_path, snapshot_path[:-len('.db')] + '.archive.db'))
+
+
+def test_missing_snapshot_files_fall_back_to_live_reads(app_module, client, monkeypatch, tmp_path):
+    snapshot = {'generation': 0, 'taken_at': '2000-01-01T00:00:00Z', 'path': str(tmp_path / 'snapshot-0.db'),
+                'pool': app_module.SnapshotPool(str(tmp_path / 'snapshot-0.db'), str(tmp_path / 'snapshot-0.archive.db'),
+                                                app_module.app.config)}
+    monkeypatch.setattr(app_module.get_snapshot_manager(), 'current', snapshot)
+    response = client.get('/api/report/download')
+    assert response.status_code == 200
+    assert 'X-Snapshot-Taken-At' not in response.headers
@@ -0,0 +1,84 @@
+# tests/test_rollups.py
+"""Runs each write path that touches man-hours and checks the trigger-maintained rollups against a rebuild."""
+import sqlite3
+
+import pytest
+
+
+def stakeholder_name(app_module, stakeholder_id):
+    conn = sqlite3.connect(app_module.DATABASE)
+    try:
+        return conn.execute('SELECT name FROM stakeholders WHERE id = ?', (stakeholder_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def log_more_hours(app_module, client, ids):
+    response = client.post('/api/actual-manhours/batch', json=[
+        {'request_id': ids['request_id'], 'stakeholder_id': ids['stakeholder_ids']['BA'], 'actual_man_hours': 9, 'task_date': '2025-03-03'},
+        {'request_id': ids['request_id'], 'stakeholder_id': ids['stakeholder_ids']['Tester'], 'actual_man_hours': 2, 'task_date': '2025-05-05'},
+    ])
+    assert response.status_code == 200
+
+
+def change_role(app_module, client, ids):
+    stakeholder_id = ids['stakeholder_ids']['BA']
+    response = client.put(f'/api/stakeholders/{stakeholder_id}', json={'name': stakeholder_name(app_module, stakeholder_id), 'role': 'Developer'})
+    assert response.status_code == 200
+
+
+def change_role_of_seeded_stakeholder(app_module, client, ids):
+    response = client.put('/api/stakeholders/2', json={'name': stakeholder_name(app_module, 2), 'role': 'Tester'})
+    assert response.status_code == 200
+
+
+def delete_stakeholder(app_module, client, ids):
+    assert client.delete(f"/api/stakeholders/{ids['stakeholder_ids']['Developer']}").status_code == 200
+
+
+def delete_request(app_module, client, ids):
+    assert client.delete(f"/api/requests/{ids['request_id']}").status_code == 200
+
+
+def archive_and_restore(app_module, client, ids):
+    assert app_module.archive_requests([ids['request_id']]) == 1
+    change_role(app_module, client, ids) # While archived, the request's hours are in no rollup
+    assert app_module.unarchive_requests([ids['request_id']]) == 1
+
+
+WRITE_PATHS = {
+    'log hours': lambda app_module, client, ids: None,
+    'log more hours': log_more_hours,
+    'change role': change_role,
+    'change role of seeded stakeholder': change_role_of_seeded_stakeholder,
+    'delete stakeholder': delete_stakeholder,
+    'delete request': delete_request,
+    'archive and restore': archive_and_restore,
+}
+
+
+def assert_matches_rebuild(app_module, table, rebuild):
+    """Compares the table's non-zero rows with what rebuild() computes, then rolls the rebuild back."""
+    conn = sqlite3.connect(app_module.DATABASE, isolation_level=None)
+    try:
+        query = f'SELECT * FROM {table} WHERE actual_man_hours != 0'
+        conn.execute('BEGIN IMMEDIATE')
+        maintained = sorted(conn.execute(query).fetchall())
+        rebuild(conn)
+        rebuilt = sorted(conn.execute(query).fetchall())
+        conn.execute('ROLLBACK')
+    finally:
+        conn.close()
+    assert maintained == rebuilt
+
+
+@pytest.mark.parametrize('write', WRITE_PATHS.values(), ids=WRITE_PATHS.keys())
+def test_request_rollup_matches_rebuild(app_module, client, logged_request, write):
+    write(app_module, client, logged_request)
+    assert_matches_rebuild(app_module, 'request_manhour_rollup', app_module.rebuild_manhour_rollup)
+
+
+@pytest.mark.parametrize('write', WRITE_PATHS.values(), ids=WRITE_PATHS.keys())
+def test_period_rollup_matches_rebuild(app_module, client, logged_request, write):
+    write(app_module, client, logged_request)
+    assert_matches_rebuild(app_module, 'manhour_period_rollup', app_module.rebuild_manhour_period_rollup)
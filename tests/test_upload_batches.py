@@ -0,0 +1,86 @@
+# tests/test_upload_batches.py
+import sqlite3
+import uuid
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+COLUMNS = ['Request No', 'Stakeholder Name', 'Actual Man-Hours', 'Task Date']
+
+
+def file_content(rows, extension):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    if extension == 'csv':
+        return df.to_csv(index=False).encode()
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('extension', ['csv', 'xlsx'])
+def test_batches_keep_row_positions_across_the_file(app_module, extension):
+    rows = [(f'REQ-{i}', 'Name', i, '2025-01-01') for i in range(7)]
+    batches = list(app_module.read_upload_batches(BytesIO(file_content(rows, extension)), f'hours.{extension}', 3))
+    assert [len(df) for df in batches] == [3, 3, 1]
+    assert [index for df in batches for index in df.index] == list(range(7))
+    assert [value for df in batches for value in df['Request No']] == [row[0] for row in rows]
+    assert all(list(df.columns) == COLUMNS for df in batches)
+
+
+def test_csv_cells_stay_text(app_module):
+    df, = app_module.read_upload_batches(BytesIO(b'Request No,Actual Man-Hours\n007,4\n'), 'hours.csv', 10)
+    assert (df.at[0, 'Request No'], df.at[0, 'Actual Man-Hours']) == ('007', '4')
+
+
+@pytest.fixture
+def small_batches(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_BATCH_ROWS', 2)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'xlsx'])
+def test_upload_across_batches(app_module, upload, logged_request, small_batches, extension):
+    conn = sqlite3.connect(app_module.DATABASE)
+    request_no = conn.execute('SELECT request_no FROM requests WHERE id = ?', (logged_request['request_id'],)).fetchone()[0]
+    name = conn.execute('SELECT name FROM stakeholders WHERE id = ?', (logged_request['stakeholder_ids']['BA'],)).fetchone()[0]
+    conn.close()
+    job = upload('/api/actual-manhours/upload', file_content([
+        (request_no, name, 1, '2025-08-01'),
+        (request_no, name, 2, '2025-08-02'),
+        (request_no, name, 3, '2025-08-01'), # Overwrites row 2, written by the first batch
+        ('NO-SUCH-REQUEST', name, 1, '2025-08-01'),
+        (request_no, name, 'many', '2025-08-03'),
+    ], extension), f'hours.{extension}')
+    assert job['status'] == 'finished'
+    assert (job['rows_total'], job['rows_processed']) == (5, 5)
+    assert job['counts'] == {'inserted': 2, 'updated': 1, 'unchanged': 0, 'archived': 0}
+    assert job['failed_rows'] == [ # Numbered by their row in the file, not within their batch
+        'Row 5 (Request No: NO-SUCH-REQUEST): Request No not found in system.',
+        f"Row 6 (Request No: {request_no}, Stakeholder: {name}): Invalid 'Actual Man-Hours' value.",
+    ]
+    conn = sqlite3.connect(app_module.DATABASE)
+    stored = dict(conn.execute("SELECT task_date, actual_man_hours FROM actual_man_hours WHERE request_id = ? AND task_date LIKE '2025-08-%'",
+                               (logged_request['request_id'],)).fetchall())
+    conn.close()
+    assert stored == {'2025-08-01': 3, '2025-08-02': 2}
+
+
+def test_request_numbers_are_unique_across_batches(app_module, upload, small_batches):
+    tag = uuid.uuid4().hex[:8]
+    rows = [(f'{number}-{tag}', 'Tests', 'QA', 'Test', '2025-03-01', 'Title') for number in ('A', 'B', 'C', 'A')]
+    content = pd.DataFrame(rows, columns=['Request No', 'Requested By', 'Department', 'Category', 'Request Date', 'Request Title']).to_csv(index=False).encode()
+    job = upload('/api/requests/upload', content, 'requests.csv')
+    assert job['status'] == 'finished'
+    assert job['message'].startswith('Successfully uploaded 3 requests.')
+    assert job['failed_rows'] == [f'Row 5 (Request No: A-{tag}): Duplicate request number.']
+
+
+@pytest.mark.parametrize('content, status, rows_total', [
+    (b'Request No,Stakeholder Name,Actual Man-Hours,Task Date\n', 'finished', 0),
+    (b'', 'failed', None),
+    (b'Request No,Hours\nREQ-1,4\n', 'failed', None),
+])
+def test_csv_without_rows_or_columns(upload, content, status, rows_total):
+    job = upload('/api/actual-manhours/upload', content, 'hours.csv')
+    assert job['status'] == status
+    assert job['rows_total'] == rows_total
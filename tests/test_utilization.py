@@ -0,0 +1,21 @@
+# tests/test_utilization.py
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/analytics/utilization', '/api/analytics/utilization/download'])
+@pytest.mark.parametrize('args', [
+    {'start': '0001-01-01'},
+    {'end': '9999-12-31'},
+    {'start': '2000-01-01', 'end': '2025-01-01'},
+    {'start': '20240101'},
+    {'end': '2024-1-1'},
+])
+def test_rejects_unbounded_ranges_and_loose_dates(client, path, args):
+    response = client.get(path, query_string={**args, 'consistency': 'live'})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('args', [{}, {'start': '2024-01-01'}, {'end': '2025-12-31'}, {'start': '2024-01-01', 'end': '2025-12-31'}])
+def test_accepts_ranges_within_the_data(client, args):
+    response = client.get('/api/analytics/utilization', query_string={**args, 'consistency': 'live'})
+    assert response.status_code == 200